@@ -0,0 +1,273 @@
+import re
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+GRANULARITIES = ('hour', 'day')
+HOURLY_RETENTION_DAYS = 14   # hourly buckets older than this are dropped; daily ones are kept
+SETTLE_SECONDS = 60          # rows younger than this wait for the next run (in-flight inserts may still commit)
+
+# Recovery time histogram, upper bounds in hours. Medians do not add up across
+# buckets but histograms do, so the median for any range is read off the
+# merged histogram. Anything slower than the last bound lands in an open bucket.
+RECOVERY_BOUNDS = (1, 2, 4, 8, 12, 24, 48, 72, 120, 168, 336, 720, 1440, 2160)
+
+# First keyword found in a lost item's name decides its category
+CATEGORY_KEYWORDS = [
+    ('Phones', ('phone', 'iphone', 'android', 'samsung', 'pixel', 'mobile', 'cellphone')),
+    ('Laptops & Tablets', ('laptop', 'macbook', 'notebook', 'chromebook', 'ipad', 'tablet', 'surface')),
+    ('Audio', ('airpods', 'earbuds', 'earphones', 'headphones', 'headset', 'earpods', 'speaker')),
+    ('Chargers & Cables', ('charger', 'cable', 'adapter', 'powerbank', 'usb')),
+    ('Wallets & Cards', ('wallet', 'purse', 'card', 'id', 'license', 'passport')),
+    ('Keys', ('key', 'keys', 'keychain', 'fob')),
+    ('Bags', ('bag', 'backpack', 'handbag', 'tote', 'pouch', 'case')),
+    ('Watches & Jewelry', ('watch', 'smartwatch', 'ring', 'necklace', 'bracelet', 'earring')),
+    ('Eyewear', ('glasses', 'sunglasses', 'spectacles')),
+    ('Clothing', ('jacket', 'hoodie', 'sweater', 'coat', 'scarf', 'cap', 'hat', 'umbrella')),
+    ('Books & Stationery', ('book', 'textbook', 'calculator', 'pen', 'pencil')),
+    ('Bottles', ('bottle', 'flask', 'tumbler')),
+]
+OTHER_CATEGORY = 'Other'
+
+DIMENSION_LENGTH = 100
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def item_category(device_name):
+    words = set(_WORD_RE.findall(str(device_name or '').lower()))
+    # Plurals: "keys" -> "key", "chargers" -> "charger"
+    words |= {w[:-1] for w in words if len(w) > 3 and w.endswith('s')}
+    for category, keywords in CATEGORY_KEYWORDS:
+        if words.intersection(keywords):
+            return category
+    return OTHER_CATEGORY
+
+
+def location_key(location):
+    """Group "main library", "Main  Library " and "MAIN LIBRARY" together"""
+    return ' '.join(str(location or 'Unknown').split()).title()[:DIMENSION_LENGTH] or 'Unknown'
+
+
+def recovery_bucket(hours):
+    for bound in RECOVERY_BOUNDS:
+        if hours <= bound:
+            return str(bound)
+    return f"{RECOVERY_BOUNDS[-1]}+"
+
+
+def bucket_start(when, granularity):
+    if granularity == 'hour':
+        return when.replace(minute=0, second=0, microsecond=0)
+    return when.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _as_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.combine(value, datetime.min.time())
+
+
+# ==================== SOURCES ====================
+# Each source reads rows past its watermark in order and turns them into
+# (metric, event time, dimension) increments.
+
+def _item_events(metric, with_category):
+    def events(row):
+        when = _as_datetime(row['posted_date'])
+        yield metric, when, location_key(row['location'])
+        if with_category:
+            yield 'lost_category', when, item_category(row['device_name'])
+    return events
+
+
+def _claim_events(row):
+    when = _as_datetime(row['decided_at'])
+    yield 'claims_decided', when, row['status']
+    posted = _as_datetime(row['posted_date'])
+    if row['status'] == 'approved' and posted is not None:
+        hours = max((when - posted).total_seconds() / 3600, 0)
+        yield 'recovery_hours', when, recovery_bucket(hours)
+
+
+SOURCES = {
+    # Inserts only: the watermark is the last id rolled up
+    'found_items': {
+        'query': '''
+            SELECT id, location, posted_date FROM found_items
+            WHERE id > %s ORDER BY id LIMIT %s
+        ''',
+        'time_column': 'posted_date',
+        'events': _item_events('found_posted', False),
+    },
+    'lost_items': {
+        'query': '''
+            SELECT id, location, device_name, posted_date FROM lost_items
+            WHERE id > %s ORDER BY id LIMIT %s
+        ''',
+        'time_column': 'posted_date',
+        'events': _item_events('lost_posted', True),
+    },
+    # Decisions update existing rows, so this one follows (decided_at, id)
+    'claim_decisions': {
+        'query': '''
+            SELECT c.id, c.status, c.decided_at, f.posted_date
+            FROM claims c LEFT JOIN found_items f ON f.id = c.found_item_id
+            WHERE c.decided_at IS NOT NULL
+              AND (c.decided_at > %s OR (c.decided_at = %s AND c.id > %s))
+            ORDER BY c.decided_at, c.id LIMIT %s
+        ''',
+        'time_column': 'decided_at',
+        'events': _claim_events,
+    },
+}
+
+
+def _read_watermark(cursor, source):
+    cursor.execute("SELECT last_id, last_time FROM rollup_watermarks WHERE source = %s FOR UPDATE", (source,))
+    row = cursor.fetchone()
+    if not row:
+        return 0, datetime(1970, 1, 1)
+    return row['last_id'] or 0, row['last_time'] or datetime(1970, 1, 1)
+
+
+def _fetch(cursor, source, last_id, last_time, batch_size):
+    if source == 'claim_decisions':
+        params = (last_time, last_time, last_id, batch_size)
+    else:
+        params = (last_id, batch_size)
+    cursor.execute(SOURCES[source]['query'], params)
+    return cursor.fetchall()
+
+
+def _save(cursor, source, increments, last_id, last_time):
+    if increments:
+        rows = [(granularity, bucket, metric, dimension[:DIMENSION_LENGTH], value)
+                for (granularity, bucket, metric, dimension), value in sorted(increments.items())]
+        cursor.execute(f'''
+            INSERT INTO metric_rollups (granularity, bucket_start, metric, dimension, value)
+            VALUES {', '.join(['(%s, %s, %s, %s, %s)'] * len(rows))}
+            ON DUPLICATE KEY UPDATE value = value + VALUES(value)
+        ''', tuple(value for row in rows for value in row))
+    cursor.execute('''
+        INSERT INTO rollup_watermarks (source, last_id, last_time) VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE last_id = VALUES(last_id), last_time = VALUES(last_time)
+    ''', (source, last_id, last_time))
+
+
+def run_rollups(conn, batch_size=5000, now=None):
+    """Fold rows added since the last run into the hourly and daily rollups.
+
+    Each batch's increments and its watermark commit together, so a crash
+    never counts a row twice or skips one. Returns rows processed per source.
+    """
+    now = now or datetime.now()
+    settled = now - timedelta(seconds=SETTLE_SECONDS)
+    processed = {}
+    cursor = conn.cursor(dictionary=True)
+    try:
+        for source, spec in SOURCES.items():
+            processed[source] = 0
+            while True:
+                last_id, last_time = _read_watermark(cursor, source)
+                rows = _fetch(cursor, source, last_id, last_time, batch_size)
+                full_batch = len(rows) == batch_size
+
+                increments = Counter()
+                for row in rows:
+                    when = _as_datetime(row[spec['time_column']])
+                    # Stop at the first unsettled row; it and everything after wait for the next run
+                    if when is not None and when >= settled:
+                        full_batch = False
+                        break
+                    if when is not None:
+                        for metric, event_time, dimension in spec['events'](row):
+                            for granularity in GRANULARITIES:
+                                increments[(granularity, bucket_start(event_time, granularity), metric, dimension)] += 1
+                    last_id, last_time = row['id'], when or last_time
+                    processed[source] += 1
+
+                _save(cursor, source, increments, last_id, last_time)
+                conn.commit()
+                if not full_batch:
+                    break
+
+        cursor.execute("DELETE FROM metric_rollups WHERE granularity = 'hour' AND bucket_start < %s",
+                       (bucket_start(now - timedelta(days=HOURLY_RETENTION_DAYS), 'day'),))
+        conn.commit()
+    finally:
+        cursor.close()
+    return processed
+
+
+# ==================== READING ====================
+def median_from_histogram(counts):
+    """Median hours from {bucket label: count}, interpolated inside its bucket"""
+    total = sum(counts.values())
+    if not total:
+        return None
+    half = total / 2
+    seen = 0
+    lower = 0
+    for bound in RECOVERY_BOUNDS:
+        n = counts.get(str(bound), 0)
+        if n and seen + n >= half:
+            return round(lower + (bound - lower) * (half - seen) / n, 1)
+        seen += n
+        lower = bound
+    return float(RECOVERY_BOUNDS[-1])
+
+
+def read_metrics(cursor, granularity, start, end, top=10):
+    """Time series and range totals for the analytics API.
+
+    Reads only the rollup rows between ``start`` and ``end`` (exclusive).
+    """
+    cursor.execute('''
+        SELECT bucket_start, metric, dimension, value FROM metric_rollups
+        WHERE granularity = %s AND bucket_start >= %s AND bucket_start < %s
+    ''', (granularity, start, end))
+
+    per_bucket = defaultdict(lambda: defaultdict(Counter))   # bucket -> metric -> dimension -> n
+    totals = defaultdict(Counter)                            # metric -> dimension -> n
+    for row in cursor.fetchall():
+        if not isinstance(row, dict):
+            row = dict(zip(('bucket_start', 'metric', 'dimension', 'value'), row))
+        per_bucket[row['bucket_start']][row['metric']][row['dimension']] += row['value']
+        totals[row['metric']][row['dimension']] += row['value']
+
+    def approval_rate(decisions):
+        decided = decisions.get('approved', 0) + decisions.get('rejected', 0)
+        return round(decisions.get('approved', 0) / decided, 3) if decided else None
+
+    step = timedelta(hours=1) if granularity == 'hour' else timedelta(days=1)
+    series = []
+    bucket = bucket_start(start, granularity)
+    while bucket < end:
+        metrics = per_bucket.get(bucket, {})
+        series.append({
+            'bucket': bucket.isoformat(),
+            'found_posted': sum(metrics.get('found_posted', {}).values()),
+            'lost_posted': sum(metrics.get('lost_posted', {}).values()),
+            'claims_decided': sum(metrics.get('claims_decided', {}).values()),
+            'approval_rate': approval_rate(metrics.get('claims_decided', {})),
+            'median_recovery_hours': median_from_histogram(metrics.get('recovery_hours', {})),
+        })
+        bucket += step
+
+    hotspots = totals['found_posted'] + totals['lost_posted']
+    return {
+        'granularity': granularity,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'series': series,
+        'totals': {
+            'found_posted': sum(totals['found_posted'].values()),
+            'lost_posted': sum(totals['lost_posted'].values()),
+            'claims_decided': sum(totals['claims_decided'].values()),
+            'approval_rate': approval_rate(totals['claims_decided']),
+            'median_recovery_hours': median_from_histogram(totals['recovery_hours']),
+        },
+        'hotspots': [{'location': loc, 'items': n} for loc, n in hotspots.most_common(top)],
+        'top_lost_categories': [{'category': cat, 'items': n}
+                                for cat, n in totals['lost_category'].most_common(top)],
+    }
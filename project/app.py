@@ -1,21 +1,44 @@
 
-from flask import Flask, render_template, request, redirect, url_for, session, flash, send_file
-import bcrypt
+from flask import Flask, Request, render_template, request, redirect, url_for, session, flash, send_file, send_from_directory, jsonify, g, has_request_context, Response
 from functools import wraps
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
-from werkzeug.utils import secure_filename
-from pdf_report import generate_admin_report
-from io import BytesIO
+from report_jobs import ReportJobs, run_admin_report, SECTION_SOURCES
 import traceback
 import mysql.connector
 from mysql.connector import Error
+from db_pool import ConnectionPool, PoolExhaustedError
+from matching import MatchIndex
+from search import SearchIndex
+from events import EventBroker, format_sse
+from stats import (record_change, bump_user, read_stats, rebuild_stats, reconcile_unread_counters,
+                   rebuild_conversations, conversation_pair, PREVIEW_LENGTH)
+from migrations import upgrade, current_version, MigrationError, LATEST_VERSION
+from analytics import run_rollups, read_metrics, HOURLY_RETENTION_DAYS
+from images import ImagePipeline, VARIANT_WIDTHS, VARIANT_DIR, variant_filename, sniff_image_type, image_phash
+from similar import ImageHashIndex
+from blobs import BlobStore, UploadRejected, is_blob_key, is_content_addressed
+from pagecache import PageCache, bump_versions, read_versions, make_etag
+from auth import PasswordHasher, HasherBusy, LoginThrottle
+from querylog import QueryLog, format_slow_request
+import metrics
+import click
+from werkzeug.http import is_resource_modified
+from werkzeug.middleware.proxy_fix import ProxyFix
+from io import BytesIO
+import logging
+import threading
+import time
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-here-change-in-production'
 app.config['UPLOAD_FOLDER'] = 'static/uploads'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['MAX_UPLOAD_SIZE'] = 10 * 1024 * 1024     # per image; checked while the upload streams in
 app.config['ALLOWED_EXTENSIONS'] = {'png', 'jpg', 'jpeg', 'gif'}
+app.config['IMAGE_WORKERS'] = 2            # threads resizing uploads into thumbnail/medium variants
+app.config['BLOB_FOLDER'] = 'media'        # content-addressed upload store, served at /media
+app.config['MEDIA_MAX_AGE'] = 365 * 24 * 3600  # cache lifetime for hash-named files (they never change)
 
 # Database configuration
 app.config['MYSQL_HOST'] = 'localhost'
@@ -24,162 +47,803 @@ app.config['MYSQL_PASSWORD'] = ''  # Default XAMPP password is empty
 app.config['MYSQL_DB'] = 'campus_lost_found'
 app.config['MYSQL_PORT'] = 3306
 
+# Connection pool configuration
+app.config['DB_POOL_SIZE'] = 10            # max open connections per worker
+app.config['DB_POOL_TIMEOUT'] = 5          # seconds to wait for a free connection
+app.config['DB_POOL_RECYCLE'] = 1800       # replace connections older than this (seconds)
+app.config['DB_POOL_PING_INTERVAL'] = 30   # ping idle connections unused for this long (seconds)
+
+# SQL instrumentation (see querylog.py)
+app.config['SLOW_REQUEST_MS'] = 500        # requests at least this slow are logged with every query they ran
+app.config['QUERY_STATS_WINDOW'] = 300     # seconds of history behind /admin/query_stats
+
+# Prometheus metrics at /metrics (see metrics.py; set PROMETHEUS_MULTIPROC_DIR with several workers)
+app.config['METRICS_GAUGE_TTL'] = 15       # seconds the unread/pending gauges are reused between scrapes
+
+# Lost/found matching
+app.config['MATCH_INDEX_TTL'] = 300        # rebuild the in-memory match index this often (seconds)
+app.config['MATCHES_PER_ITEM'] = 3         # suggestions shown per item on the dashboard
+app.config['IMAGE_MATCH_MAX_DISTANCE'] = 10  # photo hash bits (of 64) that may differ for "visually similar"
+
+# Full-text search
+app.config['SEARCH_INDEX_TTL'] = 300       # rebuild the in-memory search index this often (seconds)
+app.config['SEARCH_MAX_RESULTS'] = 500     # cap on ids a text filter passes to the item queries
+
+# Admin dashboard
+app.config['ADMIN_PAGE_SIZE'] = 25
+
+# Item browsing
+app.config['ITEMS_PER_PAGE'] = 24
+
+# Admin PDF report
+app.config['REPORT_FETCH_SIZE'] = 500      # rows pulled from the server per round trip while rendering
+app.config['REPORT_FOLDER'] = 'reports'    # finished reports are cached here
+app.config['REPORT_CACHE_TTL'] = 600       # seconds a finished report is served before re-rendering
+app.config['REPORT_WORKERS'] = 1           # report render processes per web worker
+
+# Chat
+app.config['MESSAGES_PER_PAGE'] = 50       # thread messages shown per page, newest first
+app.config['UNREAD_RECONCILE_INTERVAL'] = 3600  # seconds between repairs of the cached unread counters
+
+# Live updates (Server-Sent Events)
+app.config['SSE_KEEPALIVE'] = 15           # seconds between keep-alive comments on idle streams
+app.config['SSE_MAX_DURATION'] = 300       # streams are closed after this long; browsers reconnect
+
+# Analytics rollups (see analytics.py)
+app.config['ROLLUP_INTERVAL'] = 300        # seconds between incremental rollup runs
+app.config['ROLLUP_BATCH_SIZE'] = 5000     # source rows folded per transaction
+app.config['METRICS_DEFAULT_DAYS'] = 30    # range served by /admin/api/metrics when none is given
+
+# Deployment
+app.config['WEB_WORKERS'] = int(os.environ.get('WEB_CONCURRENCY', 1))  # worker processes on this host (gunicorn's setting)
+app.config['TRUSTED_PROXIES'] = 0          # reverse proxies in front of the app; each appends to X-Forwarded-For
+
+# Passwords and login throttling (see auth.py)
+app.config['BCRYPT_ROUNDS'] = None         # fixed bcrypt cost; None calibrates one at startup
+app.config['BCRYPT_TARGET_MS'] = 200       # calibrated cost: the highest whose hash takes at most this long
+app.config['BCRYPT_MIN_ROUNDS'] = 10       # never calibrate below this cost
+# Passwords hashed at once per worker. Each hash holds a core, so half the host's
+# cores are shared out between the workers and the rest stay free for requests.
+app.config['HASH_WORKERS'] = max(1, (os.cpu_count() or 2) // 2 // app.config['WEB_WORKERS'])
+app.config['HASH_QUEUE_DEPTH'] = 32        # logins that may wait for a hashing slot before being turned away
+# Failures are counted per worker process, so with several workers an attacker gets up to WEB_WORKERS times these
+app.config['LOGIN_FAILURES_PER_ACCOUNT'] = 5   # failed logins allowed per account ...
+app.config['LOGIN_FAILURES_PER_IP'] = 20   # ... and per client address ...
+app.config['LOGIN_THROTTLE_WINDOW'] = 300  # ... within this many seconds
+
+# Item/claim page caching (ETags + rendered HTML, see pagecache.py)
+app.config['PAGE_CACHE_TTL'] = 300         # seconds a rendered page may be reused
+app.config['PAGE_CACHE_SIZE'] = 1000       # rendered pages kept per worker
+
+# Behind a proxy every request comes from the proxy's address; take the client's
+# from the X-Forwarded-For entries the trusted proxies added (the login throttle keys on it)
+if app.config['TRUSTED_PROXIES']:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXIES'],
+                            x_proto=app.config['TRUSTED_PROXIES'])
+
 # Ensure upload folder exists
 if not os.path.exists(app.config['UPLOAD_FOLDER']):
     os.makedirs(app.config['UPLOAD_FOLDER'])
 
+query_log = QueryLog(window=app.config['QUERY_STATS_WINDOW'])
+
+def _connect():
+    return query_log.wrap(mysql.connector.connect(
+        host=app.config['MYSQL_HOST'],
+        user=app.config['MYSQL_USER'],
+        password=app.config['MYSQL_PASSWORD'],
+        database=app.config['MYSQL_DB'],
+        port=app.config['MYSQL_PORT']
+    ))
+
+db_pool = ConnectionPool(
+    _connect,
+    max_size=app.config['DB_POOL_SIZE'],
+    acquire_timeout=app.config['DB_POOL_TIMEOUT'],
+    recycle=app.config['DB_POOL_RECYCLE'],
+    ping_interval=app.config['DB_POOL_PING_INTERVAL'],
+    on_acquire=metrics.DB_ACQUIRE.observe
+)
+
 def get_db_connection():
-    """Create and return a database connection"""
+    """Borrow a database connection from the pool.
+
+    conn.close() returns it to the pool; anything a handler forgets to
+    return is released when the request ends.
+    """
     try:
-        conn = mysql.connector.connect(
-            host=app.config['MYSQL_HOST'],
-            user=app.config['MYSQL_USER'],
-            password=app.config['MYSQL_PASSWORD'],
-            database=app.config['MYSQL_DB'],
-            port=app.config['MYSQL_PORT']
-        )
-        return conn
-    except Error as e:
+        conn = db_pool.acquire()
+    except (Error, PoolExhaustedError) as e:
         print(f"Error connecting to MySQL: {e}")
         return None
+    if has_request_context():
+        g.setdefault('db_connections', []).append(conn)
+        conn.add_commit_hook(flush_events)
+        conn.add_commit_hook(flush_page_invalidations)
+    return conn
+
+@app.teardown_request
+def release_db_connections(exc):
+    """Return any pooled connection a handler did not close (e.g. on an unexpected exception)"""
+    for conn in g.pop('db_connections', []):
+        conn.close()
+
+# ==================== QUERY LOG ====================
+# Long-lived streams would always count as slow; their queries are still timed
+QUERY_LOG_SKIP_ENDPOINTS = {'user_events', 'static', 'media'}
+# Its own logger, so slow-request reports can be routed or silenced apart from the rest
+slow_request_log = logging.getLogger('querylog')
+
+@app.before_request
+def start_query_log():
+    if request.endpoint not in QUERY_LOG_SKIP_ENDPOINTS:
+        query_log.begin_request(request.endpoint)
+
+@app.teardown_request
+def finish_query_log(exc):
+    """Log the request's query breakdown if it was slow"""
+    report = query_log.end_request(app.config['SLOW_REQUEST_MS'], f"{request.method} {request.full_path.rstrip('?')}")
+    if report:
+        slow_request_log.warning(format_slow_request(report))
+
+# ==================== METRICS ====================
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
 
-def init_database():
-    """Initialize database tables if they don't exist"""
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        # Unmatched URLs share one label so scanners cannot blow up the series count
+        endpoint = request.endpoint or '(unmatched)'
+        metrics.REQUESTS.labels(endpoint, request.method, response.status_code).inc()
+        metrics.REQUEST_LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - started)
+        if response.content_length is not None:
+            metrics.RESPONSE_SIZE.labels(endpoint).observe(response.content_length)
+    return response
+
+def read_metric_gauges():
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        pending = read_stats(cursor).get('pending_claims', 0)
+        # The cached per-user counters, rather than counting unread messages
+        cursor.execute("SELECT COALESCE(SUM(unread_messages), 0) FROM users")
+        unread = cursor.fetchone()[0]
+        cursor.close()
+    return {
+        'pending_claims': ('Claims waiting for the item owner or an admin', pending),
+        'unread_messages': ('Unread chat messages across all users', unread),
+    }
+
+database_gauges = metrics.DatabaseGauges(read_metric_gauges, ttl=app.config['METRICS_GAUGE_TTL'])
+
+@app.route('/metrics')
+def prometheus_metrics():
+    body, content_type = metrics.render_metrics(database_gauges)
+    return Response(body, content_type=content_type)
+
+# ==================== LIVE EVENTS ====================
+# Streams only see events from their own process: serve as one threaded worker (see readme)
+event_broker = EventBroker()
+
+def queue_event(username, event_type, data):
+    """Publish an event to a user once the current transaction commits"""
+    if has_request_context():
+        g.setdefault('pending_events', []).append((username, event_type, data))
+    else:
+        event_broker.publish(username, event_type, data)
+
+def flush_events():
+    for username, event_type, data in g.pop('pending_events', []):
+        event_broker.publish(username, event_type, data)
+
+def queue_claim_event(claim, status, item_name):
+    """Tell both sides of a claim that its status changed"""
+    data = {
+        'claim_id': claim['id'],
+        'item_id': claim['found_item_id'],
+        'item_name': item_name,
+        'status': status,
+    }
+    for username in {claim['claimant_username'], claim['owner_username']}:
+        queue_event(username, 'claim', data)
+
+# ==================== PAGE CACHING ====================
+# Item and claim pages carry an ETag made from the versions of the rows they
+# show. A repeat visit costs one small version lookup: 304 if the browser's
+# copy is current, otherwise the rendered page from page_cache if it is.
+# "users:<username>" covers the contact details pages show for a poster, so
+# any write that creates an account or changes its email or phone touches it.
+page_cache = PageCache(ttl=app.config['PAGE_CACHE_TTL'], max_entries=app.config['PAGE_CACHE_SIZE'])
+
+def touch_resources(cursor, *names):
+    """New versions for resources changed by the current transaction; their cached pages go on commit"""
+    bump_versions(cursor, names)
+    if has_request_context():
+        g.setdefault('touched_resources', set()).update(names)
+
+def flush_page_invalidations():
+    page_cache.invalidate(g.pop('touched_resources', ()))
+
+def cached_page(resources, versions, render, variant=(), modified=(), shows_flashes=True):
+    """Serve a page that only changes when ``resources`` do.
+
+    ``versions`` is read_versions() for those resources, taken before any of
+    the page's data is read. ``render()`` runs the page's queries and returns
+    its HTML; it is skipped when the browser's copy or the cached one is current.
+    """
+    if shows_flashes and session.get('_flashes'):
+        # The page will show one-off messages: render it fresh and let nothing keep it
+        response = Response(render())
+        response.cache_control.no_store = True
+        return response
+    
+    viewer = (session.get('username'), session.get('admin_username'))
+    etag = make_etag(request.full_path, viewer, variant, [versions[name][0] for name in resources])
+    last_modified = max([when for _, when in versions.values() if when] + [when for when in modified if when],
+                        default=None)
+    
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = Response(status=304)
+    else:
+        key = (request.endpoint, request.full_path, viewer)
+        html = page_cache.get(key, etag)
+        if html is None:
+            html = render()
+            page_cache.put(key, etag, html, resources)
+        response = Response(html)
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # Pages are per-user: browsers may keep them but must check back every time
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+# ==================== PASSWORDS ====================
+password_hasher = PasswordHasher(
+    rounds=app.config['BCRYPT_ROUNDS'],
+    target_ms=app.config['BCRYPT_TARGET_MS'],
+    min_rounds=app.config['BCRYPT_MIN_ROUNDS'],
+    max_workers=app.config['HASH_WORKERS'],
+    max_queue=app.config['HASH_QUEUE_DEPTH']
+)
+login_throttle = LoginThrottle(
+    {'account': app.config['LOGIN_FAILURES_PER_ACCOUNT'], 'ip': app.config['LOGIN_FAILURES_PER_IP']},
+    window=app.config['LOGIN_THROTTLE_WINDOW']
+)
+
+def check_login(table, username, password):
+    """Throttled password check for a users/administrators login.
+
+    Returns (row, None) on success, or (None, error message). Hashes made
+    with a lower cost than the current one are upgraded on the way in.
+    """
+    keys = {'account': f"{table}:{username.lower()}", 'ip': request.remote_addr or ''}
+    wait = login_throttle.retry_after(**keys)
+    if wait:
+        return None, f'Too many failed login attempts. Try again in {max(wait // 60, 1)} minute(s).'
+    
     conn = get_db_connection()
-    if conn:
-        try:
-            cursor = conn.cursor()
-            
-            # Create users table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    username VARCHAR(50) UNIQUE NOT NULL,
-                    email VARCHAR(100) NOT NULL,
-                    password_hash VARCHAR(255) NOT NULL,
-                    phone VARCHAR(20),
-                    full_name VARCHAR(100),
-                    student_id VARCHAR(50),
-                    department VARCHAR(100),
-                    year VARCHAR(20),
-                    user_type VARCHAR(20) DEFAULT 'student',
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    last_login DATETIME NULL,
-                    total_items_posted INT DEFAULT 0,
-                    items_found INT DEFAULT 0,
-                    items_lost INT DEFAULT 0,
-                    claims_made INT DEFAULT 0,
-                    claims_received INT DEFAULT 0,
-                    is_active BOOLEAN DEFAULT TRUE
-                )
-            ''')
-            
-            # Create administrators table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS administrators (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    username VARCHAR(50) UNIQUE NOT NULL,
-                    password_hash VARCHAR(255) NOT NULL,
-                    created_by VARCHAR(50),
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Create found_items table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS found_items (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    device_name VARCHAR(100) NOT NULL,
-                    description TEXT,
-                    color VARCHAR(50),
-                    location VARCHAR(200) NOT NULL,
-                    image_filename VARCHAR(255),
-                    posted_by VARCHAR(50) NOT NULL,
-                    posted_date DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    status VARCHAR(20) DEFAULT 'active'
-                )
-            ''')
-            
-            # Create lost_items table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS lost_items (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    device_name VARCHAR(100) NOT NULL,
-                    description TEXT,
-                    color VARCHAR(50),
-                    location VARCHAR(200) NOT NULL,
-                    lost_date DATE,
-                    image_filename VARCHAR(255),
-                    posted_by VARCHAR(50) NOT NULL,
-                    posted_date DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    status VARCHAR(20) DEFAULT 'active'
-                )
-            ''')
-            
-            # Create claims table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS claims (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    found_item_id INT NOT NULL,
-                    claimant_username VARCHAR(50) NOT NULL,
-                    owner_username VARCHAR(50) NOT NULL,
-                    phone_number VARCHAR(20) NOT NULL,
-                    address TEXT NOT NULL,
-                    contact_method VARCHAR(20),
-                    proof_description TEXT,
-                    proof_image_filename VARCHAR(255),
-                    status VARCHAR(20) DEFAULT 'pending',
-                    claim_date DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    admin_notified BOOLEAN DEFAULT FALSE
-                )
-            ''')
-            
-            # Create messages table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS messages (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    sender VARCHAR(50) NOT NULL,
-                    recipient VARCHAR(50) NOT NULL,
-                    subject VARCHAR(200),
-                    message TEXT NOT NULL,
-                    item_id INT,
-                    item_type VARCHAR(20),
-                    claim_id INT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    is_read BOOLEAN DEFAULT FALSE,
-                    from_admin BOOLEAN DEFAULT FALSE
-                )
-            ''')
-            
-            # Check if admin exists
-            cursor.execute("SELECT username FROM administrators WHERE username = 'admin'")
-            if not cursor.fetchone():
-                # Hash the default password: admin@123
-                hashed_pw = bcrypt.hashpw('admin@123'.encode('utf-8'), bcrypt.gensalt())
-                cursor.execute(
-                    "INSERT INTO administrators (username, password_hash, created_by) VALUES (%s, %s, %s)",
-                    ('admin', hashed_pw.decode('utf-8'), 'system')
-                )
-                print("✅ Default admin account created: username='admin', password='admin@123'")
-            
-            conn.commit()
-            cursor.close()
+    if not conn:
+        return None, 'Database connection failed!'
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(f"SELECT * FROM {table} WHERE username = %s", (username,))
+        row = cursor.fetchone()
+        
+        if not row or not password_hasher.verify(password, row['password_hash']):
+            login_throttle.record_failure(**keys)
             conn.close()
-            print("✅ Database initialized successfully!")
-            
-        except Error as e:
-            print(f"❌ Error initializing database: {e}")
-            if conn:
-                conn.close()
+            return None, None
+        login_throttle.reset(account=keys['account'])
+        
+        if password_hasher.needs_rehash(row['password_hash']):
+            try:
+                cursor.execute(f"UPDATE {table} SET password_hash = %s WHERE id = %s",
+                               (password_hasher.hash(password), row['id']))
+                conn.commit()
+            except HasherBusy:
+                pass   # upgraded at a later login instead
+        cursor.close()
+        conn.close()
+        return row, None
+    except HasherBusy:
+        conn.close()
+        return None, 'The server is busy signing other people in. Please try again in a moment.'
+    except Error as e:
+        conn.close()
+        return None, f'Error: {str(e)}'
 
-# Initialize database on startup
-init_database()
+# ==================== SCHEMA ====================
+def check_schema():
+    """Warn at startup if the database is behind this code's migrations (one small read)"""
+    conn = get_db_connection()
+    if not conn:
+        return
+    try:
+        cursor = conn.cursor()
+        version = current_version(cursor)
+        cursor.close()
+        if version < LATEST_VERSION:
+            print(f"⚠️  Database schema is at version {version}, this code needs {LATEST_VERSION}: "
+                  f"run `flask db-upgrade`")
+    except Error as e:
+        print(f"❌ Error reading schema version: {e}")
+    finally:
+        conn.close()
+
+check_schema()
+
+@app.cli.command('db-upgrade')
+def db_upgrade_command():
+    """Apply pending schema migrations (see migrations.py)."""
+    with db_pool.connection() as conn:
+        try:
+            applied = upgrade(conn)
+        except MigrationError as e:
+            print(f"❌ Migration stopped: {e}")
+            return
+    for version, description in applied:
+        print(f"  {version}: {description}")
+    print(f"✅ Database schema is at version {LATEST_VERSION} ({len(applied)} migrations applied)")
 
 # Helper function for file uploads
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
+# ==================== UPLOADS ====================
+# Uploads live in a content-addressed blob store; rows hold the blob key
+# ("ab/cd/<sha256>.jpg"). Files from before the store keep their old names in
+# UPLOAD_FOLDER until `flask migrate-uploads` moves them.
+blob_store = BlobStore(os.path.join(app.root_path, app.config['BLOB_FOLDER']))
+
+UPLOAD_COLUMNS = [('found_items', 'image_filename'), ('lost_items', 'image_filename'),
+                  ('claims', 'proof_image_filename')]
+
+def upload_path(filename):
+    if is_blob_key(filename):
+        return blob_store.path(filename)
+    return os.path.join(app.config['UPLOAD_FOLDER'], filename)
+
+def upload_url(filename):
+    if is_blob_key(filename):
+        return url_for('media', path=filename)
+    return url_for('static', filename='uploads/' + filename)
+
+def refresh_image_pages(filename, resources):
+    """Pages rendered before an upload's variants existed show the original; move them on"""
+    try:
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            touch_resources(cursor, *resources)
+            conn.commit()
+            cursor.close()
+        page_cache.invalidate(resources)
+    except (Error, PoolExhaustedError) as e:
+        print(f"Error refreshing pages for {filename}: {e}")
+
+image_pipeline = ImagePipeline(os.path.join(blob_store.root, VARIANT_DIR), upload_path,
+                               app.config['IMAGE_WORKERS'], on_ready=refresh_image_pages)
+
+class UploadRequest(Request):
+    """Streams file parts straight into the blob store's tmp folder.
+
+    Size, magic bytes and the SHA-256 are checked chunk by chunk as the body
+    is parsed, so a bad upload is refused before the rest of it is read and a
+    good one is never copied a second time.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if not filename:
+            return BytesIO()   # file input left empty
+        if not allowed_file(filename):
+            raise UploadRejected("Only PNG, JPEG and GIF images can be uploaded.")
+        return blob_store.open_writer(app.config['MAX_UPLOAD_SIZE'], sniff_image_type)
+
+app.request_class = UploadRequest
+
+@app.errorhandler(UploadRejected)
+def upload_rejected(e):
+    flash(str(e), 'error')
+    return redirect(request.path)
+
+@app.errorhandler(413)
+def request_too_large(e):
+    flash(f"Uploads can be at most {app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)} MB in total.", 'error')
+    return redirect(request.path)
+
+def stage_upload(file):
+    """Hash an uploaded image into the blob store; None if no usable file was sent"""
+    if not file or file.filename == '' or not allowed_file(file.filename):
+        return None
+    staged = blob_store.stage(file.stream, file.filename)
+    metrics.UPLOAD_BYTES.labels(request.endpoint).observe(staged.size)
+    metrics.UPLOAD_DURATION.labels(request.endpoint).observe(staged.seconds)
+    return staged
+
+def attach_upload(cursor, staged):
+    """Reference a staged upload in the current transaction; returns the key to store"""
+    return blob_store.add_ref(cursor, staged) if staged else None
+
+def collect_uploads(conn):
+    """Delete files whose last reference was just removed (call after commit)"""
+    try:
+        blob_store.collect(conn, on_delete=image_pipeline.remove)
+    except (Error, OSError) as e:
+        print(f"Error collecting unreferenced uploads: {e}")
+
+@app.route('/media/<path:path>')
+def media(path):
+    """Files from the blob store. Hash-named ones never change, so browsers and
+    CDNs may cache them for good."""
+    if path.startswith('tmp/'):
+        return 'Not found', 404
+    if not is_content_addressed(path):
+        return send_from_directory(blob_store.root, path)
+    response = send_from_directory(blob_store.root, path, max_age=app.config['MEDIA_MAX_AGE'])
+    response.cache_control.immutable = True
+    return response
+
+@app.template_global()
+def upload_image(filename):
+    """URLs for showing an upload: ``src`` plus WebP/JPEG srcsets once the variants exist"""
+    original = upload_url(filename)
+    if not image_pipeline.is_ready(filename):
+        return {'src': original, 'original': original, 'webp': '', 'jpeg': ''}
+    srcsets = {}
+    for fmt in ('webp', 'jpeg'):
+        srcsets[fmt] = ', '.join(
+            f"{url_for('media', path=f'{VARIANT_DIR}/' + variant_filename(filename, width, fmt))} {width}w"
+            for width in sorted(VARIANT_WIDTHS.values()))
+    thumb = variant_filename(filename, VARIANT_WIDTHS['thumb'], 'jpeg')
+    return {'src': url_for('media', path=f'{VARIANT_DIR}/{thumb}'), 'original': original, **srcsets}
+
+def upload_resources(table, row_id):
+    """Page resources that show the upload on a row: item photos also appear in the lists"""
+    if table in ITEM_TABLES.values():
+        return (table, f"{table}:{row_id}")
+    return (f"{table}:{row_id}",)
+
+def stored_uploads(cursor):
+    """Every upload filename referenced by a row -> the page resources showing it"""
+    uploads = {}
+    for table, column in UPLOAD_COLUMNS:
+        cursor.execute(f"SELECT id, {column} FROM {table} WHERE {column} IS NOT NULL AND {column} != ''")
+        for row_id, name in cursor.fetchall():
+            uploads.setdefault(name, set()).update(upload_resources(table, row_id))
+    return uploads
+
+@app.cli.command('image-variants')
+def image_variants_command():
+    """Create thumbnail/medium variants for uploads that do not have them yet."""
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        missing = {name: resources for name, resources in stored_uploads(cursor).items()
+                   if not image_pipeline.is_ready(name) and os.path.exists(upload_path(name))}
+        cursor.close()
+    for future in [image_pipeline.submit(name, resources) for name, resources in missing.items()]:
+        future.result()
+    print(f"✅ Processed {len(missing)} uploads")
+
+@app.cli.command('migrate-uploads')
+def migrate_uploads_command():
+    """Move pre-blob-store uploads into the blob store, merging duplicates."""
+    moved = set()
+    rows = 0
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        for table, column in UPLOAD_COLUMNS:
+            cursor.execute(f"SELECT id, {column} FROM {table} WHERE {column} IS NOT NULL AND {column} != ''")
+            for row_id, filename in cursor.fetchall():
+                path = upload_path(filename)
+                if is_blob_key(filename) or not os.path.exists(path):
+                    continue
+                with open(path, 'rb') as f:
+                    staged = blob_store.stage(f, filename)
+                key = blob_store.add_ref(cursor, staged)
+                cursor.execute(f"UPDATE {table} SET {column} = %s WHERE id = %s", (key, row_id))
+                # The old URL is going away; make pages that showed it re-render
+                touch_resources(cursor, table, f"{table}:{row_id}")
+                conn.commit()
+                moved.add(filename)
+                rows += 1
+        cursor.close()
+    for filename in moved:
+        os.remove(upload_path(filename))
+        image_pipeline.remove(filename)
+    print(f"✅ Moved {len(moved)} files ({rows} rows) into the blob store")
+
+@app.cli.command('gc-uploads')
+def gc_uploads_command():
+    """Delete unreferenced blobs and files left by failed uploads."""
+    with db_pool.connection() as conn:
+        collected = blob_store.collect(conn, on_delete=image_pipeline.remove)
+        stale_tmp, orphans = blob_store.sweep(conn)
+    print(f"✅ Removed {len(collected)} unreferenced blobs, {orphans} orphaned files "
+          f"and {stale_tmp} stale uploads")
+
+# ==================== STATISTICS ====================
+# Writes that change a counted row go through these so stat_counters (and the
+# per-user activity counters) move in the same transaction.
+def set_item_status(cursor, table, item_id, status):
+    """Change a found/lost item's status; returns False if there is no such item"""
+    cursor.execute(f"SELECT status FROM {table} WHERE id = %s FOR UPDATE", (item_id,))
+    row = cursor.fetchone()
+    if not row:
+        return False
+    old_status = row['status'] if isinstance(row, dict) else row[0]
+    cursor.execute(f"UPDATE {table} SET status = %s WHERE id = %s", (status, item_id))
+    record_change(cursor, table, before={'status': old_status}, after={'status': status})
+    touch_resources(cursor, table, f"{table}:{item_id}")
+    return True
+
+def update_claim(cursor, claim, **fields):
+    """Set status / admin_notified on a claim row fetched with SELECT *; updates ``claim`` in place"""
+    # Only the first decision is timestamped, so the analytics count each claim once
+    if fields.get('status', 'pending') != 'pending' and claim.get('status') == 'pending':
+        fields['decided_at'] = datetime.now()
+    assignments = ', '.join(f"{column} = %s" for column in fields)
+    cursor.execute(f"UPDATE claims SET {assignments} WHERE id = %s", tuple(fields.values()) + (claim['id'],))
+    before = dict(claim)
+    claim.update(fields)
+    record_change(cursor, 'claims', before=before, after=claim)
+    # Admins re-opening a claim set admin_notified again; only real changes move the pages
+    if any(before.get(column) != value for column, value in fields.items()):
+        touch_resources(cursor, f"claims:{claim['id']}", f"found_items:{claim['found_item_id']}")
+
+def delete_claims(cursor, where, params):
+    """Delete the claims matching ``where`` and take them off every counter"""
+    cursor.execute(f"SELECT id, found_item_id, claimant_username, owner_username, status, admin_notified, "
+                   f"proof_image_filename FROM claims WHERE {where} FOR UPDATE", params)
+    claims = [dict(zip(cursor.column_names, row)) if not isinstance(row, dict) else row
+              for row in cursor.fetchall()]
+    if not claims:
+        return 0
+    cursor.execute(f"DELETE FROM claims WHERE id IN ({', '.join(['%s'] * len(claims))})",
+                   tuple(claim['id'] for claim in claims))
+    for claim in claims:
+        record_change(cursor, 'claims', before=claim)
+        bump_user(cursor, claim['claimant_username'], claims_made=-1)
+        bump_user(cursor, claim['owner_username'], claims_received=-1)
+        blob_store.drop_ref(cursor, claim['proof_image_filename'])
+        touch_resources(cursor, f"claims:{claim['id']}", f"found_items:{claim['found_item_id']}")
+    return len(claims)
+
+@app.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recount the statistics counters and report any that had drifted."""
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        drift, users_fixed = rebuild_stats(cursor)
+        conn.commit()
+        cursor.close()
+    for name, (stored, actual) in sorted(drift.items()):
+        print(f"  {name}: {stored} -> {actual}")
+    print(f"✅ {len(drift)} counters and {users_fixed} users' activity counters repaired")
+
+# ==================== ITEM INDEXES ====================
+ITEM_TABLES = {'found': 'found_items', 'lost': 'lost_items'}
+
+# Columns loaded into the in-memory matching and search indexes
+INDEX_COLUMNS = {
+    'found': "id, device_name, description, color, location, image_filename, image_hash, posted_by, posted_date, status",
+    'lost': "id, device_name, description, color, location, lost_date, image_filename, image_hash, posted_by, posted_date, status",
+}
+
+match_index = MatchIndex(ttl=app.config['MATCH_INDEX_TTL'])
+search_index = SearchIndex(ttl=app.config['SEARCH_INDEX_TTL'])
+image_index = ImageHashIndex(ttl=app.config['MATCH_INDEX_TTL'], max_distance=app.config['IMAGE_MATCH_MAX_DISTANCE'])
+
+def rebuild_match_index():
+    """Load every active lost and found item into the match index"""
+    with db_pool.connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(f"SELECT {INDEX_COLUMNS['lost']} FROM lost_items WHERE status = 'active'")
+        lost_rows = cursor.fetchall()
+        cursor.execute(f"SELECT {INDEX_COLUMNS['found']} FROM found_items WHERE status = 'active'")
+        found_rows = cursor.fetchall()
+        cursor.close()
+    match_index.load(lost_rows, found_rows)
+
+def rebuild_search_index():
+    """Load every found and lost item, whatever its status, into the search index"""
+    with db_pool.connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(f"SELECT {INDEX_COLUMNS['found']} FROM found_items")
+        found_rows = cursor.fetchall()
+        cursor.execute(f"SELECT {INDEX_COLUMNS['lost']} FROM lost_items")
+        lost_rows = cursor.fetchall()
+        cursor.close()
+    search_index.load(found_rows, lost_rows)
+
+def rebuild_image_index():
+    """Load the photo hash of every found and lost item that has one"""
+    rows = {}
+    with db_pool.connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        for item_type, table in ITEM_TABLES.items():
+            cursor.execute(f"SELECT {INDEX_COLUMNS[item_type]} FROM {table} WHERE image_hash IS NOT NULL")
+            rows[item_type] = cursor.fetchall()
+        cursor.close()
+    image_index.load(rows)
+
+def _background_rebuild(rebuild, lock):
+    try:
+        rebuild()
+    except Exception as e:
+        print(f"Error rebuilding {rebuild.__name__}: {e}")
+    finally:
+        lock.release()
+
+def ensure_loaded(index, rebuild):
+    """Build an in-memory index on first use; refresh it in the background once stale"""
+    if not index.is_stale():
+        return
+    lock = index.rebuild_lock
+    if index.built_at is None:
+        with lock:
+            if index.built_at is None:
+                rebuild()
+    elif lock.acquire(blocking=False):
+        threading.Thread(target=_background_rebuild, args=(rebuild, lock), daemon=True).start()
+
+def sync_item_indexes(cursor, item_type, item_id):
+    """Re-read one item after a write and update the match, search and image indexes"""
+    if match_index.built_at is None and search_index.built_at is None and image_index.built_at is None:
+        return
+    cursor.execute(f"SELECT {INDEX_COLUMNS[item_type]} FROM {ITEM_TABLES[item_type]} WHERE id = %s", (item_id,))
+    row = cursor.fetchone()
+    if row and not isinstance(row, dict):
+        row = dict(zip(cursor.column_names, row))
+    
+    if match_index.built_at is not None:
+        if row and row['status'] == 'active':
+            match_index.add(item_type, row)
+        else:
+            match_index.remove(item_type, item_id)
+    if search_index.built_at is not None:
+        if row:
+            search_index.add(item_type, row)
+        else:
+            search_index.remove(item_type, item_id)
+    if image_index.built_at is not None:
+        if row:
+            image_index.add(item_type, row)
+        else:
+            image_index.remove(item_type, item_id)
+
+def search_items(query, item_types=None, statuses=None, limit=20, offset=0):
+    """Ranked full-text search over found and lost items; returns (total, rows)"""
+    ensure_loaded(search_index, rebuild_search_index)
+    return search_index.search(query, item_types=item_types, statuses=statuses, limit=limit, offset=offset)
+
+def find_matches(item_type, item, k=None, exclude_user=None):
+    """Top-k candidates from the other side for a lost or found item"""
+    ensure_loaded(match_index, rebuild_match_index)
+    return match_index.matches(item_type, item, k=k or app.config['MATCHES_PER_ITEM'], exclude_user=exclude_user)
+
+def find_similar_images(item_type, item, k=5, statuses=None):
+    """Found and lost items whose photo looks like this item's, closest first"""
+    if item.get('image_hash') is None:
+        return []
+    ensure_loaded(image_index, rebuild_image_index)
+    return image_index.similar(item['image_hash'], k=k, exclude=(item_type, item['id']), statuses=statuses)
+
+@app.cli.command('hash-images')
+def hash_images_command():
+    """Compute photo hashes for items posted before hashes were recorded."""
+    hashes = {}
+    updated = 0
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        for table in ITEM_TABLES.values():
+            cursor.execute(f"SELECT id, image_filename FROM {table} "
+                           f"WHERE image_filename IS NOT NULL AND image_filename != '' AND image_hash IS NULL")
+            for item_id, filename in cursor.fetchall():
+                if filename not in hashes:
+                    hashes[filename] = image_phash(upload_path(filename))
+                if hashes[filename] is not None:
+                    cursor.execute(f"UPDATE {table} SET image_hash = %s WHERE id = %s", (hashes[filename], item_id))
+                    # Similar-photo lists on the item's page come from the hash
+                    touch_resources(cursor, table, f"{table}:{item_id}")
+                    updated += 1
+            conn.commit()
+        cursor.close()
+    print(f"✅ Hashed {updated} item photos")
+
+# ==================== ITEM BROWSING ====================
+def encode_page_cursor(item):
+    """Opaque keyset cursor for the last item on a page: posted_date + id"""
+    posted = item['posted_date']
+    if isinstance(posted, datetime):
+        posted = posted.strftime('%Y%m%d%H%M%S')
+    else:
+        posted = str(posted).replace('-', '').replace(' ', '').replace(':', '')[:14]
+    return f"{posted}-{item['id']}"
+
+def decode_page_cursor(value):
+    """Inverse of encode_page_cursor; returns (posted_date, id) or None if malformed"""
+    try:
+        posted, item_id = value.split('-', 1)
+        return datetime.strptime(posted, '%Y%m%d%H%M%S'), int(item_id)
+    except (AttributeError, ValueError):
+        return None
+
+def get_item_filters(args):
+    """Read the browse filters from the query string"""
+    filters = {
+        'q': args.get('q', '').strip(),
+        'color': args.get('color', '').strip(),
+        'location': args.get('location', '').strip(),
+        'date_from': args.get('date_from', '').strip(),
+        'date_to': args.get('date_to', '').strip(),
+        'type': args.get('type', '').strip(),
+    }
+    if filters['type'] not in ITEM_TABLES:
+        filters['type'] = ''
+    for key in ('date_from', 'date_to'):
+        try:
+            datetime.strptime(filters[key], '%Y-%m-%d')
+        except ValueError:
+            filters[key] = ''
+    return filters
+
+def fetch_items_page(cursor, item_type, exclude_user, filters, after=None, limit=None):
+    """One page of active items, newest first, using keyset pagination.
+
+    Walks idx_status_posted (status, posted_date) so the cost of a page does
+    not depend on how deep into the list it is. Returns (items, next_cursor,
+    truncated); truncated is True when the text filter matched more items than
+    SEARCH_MAX_RESULTS and only the most relevant of them are being paged.
+    """
+    limit = limit or app.config['ITEMS_PER_PAGE']
+    where = ["status = 'active'", "posted_by != %s"]
+    params = [exclude_user]
+    truncated = False
+    
+    if filters.get('q'):
+        # Full-text index handles stemming and typos; SQL keeps the date ordering
+        total, hits = search_items(filters['q'], item_types=[item_type], statuses=['active'],
+                                   limit=app.config['SEARCH_MAX_RESULTS'])
+        if not hits:
+            return [], None, False
+        truncated = total > len(hits)
+        where.append(f"id IN ({', '.join(['%s'] * len(hits))})")
+        params += [hit['id'] for hit in hits]
+    if filters.get('color'):
+        where.append("color = %s")
+        params.append(filters['color'])
+    if filters.get('location'):
+        where.append("location LIKE %s")
+        params.append(f"%{filters['location']}%")
+    if filters.get('date_from'):
+        where.append("posted_date >= %s")
+        params.append(filters['date_from'])
+    if filters.get('date_to'):
+        where.append("posted_date < DATE_ADD(%s, INTERVAL 1 DAY)")
+        params.append(filters['date_to'])
+    
+    position = decode_page_cursor(after) if after else None
+    if position:
+        where.append("(posted_date < %s OR (posted_date = %s AND id < %s))")
+        params += [position[0], position[0], position[1]]
+    
+    cursor.execute(f'''
+        SELECT * FROM {ITEM_TABLES[item_type]}
+        WHERE {' AND '.join(where)}
+        ORDER BY posted_date DESC, id DESC
+        LIMIT %s
+    ''', tuple(params) + (limit + 1,))
+    items = cursor.fetchall()
+    
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_page_cursor(items[-1])
+    return items, next_cursor, truncated
+
 # Routes
 @app.route('/')
 def index():
@@ -213,13 +877,16 @@ def user_signup():
                     conn.close()
                     return render_template('user_signup.html')
                 
-                hashed_pw = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+                hashed_pw = password_hasher.hash(password)
                 cursor.execute('''
                     INSERT INTO users (username, email, password_hash, phone, full_name, 
                                      student_id, department, year, user_type, created_at)
                     VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ''', (username, email, hashed_pw.decode('utf-8'), phone, full_name, 
+                ''', (username, email, hashed_pw, phone, full_name, 
                       student_id, department, year, user_type, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+                record_change(cursor, 'users', after={'is_active': True})
+                # The name may have belonged to a deleted account whose old posts show "N/A" contacts
+                touch_resources(cursor, f"users:{username}")
                 
                 conn.commit()
                 cursor.close()
@@ -228,6 +895,9 @@ def user_signup():
                 flash('Registration successful! Please login.', 'success')
                 return redirect(url_for('user_login'))
                 
+            except HasherBusy:
+                flash('The server is busy right now. Please try again in a moment.', 'error')
+                conn.close()
             except Error as e:
                 flash(f'Error: {str(e)}', 'error')
                 if conn:
@@ -243,41 +913,32 @@ def user_login():
         username = request.form.get('username', '').strip()
         password = request.form.get('password', '').strip()
         
-        conn = get_db_connection()
-        if conn:
-            try:
-                cursor = conn.cursor(dictionary=True)
-                cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
-                user = cursor.fetchone()
-                
-                if user and bcrypt.checkpw(password.encode('utf-8'), user['password_hash'].encode('utf-8')):
-                    if not user.get('is_active', True):
-                        flash('Your account has been deactivated by admin.', 'error')
-                        conn.close()
-                        return redirect(url_for('user_login'))
-                    
+        user, error = check_login('users', username, password)
+        if error:
+            flash(error, 'error')
+        elif not user:
+            flash('Invalid username or password!', 'error')
+        elif not user.get('is_active', True):
+            flash('Your account has been deactivated by admin.', 'error')
+            return redirect(url_for('user_login'))
+        else:
+            conn = get_db_connection()
+            if conn:
+                try:
+                    cursor = conn.cursor()
                     cursor.execute("UPDATE users SET last_login = %s WHERE username = %s", 
                                  (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), username))
                     conn.commit()
-                    
-                    session['user_id'] = user['id']
-                    session['username'] = username
-                    flash('Login successful!', 'success')
-                    
                     cursor.close()
                     conn.close()
-                    return redirect(url_for('user_dashboard'))
-                else:
-                    flash('Invalid username or password!', 'error')
-                    
-                cursor.close()
-                conn.close()
-            except Error as e:
-                flash(f'Error: {str(e)}', 'error')
-                if conn:
+                except Error as e:
+                    print(f"Error recording last login for {username}: {e}")
                     conn.close()
-        else:
-            flash('Database connection failed!', 'error')
+            
+            session['user_id'] = user['id']
+            session['username'] = username
+            flash('Login successful!', 'success')
+            return redirect(url_for('user_dashboard'))
     
     return render_template('user_login.html')
 
@@ -314,20 +975,36 @@ def user_dashboard():
         ''', (username,))
         user_claims = cursor.fetchall()
         
-        # Get unread message count
-        cursor.execute("SELECT COUNT(*) as count FROM messages WHERE recipient = %s AND is_read = FALSE", (username,))
+        # Get unread message count (counter maintained by insert_message / mark_conversation_read)
+        cursor.execute("SELECT unread_messages FROM users WHERE username = %s", (username,))
         unread_result = cursor.fetchone()
-        unread_count = unread_result['count'] if unread_result else 0
+        unread_count = unread_result['unread_messages'] if unread_result else 0
+        schedule_unread_reconcile()
         
         cursor.close()
         conn.close()
         
+        # Suggested matches for the user's active posts
+        lost_matches = {}
+        found_matches = {}
+        try:
+            for item in user_lost_items:
+                if item['status'] == 'active':
+                    lost_matches[item['id']] = find_matches('lost', item, exclude_user=username)
+            for item in user_found_items:
+                if item['status'] == 'active':
+                    found_matches[item['id']] = find_matches('found', item, exclude_user=username)
+        except Exception as e:
+            print(f"Error computing matches: {e}")
+        
         return render_template('user_dashboard.html', 
                               username=username,
                               user_found_items=user_found_items,
                               user_lost_items=user_lost_items,
                               user_claims=user_claims,
-                              unread_messages=unread_count)
+                              unread_messages=unread_count,
+                              lost_matches=lost_matches,
+                              found_matches=found_matches)
         
     except Error as e:
         flash(f'Error: {str(e)}', 'error')
@@ -354,29 +1031,30 @@ def add_found_item():
         color = request.form.get('color', '').strip()
         location = request.form.get('location', '').strip()
         
-        image_filename = None
-        if 'image' in request.files:
-            file = request.files['image']
-            if file and file.filename != '' and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                image_filename = f"found_{username}_{timestamp}_{filename}"
-                file.save(os.path.join(app.config['UPLOAD_FOLDER'], image_filename))
+        staged = stage_upload(request.files.get('image'))
+        image_hash = image_phash(staged.tmp_path) if staged else None
         
         conn = get_db_connection()
         if conn:
             try:
                 cursor = conn.cursor()
+                image_filename = attach_upload(cursor, staged)
                 cursor.execute('''
                     INSERT INTO found_items (device_name, description, color, location, 
-                                           image_filename, posted_by, posted_date, status)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                ''', (device_name, description, color, location, image_filename, 
+                                           image_filename, image_hash, posted_by, posted_date, status)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ''', (device_name, description, color, location, image_filename, image_hash,
                       username, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'active'))
+                item_id = cursor.lastrowid
                 
-                cursor.execute("UPDATE users SET items_found = items_found + 1, total_items_posted = total_items_posted + 1 WHERE username = %s", (username,))
+                record_change(cursor, 'found_items', after={'status': 'active'})
+                bump_user(cursor, username, items_found=1)
+                touch_resources(cursor, 'found_items')
                 
                 conn.commit()
+                if image_filename:
+                    image_pipeline.submit(image_filename, upload_resources('found_items', item_id))
+                sync_item_indexes(cursor, 'found', item_id)
                 cursor.close()
                 conn.close()
                 
@@ -405,29 +1083,30 @@ def add_lost_item():
         location = request.form.get('location', '').strip()
         lost_date = request.form.get('lost_date', '').strip()
         
-        image_filename = None
-        if 'image' in request.files:
-            file = request.files['image']
-            if file and file.filename != '' and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                image_filename = f"lost_{username}_{timestamp}_{filename}"
-                file.save(os.path.join(app.config['UPLOAD_FOLDER'], image_filename))
+        staged = stage_upload(request.files.get('image'))
+        image_hash = image_phash(staged.tmp_path) if staged else None
         
         conn = get_db_connection()
         if conn:
             try:
                 cursor = conn.cursor()
+                image_filename = attach_upload(cursor, staged)
                 cursor.execute('''
                     INSERT INTO lost_items (device_name, description, color, location, lost_date,
-                                          image_filename, posted_by, posted_date, status)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ''', (device_name, description, color, location, lost_date, image_filename, 
+                                          image_filename, image_hash, posted_by, posted_date, status)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ''', (device_name, description, color, location, lost_date, image_filename, image_hash,
                       username, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'active'))
+                item_id = cursor.lastrowid
                 
-                cursor.execute("UPDATE users SET items_lost = items_lost + 1, total_items_posted = total_items_posted + 1 WHERE username = %s", (username,))
+                record_change(cursor, 'lost_items', after={'status': 'active'})
+                bump_user(cursor, username, items_lost=1)
+                touch_resources(cursor, 'lost_items')
                 
                 conn.commit()
+                if image_filename:
+                    image_pipeline.submit(image_filename, upload_resources('lost_items', item_id))
+                sync_item_indexes(cursor, 'lost', item_id)
                 cursor.close()
                 conn.close()
                 
@@ -449,6 +1128,7 @@ def view_items():
         return redirect(url_for('user_login'))
     
     username = session.get('username')
+    filters = get_item_filters(request.args)
     conn = get_db_connection()
     
     if not conn:
@@ -458,19 +1138,37 @@ def view_items():
     try:
         cursor = conn.cursor(dictionary=True)
         
-        cursor.execute("SELECT * FROM found_items WHERE posted_by != %s AND status = 'active' ORDER BY posted_date DESC", (username,))
-        other_found_items = cursor.fetchall()
-        
-        cursor.execute("SELECT * FROM lost_items WHERE posted_by != %s AND status = 'active' ORDER BY posted_date DESC", (username,))
-        other_lost_items = cursor.fetchall()
+        # Any new, deleted or re-statused item can change the listing
+        resources = [ITEM_TABLES[item_type] for item_type in ('found', 'lost') if filters['type'] in ('', item_type)]
+        versions = read_versions(cursor, resources)
         
+        def render():
+            other_found_items, found_next, found_truncated = [], None, False
+            if filters['type'] in ('', 'found'):
+                other_found_items, found_next, found_truncated = fetch_items_page(
+                    cursor, 'found', username, filters, after=request.args.get('found_after'))
+            
+            other_lost_items, lost_next, lost_truncated = [], None, False
+            if filters['type'] in ('', 'lost'):
+                other_lost_items, lost_next, lost_truncated = fetch_items_page(
+                    cursor, 'lost', username, filters, after=request.args.get('lost_after'))
+            
+            return render_template('view_items.html',
+                                  found_items=other_found_items,
+                                  lost_items=other_lost_items,
+                                  found_next=found_next,
+                                  lost_next=lost_next,
+                                  found_truncated=found_truncated,
+                                  lost_truncated=lost_truncated,
+                                  search_limit=app.config['SEARCH_MAX_RESULTS'],
+                                  filters=filters,
+                                  filter_args={k: v for k, v in filters.items() if v},
+                                  username=username)
+        
+        response = cached_page(resources, versions, render)
         cursor.close()
         conn.close()
-        
-        return render_template('view_items.html',
-                              found_items=other_found_items,
-                              lost_items=other_lost_items,
-                              username=username)
+        return response
         
     except Error as e:
         flash(f'Error: {str(e)}', 'error')
@@ -512,14 +1210,7 @@ def claim_item(item_id):
             contact_method = request.form.get('contact_method', '').strip()
             proof_description = request.form.get('proof_description', '').strip()
             
-            proof_image_filename = None
-            if 'proof_image' in request.files:
-                file = request.files['proof_image']
-                if file and file.filename != '' and allowed_file(file.filename):
-                    filename = secure_filename(file.filename)
-                    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                    proof_image_filename = f"proof_{username}_{timestamp}_{filename}"
-                    file.save(os.path.join(app.config['UPLOAD_FOLDER'], proof_image_filename))
+            proof_image_filename = attach_upload(cursor, stage_upload(request.files.get('proof_image')))
             
             cursor.execute('''
                 INSERT INTO claims (found_item_id, claimant_username, owner_username,
@@ -534,16 +1225,19 @@ def claim_item(item_id):
             
             auto_message = f"New claim request for your found item '{item['device_name']}'. Please review the claim details."
             
-            cursor.execute('''
-                INSERT INTO messages (sender, recipient, message, item_id, item_type, claim_id, timestamp, is_read)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            ''', ('System', item['posted_by'], auto_message, item_id, 'found', claim_id,
-                  datetime.now().strftime('%Y-%m-%d %H:%M:%S'), False))
+            insert_message(cursor, 'System', item['posted_by'], auto_message,
+                           item_id=item_id, item_type='found', claim_id=claim_id)
+            queue_claim_event({'id': claim_id, 'found_item_id': item_id, 'claimant_username': username,
+                               'owner_username': item['posted_by']}, 'pending', item['device_name'])
             
-            cursor.execute("UPDATE users SET claims_made = claims_made + 1 WHERE username = %s", (username,))
-            cursor.execute("UPDATE users SET claims_received = claims_received + 1 WHERE username = %s", (item['posted_by'],))
+            record_change(cursor, 'claims', after={'status': 'pending', 'admin_notified': False})
+            bump_user(cursor, username, claims_made=1)
+            bump_user(cursor, item['posted_by'], claims_received=1)
+            touch_resources(cursor, f"found_items:{item_id}")
             
             conn.commit()
+            if proof_image_filename:
+                image_pipeline.submit(proof_image_filename, upload_resources('claims', claim_id))
             cursor.close()
             conn.close()
             
@@ -576,7 +1270,8 @@ def view_claim(claim_id):
     try:
         cursor = conn.cursor(dictionary=True)
         
-        cursor.execute("SELECT * FROM claims WHERE id = %s", (claim_id,))
+        cursor.execute("SELECT owner_username, claimant_username, found_item_id, updated_at FROM claims WHERE id = %s",
+                       (claim_id,))
         claim = cursor.fetchone()
         
         if not claim:
@@ -589,15 +1284,22 @@ def view_claim(claim_id):
             conn.close()
             return redirect(url_for('user_dashboard'))
         
-        cursor.execute("SELECT * FROM found_items WHERE id = %s", (claim['found_item_id'],))
-        found_item = cursor.fetchone()
+        resources = [f"claims:{claim_id}", f"found_items:{claim['found_item_id']}"]
+        versions = read_versions(cursor, resources)
         
+        def render():
+            cursor.execute("SELECT * FROM claims WHERE id = %s", (claim_id,))
+            claim = cursor.fetchone()
+            cursor.execute("SELECT * FROM found_items WHERE id = %s", (claim['found_item_id'],))
+            found_item = cursor.fetchone()
+            return render_template('view_claim.html', 
+                                  claim=claim, 
+                                  found_item=found_item)
+        
+        response = cached_page(resources, versions, render, modified=[claim['updated_at']])
         cursor.close()
         conn.close()
-        
-        return render_template('view_claim.html', 
-                              claim=claim, 
-                              found_item=found_item)
+        return response
         
     except Error as e:
         flash(f'Error: {str(e)}', 'error')
@@ -620,7 +1322,7 @@ def manage_claim(claim_id, action):
     try:
         cursor = conn.cursor(dictionary=True)
         
-        cursor.execute("SELECT * FROM claims WHERE id = %s", (claim_id,))
+        cursor.execute("SELECT * FROM claims WHERE id = %s FOR UPDATE", (claim_id,))
         claim = cursor.fetchone()
         
         if not claim:
@@ -634,8 +1336,8 @@ def manage_claim(claim_id, action):
             return redirect(url_for('user_dashboard'))
         
         if action == 'approve':
-            cursor.execute("UPDATE claims SET status = 'approved' WHERE id = %s", (claim_id,))
-            cursor.execute("UPDATE found_items SET status = 'claimed' WHERE id = %s", (claim['found_item_id'],))
+            update_claim(cursor, claim, status='approved')
+            set_item_status(cursor, 'found_items', claim['found_item_id'], 'claimed')
             
             cursor.execute("SELECT device_name FROM found_items WHERE id = %s", (claim['found_item_id'],))
             item = cursor.fetchone()
@@ -643,16 +1345,14 @@ def manage_claim(claim_id, action):
             
             approval_message = f"Your claim for item '{item_name}' has been approved! Please contact the owner."
             
-            cursor.execute('''
-                INSERT INTO messages (sender, recipient, message, item_id, item_type, claim_id, timestamp, is_read)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            ''', ('System', claim['claimant_username'], approval_message, claim['found_item_id'], 
-                  'found', claim_id, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), False))
+            insert_message(cursor, 'System', claim['claimant_username'], approval_message,
+                           item_id=claim['found_item_id'], item_type='found', claim_id=claim_id)
+            queue_claim_event(claim, 'approved', item_name)
             
             flash('Claim approved! Item marked as claimed.', 'success')
         
         elif action == 'reject':
-            cursor.execute("UPDATE claims SET status = 'rejected' WHERE id = %s", (claim_id,))
+            update_claim(cursor, claim, status='rejected')
             
             cursor.execute("SELECT device_name FROM found_items WHERE id = %s", (claim['found_item_id'],))
             item = cursor.fetchone()
@@ -660,15 +1360,14 @@ def manage_claim(claim_id, action):
             
             rejection_message = f"Your claim for item '{item_name}' has been rejected by the owner."
             
-            cursor.execute('''
-                INSERT INTO messages (sender, recipient, message, item_id, item_type, claim_id, timestamp, is_read)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            ''', ('System', claim['claimant_username'], rejection_message, claim['found_item_id'], 
-                  'found', claim_id, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), False))
+            insert_message(cursor, 'System', claim['claimant_username'], rejection_message,
+                           item_id=claim['found_item_id'], item_type='found', claim_id=claim_id)
+            queue_claim_event(claim, 'rejected', item_name)
             
             flash('Claim rejected!', 'success')
         
         conn.commit()
+        sync_item_indexes(cursor, 'found', claim['found_item_id'])
         cursor.close()
         conn.close()
         
@@ -680,7 +1379,298 @@ def manage_claim(claim_id, action):
             conn.close()
         return redirect(url_for('user_dashboard'))
 
+@app.route('/user/matches/<item_type>/<int:item_id>')
+def item_matches(item_type, item_id):
+    if 'user_id' not in session:
+        return jsonify({'error': 'Login required'}), 401
+    
+    if item_type not in ('found', 'lost'):
+        return jsonify({'error': 'Invalid item type'}), 400
+    
+    k = min(max(request.args.get('k', 5, type=int), 1), 50)
+    
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({'error': 'Database connection failed'}), 503
+    
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(f"SELECT {INDEX_COLUMNS[item_type]} FROM {ITEM_TABLES[item_type]} WHERE id = %s", (item_id,))
+        item = cursor.fetchone()
+        cursor.close()
+        conn.close()
+        
+        if not item:
+            return jsonify({'error': 'Item not found'}), 404
+        
+        matches = find_matches(item_type, item, k=k, exclude_user=item['posted_by'])
+        return jsonify({
+            'item_type': item_type,
+            'item_id': item_id,
+            'matches': [{
+                'item_type': 'found' if item_type == 'lost' else 'lost',
+                'id': m['item']['id'],
+                'device_name': m['item']['device_name'],
+                'color': m['item']['color'],
+                'location': m['item']['location'],
+                'posted_by': m['item']['posted_by'],
+                'posted_date': str(m['item']['posted_date']),
+                'score': m['score'],
+                'reasons': m['reasons']
+            } for m in matches]
+        })
+        
+    except Error as e:
+        if conn:
+            conn.close()
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/user/similar/<item_type>/<int:item_id>')
+def similar_items(item_type, item_id):
+    """Active found and lost items with a visually similar photo"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Login required'}), 401
+    
+    if item_type not in ('found', 'lost'):
+        return jsonify({'error': 'Invalid item type'}), 400
+    
+    k = min(max(request.args.get('k', 5, type=int), 1), 50)
+    
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({'error': 'Database connection failed'}), 503
+    
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(f"SELECT {INDEX_COLUMNS[item_type]} FROM {ITEM_TABLES[item_type]} WHERE id = %s", (item_id,))
+        item = cursor.fetchone()
+        cursor.close()
+        conn.close()
+        
+        if not item:
+            return jsonify({'error': 'Item not found'}), 404
+        
+        # Claimed or resolved posts are no use as suggestions, as in the match and list views
+        matches = find_similar_images(item_type, item, k=k, statuses=['active'])
+        return jsonify({
+            'item_type': item_type,
+            'item_id': item_id,
+            'similar': [{
+                'item_type': m['item_type'],
+                'id': m['item']['id'],
+                'device_name': m['item']['device_name'],
+                'location': m['item']['location'],
+                'status': m['item']['status'],
+                'posted_by': m['item']['posted_by'],
+                'posted_date': str(m['item']['posted_date']),
+                'image_url': upload_image(m['item']['image_filename'])['src'],
+                'similarity': m['similarity'],
+                'distance': m['distance']
+            } for m in matches]
+        })
+        
+    except Error as e:
+        if conn:
+            conn.close()
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/search')
+def api_search():
+    """Full-text item search shared by the user and admin pages.
+    
+    Users only see active items; admins see every status and may filter by one.
+    """
+    is_admin = 'admin_id' in session
+    if not is_admin and 'user_id' not in session:
+        return jsonify({'error': 'Login required'}), 401
+    
+    query = request.args.get('q', '').strip()
+    item_type = request.args.get('type', '').strip()
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    
+    item_types = [item_type] if item_type in ITEM_TABLES else None
+    if is_admin:
+        status = request.args.get('status', '').strip()
+        statuses = [status] if status else None
+    else:
+        statuses = ['active']
+    
+    if not query:
+        return jsonify({'query': query, 'total': 0, 'results': []})
+    
+    try:
+        total, results = search_items(query, item_types=item_types, statuses=statuses,
+                                      limit=limit, offset=offset)
+    except (Error, PoolExhaustedError) as e:
+        return jsonify({'error': str(e)}), 503
+    
+    for row in results:
+        row['posted_date'] = str(row['posted_date']) if row.get('posted_date') else None
+        if 'lost_date' in row:
+            row['lost_date'] = str(row['lost_date']) if row['lost_date'] else None
+    
+    return jsonify({'query': query, 'total': total, 'offset': offset, 'results': results})
+
 # ==================== CHAT/MESSAGING ====================
+def insert_message(cursor, sender, recipient, message, item_id=None, item_type=None,
+                   claim_id=None, subject=None, from_admin=False):
+    """Insert a message and update its conversation summary in the same transaction"""
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    cursor.execute('''
+        INSERT INTO messages (sender, recipient, subject, message, item_id, item_type, claim_id,
+                              timestamp, is_read, from_admin)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ''', (sender, recipient, subject or None, message, item_id, item_type, claim_id,
+          timestamp, False, from_admin))
+    message_id = cursor.lastrowid
+    
+    user_a, user_b = conversation_pair(sender, recipient)
+    # Messages to yourself never count as unread
+    unread_a = 1 if recipient == user_a and sender != recipient else 0
+    unread_b = 1 if recipient == user_b and sender != recipient else 0
+    # A slower transaction can commit an older message after a newer one, so the
+    # summary only moves forward. MySQL applies the assignments left to right:
+    # last_message_id must change last so the guards still see the old value.
+    cursor.execute('''
+        INSERT INTO conversations (user_a, user_b, last_message_id, last_timestamp, last_preview,
+                                   unread_a, unread_b)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE
+            last_timestamp = IF(VALUES(last_message_id) > last_message_id, VALUES(last_timestamp), last_timestamp),
+            last_preview = IF(VALUES(last_message_id) > last_message_id, VALUES(last_preview), last_preview),
+            last_message_id = GREATEST(last_message_id, VALUES(last_message_id)),
+            unread_a = unread_a + VALUES(unread_a),
+            unread_b = unread_b + VALUES(unread_b)
+    ''', (user_a, user_b, message_id, timestamp, message[:PREVIEW_LENGTH], unread_a, unread_b))
+    
+    event = {
+        'id': message_id,
+        'sender': sender,
+        'recipient': recipient,
+        'subject': subject or None,
+        'message': message,
+        'timestamp': timestamp,
+        'item_id': item_id,
+        'item_type': item_type,
+        'from_admin': bool(from_admin),
+    }
+    queue_event(recipient, 'message', event)
+    if sender != recipient:
+        cursor.execute("UPDATE users SET unread_messages = unread_messages + 1 WHERE username = %s", (recipient,))
+        queue_event(sender, 'message', event)
+        queue_event(recipient, 'unread', {'with': sender, 'delta': 1})
+    return message_id
+
+def mark_conversation_read(cursor, reader, other_user, count):
+    """Take ``count`` freshly read messages off the reader's unread counters"""
+    if count <= 0:
+        return
+    user_a, user_b = conversation_pair(reader, other_user)
+    column = 'unread_a' if reader == user_a else 'unread_b'
+    cursor.execute(f'''
+        UPDATE conversations SET {column} = GREATEST({column} - %s, 0)
+        WHERE user_a = %s AND user_b = %s
+    ''', (count, user_a, user_b))
+    cursor.execute("UPDATE users SET unread_messages = GREATEST(unread_messages - %s, 0) WHERE username = %s",
+                   (count, reader))
+    queue_event(reader, 'unread', {'with': other_user, 'delta': -count})
+
+def get_conversations(cursor, username):
+    """Conversation list for a user: partner, last message and unread count.
+    
+    Reads the maintained conversations summary, so the cost depends on the
+    number of partners rather than the number of messages.
+    """
+    cursor.execute('''
+        SELECT user_b AS other_user, last_preview AS last_message,
+               last_timestamp AS last_message_time, unread_a AS unread_count
+        FROM conversations WHERE user_a = %s
+        UNION ALL
+        SELECT user_a AS other_user, last_preview AS last_message,
+               last_timestamp AS last_message_time, unread_b AS unread_count
+        FROM conversations WHERE user_b = %s AND user_a != %s
+        ORDER BY last_message_time DESC
+    ''', (username, username, username))
+    return cursor.fetchall()
+
+def backfill_conversations():
+    """Rebuild the conversations table from the full message history"""
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        count = rebuild_conversations(cursor)
+        conn.commit()
+        cursor.close()
+    return count
+
+unread_reconcile_lock = threading.Lock()
+last_unread_reconcile = None
+
+def _run_unread_reconcile():
+    global last_unread_reconcile
+    try:
+        with db_pool.connection() as conn:
+            cursor = conn.cursor()
+            repaired = reconcile_unread_counters(cursor)
+            conn.commit()
+            cursor.close()
+        if repaired:
+            print(f"Repaired {repaired} unread message counters")
+        last_unread_reconcile = time.monotonic()
+    except (Error, PoolExhaustedError) as e:
+        print(f"Error reconciling unread counters: {e}")
+    finally:
+        unread_reconcile_lock.release()
+
+def schedule_unread_reconcile():
+    """Repair counter drift in the background once per UNREAD_RECONCILE_INTERVAL"""
+    if last_unread_reconcile is not None and \
+            time.monotonic() - last_unread_reconcile < app.config['UNREAD_RECONCILE_INTERVAL']:
+        return
+    if unread_reconcile_lock.acquire(blocking=False):
+        threading.Thread(target=_run_unread_reconcile, daemon=True).start()
+
+@app.cli.command('reconcile-unread')
+def reconcile_unread_command():
+    """Recount every user's unread messages."""
+    with db_pool.connection() as conn:
+        cursor = conn.cursor()
+        repaired = reconcile_unread_counters(cursor)
+        conn.commit()
+        cursor.close()
+    print(f"✅ Repaired {repaired} unread message counters")
+
+@app.cli.command('backfill-conversations')
+def backfill_conversations_command():
+    """Build the conversations summary table from existing messages."""
+    count = backfill_conversations()
+    print(f"✅ Rebuilt {count} conversations")
+
+def fetch_thread_page(cursor, username, with_user, before=None, limit=None):
+    """One page of a chat thread, newest first by message id.
+    
+    Returns (messages in display order, id to pass as ``before`` for the
+    next older page or None). Each direction of the thread is read from the
+    (sender, recipient, id) index separately and merged.
+    """
+    limit = limit or app.config['MESSAGES_PER_PAGE']
+    before_clause = " AND id < %s" if before else ""
+    half = f'''
+        (SELECT * FROM messages WHERE sender = %s AND recipient = %s{before_clause}
+         ORDER BY id DESC LIMIT %s)
+    '''
+    params = []
+    for sender, recipient in ((username, with_user), (with_user, username)):
+        params += [sender, recipient] + ([before] if before else []) + [limit + 1]
+    # UNION rather than UNION ALL so a note-to-self thread is not listed twice
+    cursor.execute(f"{half} UNION {half} ORDER BY id DESC LIMIT %s", params + [limit + 1])
+    rows = cursor.fetchall()
+    
+    older = rows[limit - 1]['id'] if len(rows) > limit else None
+    rows = rows[:limit]
+    rows.reverse()
+    return rows, older
+
 @app.route('/user/messages')
 @app.route('/user/messages/<with_user>')
 def chat_messages(with_user=None):
@@ -697,62 +1687,46 @@ def chat_messages(with_user=None):
     try:
         cursor = conn.cursor(dictionary=True)
         
-        cursor.execute('''
-            SELECT DISTINCT 
-                CASE 
-                    WHEN sender = %s THEN recipient 
-                    ELSE sender 
-                END as other_user,
-                MAX(timestamp) as last_message_time
-            FROM messages 
-            WHERE sender = %s OR recipient = %s
-            GROUP BY other_user
-            ORDER BY last_message_time DESC
-        ''', (username, username, username))
-        
-        conversations_raw = cursor.fetchall()
-        conversations = []
-        
-        for conv in conversations_raw:
-            other_user = conv['other_user']
-            cursor.execute('''
-                SELECT message, timestamp 
-                FROM messages 
-                WHERE (sender = %s AND recipient = %s) OR (sender = %s AND recipient = %s)
-                ORDER BY timestamp DESC LIMIT 1
-            ''', (username, other_user, other_user, username))
-            
-            last_msg = cursor.fetchone()
-            if last_msg:
-                conversations.append({
-                    'other_user': other_user,
-                    'last_message': last_msg['message'],
-                    'last_message_time': last_msg['timestamp']
-                })
+        conversations = get_conversations(cursor, username)
         
         chat_messages = []
+        older_cursor = None
         related_item = None
         related_item_type = None
         related_item_id = None
         
         if with_user:
-            cursor.execute('''
-                SELECT * FROM messages 
-                WHERE (sender = %s AND recipient = %s) OR (sender = %s AND recipient = %s)
-                ORDER BY timestamp ASC
-            ''', (username, with_user, with_user, username))
+            before = request.args.get('before', type=int)
+            chat_messages, older_cursor = fetch_thread_page(cursor, username, with_user, before)
             
-            chat_messages = cursor.fetchall()
+            # Only what is on screen counts as read
+            unread_ids = [m['id'] for m in chat_messages
+                          if m['recipient'] == username and m['sender'] == with_user and not m['is_read']]
+            if unread_ids:
+                placeholders = ', '.join(['%s'] * len(unread_ids))
+                cursor.execute(f'''
+                    UPDATE messages 
+                    SET is_read = TRUE 
+                    WHERE recipient = %s AND sender = %s AND is_read = FALSE AND id IN ({placeholders})
+                ''', [username, with_user] + unread_ids)
+                mark_conversation_read(cursor, username, with_user, cursor.rowcount)
             
-            cursor.execute('''
-                UPDATE messages 
-                SET is_read = TRUE 
-                WHERE recipient = %s AND sender = %s AND is_read = FALSE
-            ''', (username, with_user))
+            # The conversation is about whatever its first message referenced
+            first_message = chat_messages[0] if chat_messages and not older_cursor else None
+            if chat_messages and older_cursor:
+                cursor.execute('''
+                    (SELECT id, item_id, item_type FROM messages WHERE sender = %s AND recipient = %s
+                     ORDER BY id LIMIT 1)
+                    UNION ALL
+                    (SELECT id, item_id, item_type FROM messages WHERE sender = %s AND recipient = %s
+                     ORDER BY id LIMIT 1)
+                    ORDER BY id LIMIT 1
+                ''', (username, with_user, with_user, username))
+                first_message = cursor.fetchone()
             
-            if chat_messages and chat_messages[0]['item_id']:
-                item_id = chat_messages[0]['item_id']
-                item_type = chat_messages[0].get('item_type', 'found')
+            if first_message and first_message['item_id']:
+                item_id = first_message['item_id']
+                item_type = first_message.get('item_type', 'found')
                 
                 if item_type == 'found':
                     cursor.execute("SELECT * FROM found_items WHERE id = %s", (item_id,))
@@ -772,6 +1746,7 @@ def chat_messages(with_user=None):
         return render_template('chat_messages.html',
                               conversations=conversations,
                               chat_messages=chat_messages,
+                              older_cursor=older_cursor,
                               current_chat_user=with_user,
                               related_item=related_item,
                               related_item_type=related_item_type,
@@ -783,6 +1758,69 @@ def chat_messages(with_user=None):
             conn.close()
         return redirect(url_for('user_dashboard'))
 
+@app.route('/user/messages/read', methods=['POST'])
+def mark_message_read():
+    """Mark one delivered message read (used when it arrives over the live stream)"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Login required'}), 401
+    
+    username = session.get('username')
+    message_id = request.form.get('message_id', type=int)
+    if not message_id:
+        return jsonify({'error': 'message_id is required'}), 400
+    
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({'error': 'Database connection failed'}), 503
+    
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT sender FROM messages WHERE id = %s AND recipient = %s AND is_read = FALSE",
+                       (message_id, username))
+        message = cursor.fetchone()
+        if message:
+            cursor.execute("UPDATE messages SET is_read = TRUE WHERE id = %s AND is_read = FALSE", (message_id,))
+            mark_conversation_read(cursor, username, message['sender'], cursor.rowcount)
+            conn.commit()
+        cursor.close()
+        conn.close()
+        return jsonify({'success': True})
+        
+    except Error as e:
+        if conn:
+            conn.close()
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/user/events')
+def user_events():
+    """Server-Sent Events stream of new messages, unread changes and claim updates"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Login required'}), 401
+    
+    username = session.get('username')
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    keepalive = app.config['SSE_KEEPALIVE']
+    max_duration = app.config['SSE_MAX_DURATION']
+    
+    # No database access here: the stream must not pin a pooled connection
+    subscription = event_broker.subscribe(username, last_event_id)
+    
+    def stream():
+        deadline = time.monotonic() + max_duration
+        try:
+            yield f"retry: {keepalive * 1000}\n\n"
+            while time.monotonic() < deadline:
+                events = subscription.get(timeout=keepalive)
+                if events:
+                    yield ''.join(format_sse(event) for event in events)
+                else:
+                    yield ": keep-alive\n\n"
+        finally:
+            subscription.close()
+    
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/user/send_message', methods=['POST'])
 def send_message():
     if 'user_id' not in session:
@@ -806,13 +1844,9 @@ def send_message():
     try:
         cursor = conn.cursor()
         
-        cursor.execute('''
-            INSERT INTO messages (sender, recipient, message, item_id, item_type, timestamp, is_read)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        ''', (username, recipient, message_text, 
-              int(item_id) if item_id else None, 
-              item_type if item_type else None,
-              datetime.now().strftime('%Y-%m-%d %H:%M:%S'), False))
+        insert_message(cursor, username, recipient, message_text,
+                       item_id=int(item_id) if item_id else None,
+                       item_type=item_type if item_type else None)
         
         conn.commit()
         cursor.close()
@@ -863,12 +1897,9 @@ def send_message_from_item(item_type, item_id, recipient):
             conn.close()
             return redirect(url_for('view_items'))
         
-        cursor.execute('''
-            INSERT INTO messages (sender, recipient, message, item_id, item_type, timestamp, is_read)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-        ''', (username, recipient, 
-              f"Hello, I'm interested in your {item_type} item '{item['device_name']}'. Can we discuss this?", 
-              item_id, item_type, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), False))
+        insert_message(cursor, username, recipient,
+                       f"Hello, I'm interested in your {item_type} item '{item['device_name']}'. Can we discuss this?",
+                       item_id=item_id, item_type=item_type)
         
         conn.commit()
         cursor.close()
@@ -890,32 +1921,16 @@ def admin_login():
         username = request.form.get('username', '').strip()
         password = request.form.get('password', '').strip()
         
-        conn = get_db_connection()
-        if conn:
-            try:
-                cursor = conn.cursor(dictionary=True)
-                cursor.execute("SELECT * FROM administrators WHERE username = %s", (username,))
-                admin = cursor.fetchone()
-                
-                if admin and bcrypt.checkpw(password.encode('utf-8'), admin['password_hash'].encode('utf-8')):
-                    session['admin_id'] = admin['id']
-                    session['admin_username'] = username
-                    flash('Admin login successful!', 'success')
-                    
-                    cursor.close()
-                    conn.close()
-                    return redirect(url_for('admin_dashboard'))
-                else:
-                    flash('Invalid admin credentials!', 'error')
-                    
-                cursor.close()
-                conn.close()
-            except Error as e:
-                flash(f'Error: {str(e)}', 'error')
-                if conn:
-                    conn.close()
+        admin, error = check_login('administrators', username, password)
+        if error:
+            flash(error, 'error')
+        elif not admin:
+            flash('Invalid admin credentials!', 'error')
         else:
-            flash('Database connection failed!', 'error')
+            session['admin_id'] = admin['id']
+            session['admin_username'] = username
+            flash('Admin login successful!', 'success')
+            return redirect(url_for('admin_dashboard'))
     
     return render_template('admin_login.html')
 
@@ -932,60 +1947,18 @@ def admin_dashboard():
     try:
         cursor = conn.cursor(dictionary=True)
         
-        cursor.execute("SELECT * FROM administrators ORDER BY created_at DESC")
-        admins = cursor.fetchall()
-        # Convert datetime objects to strings for admins
-        for admin in admins:
-            if admin['created_at'] and isinstance(admin['created_at'], datetime):
-                admin['created_at'] = admin['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-        
-        cursor.execute("SELECT * FROM users ORDER BY created_at DESC")
-        users = cursor.fetchall()
-        # Convert datetime objects to strings for users
-        for user in users:
-            if user['created_at'] and isinstance(user['created_at'], datetime):
-                user['created_at'] = user['created_at'].strftime('%Y-%m-%d %H:%M:%S')
-            if user['last_login'] and isinstance(user['last_login'], datetime):
-                user['last_login'] = user['last_login'].strftime('%Y-%m-%d %H:%M:%S')
-        
-        cursor.execute("SELECT * FROM found_items ORDER BY posted_date DESC")
-        found_items = cursor.fetchall()
-        # Convert datetime objects to strings for found items
-        for item in found_items:
-            if item['posted_date'] and isinstance(item['posted_date'], datetime):
-                item['posted_date'] = item['posted_date'].strftime('%Y-%m-%d %H:%M:%S')
-        
-        cursor.execute("SELECT * FROM lost_items ORDER BY posted_date DESC")
-        lost_items = cursor.fetchall()
-        # Convert datetime objects to strings for lost items
-        for item in lost_items:
-            if item['posted_date'] and isinstance(item['posted_date'], datetime):
-                item['posted_date'] = item['posted_date'].strftime('%Y-%m-%d %H:%M:%S')
-            if item['lost_date'] and isinstance(item['lost_date'], datetime):
-                item['lost_date'] = item['lost_date'].strftime('%Y-%m-%d')
-        
-        cursor.execute("SELECT * FROM claims ORDER BY claim_date DESC")
-        claims = cursor.fetchall()
-        # Convert datetime objects to strings for claims
-        for claim in claims:
-            if claim['claim_date'] and isinstance(claim['claim_date'], datetime):
-                claim['claim_date'] = claim['claim_date'].strftime('%Y-%m-%d %H:%M:%S')
-        
-        cursor.execute("SELECT COUNT(*) as count FROM claims WHERE status = 'pending' AND admin_notified = FALSE")
-        pending_result = cursor.fetchone()
-        pending_claims_count = pending_result['count'] if pending_result else 0
+        # Only summary counts on first paint; each tab loads its rows from /admin/api/<tab>
+        stats = read_stats(cursor)
+        schedule_rollups()
         
         cursor.close()
         conn.close()
         
         return render_template('admin_dashboard.html', 
                               username=session.get('admin_username'),
-                              admins=admins,
-                              users=users,
-                              found_items=found_items,
-                              lost_items=lost_items,
-                              claims=claims,
-                              pending_claims_count=pending_claims_count)
+                              stats=stats,
+                              pending_claims_count=stats['new_claims'],
+                              page_size=app.config['ADMIN_PAGE_SIZE'])
         
     except Error as e:
         flash(f'Error: {str(e)}', 'error')
@@ -993,6 +1966,199 @@ def admin_dashboard():
             conn.close()
         return redirect(url_for('admin_login'))
 
+# Columns, sort keys and search fields for each lazily loaded admin dashboard tab
+ADMIN_TABS = {
+    'users': {
+        'table': 'users',
+        'columns': "id, username, full_name, email, user_type, department, created_at, last_login, is_active",
+        'sort': ['username', 'full_name', 'email', 'user_type', 'department', 'created_at', 'is_active'],
+        'default_sort': 'created_at',
+        'search': ['username', 'full_name', 'email', 'department'],
+    },
+    'found': {
+        'table': 'found_items',
+        'columns': "id, device_name, posted_by, location, status, posted_date, "
+                   "(SELECT COUNT(*) FROM claims c WHERE c.found_item_id = found_items.id) AS claim_count",
+        'sort': ['id', 'device_name', 'posted_by', 'location', 'status', 'posted_date'],
+        'default_sort': 'posted_date',
+        'search_index': 'found',
+    },
+    'lost': {
+        'table': 'lost_items',
+        'columns': "id, device_name, posted_by, location, status, lost_date, posted_date",
+        'sort': ['id', 'device_name', 'posted_by', 'location', 'status', 'lost_date', 'posted_date'],
+        'default_sort': 'posted_date',
+        'search_index': 'lost',
+    },
+    'claims': {
+        'table': 'claims',
+        'columns': "id, found_item_id, claimant_username, owner_username, status, claim_date, admin_notified",
+        'sort': ['id', 'claimant_username', 'owner_username', 'status', 'claim_date'],
+        'default_sort': 'claim_date',
+        'search': ['claimant_username', 'owner_username'],
+    },
+    'admins': {
+        'table': 'administrators',
+        'columns': "id, username, created_by, created_at",
+        'sort': ['username', 'created_by', 'created_at'],
+        'default_sort': 'created_at',
+        'search': ['username', 'created_by'],
+    },
+}
+
+def serialize_row(row):
+    """Make a DB row JSON friendly (dates as 'YYYY-MM-DD HH:MM:SS' strings)"""
+    result = {}
+    for key, value in row.items():
+        if isinstance(value, datetime):
+            value = value.strftime('%Y-%m-%d %H:%M:%S')
+        elif hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        result[key] = value
+    return result
+
+@app.route('/admin/api/<tab>')
+def admin_dashboard_tab(tab):
+    """One page of rows for a dashboard tab, with sorting, search and status filter"""
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Login required'}), 401
+    
+    spec = ADMIN_TABS.get(tab)
+    if not spec:
+        return jsonify({'error': 'Unknown tab'}), 404
+    
+    page = max(request.args.get('page', 1, type=int), 1)
+    page_size = min(max(request.args.get('page_size', app.config['ADMIN_PAGE_SIZE'], type=int), 1), 100)
+    sort = request.args.get('sort', spec['default_sort'])
+    if sort not in spec['sort']:
+        sort = spec['default_sort']
+    direction = 'ASC' if request.args.get('dir', 'desc').lower() == 'asc' else 'DESC'
+    query = request.args.get('q', '').strip()
+    status = request.args.get('status', '').strip()
+    
+    where = []
+    params = []
+    # Text search pages through the SEARCH_MAX_RESULTS best matches; ``matches`` is how many there were
+    matches = None
+    truncated = False
+    if query:
+        if 'search_index' in spec:
+            matches, hits = search_items(query, item_types=[spec['search_index']],
+                                         statuses=[status] if status else None,
+                                         limit=app.config['SEARCH_MAX_RESULTS'])
+            if not hits:
+                return jsonify({'rows': [], 'total': 0, 'matches': 0, 'truncated': False,
+                                'page': page, 'page_size': page_size})
+            truncated = matches > len(hits)
+            where.append(f"id IN ({', '.join(['%s'] * len(hits))})")
+            params += [hit['id'] for hit in hits]
+        else:
+            where.append('(' + ' OR '.join(f"{col} LIKE %s" for col in spec['search']) + ')')
+            params += [f"%{query}%"] * len(spec['search'])
+    if status and 'status' in spec['sort']:
+        where.append("status = %s")
+        params.append(status)
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ''
+    
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({'error': 'Database connection failed'}), 503
+    
+    try:
+        cursor = conn.cursor(dictionary=True)
+        
+        cursor.execute(f"SELECT COUNT(*) AS count FROM {spec['table']} {where_sql}", tuple(params))
+        total = cursor.fetchone()['count']
+        
+        cursor.execute(f'''
+            SELECT {spec['columns']} FROM {spec['table']}
+            {where_sql}
+            ORDER BY {sort} {direction}, id {direction}
+            LIMIT %s OFFSET %s
+        ''', tuple(params) + (page_size, (page - 1) * page_size))
+        rows = [serialize_row(row) for row in cursor.fetchall()]
+        
+        cursor.close()
+        conn.close()
+        
+        return jsonify({'rows': rows, 'total': total, 'matches': total if matches is None else matches,
+                        'truncated': truncated, 'page': page, 'page_size': page_size})
+        
+    except Error as e:
+        if conn:
+            conn.close()
+        return jsonify({'error': str(e)}), 500
+
+# ==================== ANALYTICS ====================
+rollup_lock = threading.Lock()
+last_rollup = None
+
+def _run_rollups():
+    global last_rollup
+    try:
+        with db_pool.connection() as conn:
+            run_rollups(conn, app.config['ROLLUP_BATCH_SIZE'])
+        last_rollup = time.monotonic()
+    except (Error, PoolExhaustedError) as e:
+        print(f"Error updating analytics rollups: {e}")
+    finally:
+        rollup_lock.release()
+
+def schedule_rollups():
+    """Fold new rows into the analytics rollups in the background once per ROLLUP_INTERVAL"""
+    if last_rollup is not None and time.monotonic() - last_rollup < app.config['ROLLUP_INTERVAL']:
+        return
+    if rollup_lock.acquire(blocking=False):
+        threading.Thread(target=_run_rollups, daemon=True).start()
+
+@app.cli.command('rollup')
+def rollup_command():
+    """Bring the analytics rollups up to date (safe to run from cron)."""
+    with db_pool.connection() as conn:
+        processed = run_rollups(conn, app.config['ROLLUP_BATCH_SIZE'])
+    for source, count in processed.items():
+        print(f"  {source}: {count} rows")
+    print("✅ Analytics rollups up to date")
+
+@app.route('/admin/api/metrics')
+def admin_metrics():
+    """Posting, claim and recovery-time trends, read from the rollup tables only.
+
+    ?granularity=day|hour&days=N (hourly buckets are kept for HOURLY_RETENTION_DAYS)
+    """
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Login required'}), 401
+    
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in ('hour', 'day'):
+        return jsonify({'error': 'granularity must be hour or day'}), 400
+    max_days = HOURLY_RETENTION_DAYS if granularity == 'hour' else 366
+    days = request.args.get('days', min(app.config['METRICS_DEFAULT_DAYS'], max_days), type=int)
+    days = min(max(days, 1), max_days)
+    
+    schedule_rollups()
+    
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({'error': 'Database connection failed'}), 503
+    
+    try:
+        cursor = conn.cursor(dictionary=True)
+        now = datetime.now()
+        if granularity == 'hour':
+            end = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        else:
+            end = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        metrics = read_metrics(cursor, granularity, end - timedelta(days=days), end)
+        cursor.close()
+        conn.close()
+        return jsonify(metrics)
+        
+    except Error as e:
+        if conn:
+            conn.close()
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/admin/user/<username>')
 def admin_user_details(username):
     if 'admin_id' not in session:
@@ -1020,22 +2186,7 @@ def admin_user_details(username):
         cursor.execute("SELECT * FROM lost_items WHERE posted_by = %s ORDER BY posted_date DESC", (username,))
         user_lost_items = cursor.fetchall()
         
-        cursor.execute("SELECT COUNT(*) as claims_made FROM claims WHERE claimant_username = %s", (username,))
-        claims_made = cursor.fetchone()['claims_made']
-        
-        cursor.execute('''
-            SELECT COUNT(*) as claims_received 
-            FROM claims c
-            JOIN found_items f ON c.found_item_id = f.id
-            WHERE f.posted_by = %s
-        ''', (username,))
-        claims_received = cursor.fetchone()['claims_received']
-        
-        user['total_items_posted'] = len(user_found_items) + len(user_lost_items)
-        user['items_found'] = len(user_found_items)
-        user['items_lost'] = len(user_lost_items)
-        user['claims_made'] = claims_made
-        user['claims_received'] = claims_received
+        # total_items_posted, items_found, ... are the users row's own counters (see stats.py)
         
         cursor.close()
         conn.close()
@@ -1070,17 +2221,20 @@ def add_admin():
         if cursor.fetchone():
             flash('Admin username already exists!', 'error')
         else:
-            hashed_pw = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt())
             cursor.execute(
                 "INSERT INTO administrators (username, password_hash, created_by) VALUES (%s, %s, %s)",
-                (new_username, hashed_pw.decode('utf-8'), session.get('admin_username'))
+                (new_username, password_hasher.hash(new_password), session.get('admin_username'))
             )
+            record_change(cursor, 'administrators', after={})
             conn.commit()
             flash('New admin added successfully!', 'success')
         
         cursor.close()
         conn.close()
     
+    except HasherBusy:
+        flash('The server is busy right now. Please try again in a moment.', 'error')
+        conn.close()
     except Error as e:
         flash(f'Error: {str(e)}', 'error')
         if conn:
@@ -1100,12 +2254,13 @@ def toggle_user(username):
     
     try:
         cursor = conn.cursor()
-        cursor.execute("SELECT is_active FROM users WHERE username = %s", (username,))
+        cursor.execute("SELECT is_active FROM users WHERE username = %s FOR UPDATE", (username,))
         result = cursor.fetchone()
         
         if result:
             new_status = not result[0]
             cursor.execute("UPDATE users SET is_active = %s WHERE username = %s", (new_status, username))
+            record_change(cursor, 'users', before={'is_active': result[0]}, after={'is_active': new_status})
             conn.commit()
             status = "activated" if new_status else "deactivated"
             flash(f'User {username} {status} successfully!', 'success')
@@ -1133,18 +2288,30 @@ def delete_item(item_type, item_id):
         return redirect(url_for('admin_dashboard'))
     
     try:
-        cursor = conn.cursor()
-        if item_type == 'found':
-            cursor.execute("DELETE FROM found_items WHERE id = %s", (item_id,))
-            flash('Found item deleted successfully!', 'success')
-        elif item_type == 'lost':
-            cursor.execute("DELETE FROM lost_items WHERE id = %s", (item_id,))
-            flash('Lost item deleted successfully!', 'success')
+        cursor = conn.cursor(dictionary=True)
+        if item_type in ('found', 'lost'):
+            table = ITEM_TABLES[item_type]
+            cursor.execute(f"SELECT status, posted_by, image_filename FROM {table} WHERE id = %s FOR UPDATE",
+                           (item_id,))
+            item = cursor.fetchone()
+            if item_type == 'found':
+                # Same as the ON DELETE CASCADE in campus_lost_found.sql, but counted
+                delete_claims(cursor, "found_item_id = %s", (item_id,))
+            cursor.execute(f"DELETE FROM {table} WHERE id = %s", (item_id,))
+            if item:
+                record_change(cursor, table, before=item)
+                bump_user(cursor, item['posted_by'], **{f"items_{item_type}": -1})
+                blob_store.drop_ref(cursor, item['image_filename'])
+                touch_resources(cursor, table, f"{table}:{item_id}")
+            flash(f'{item_type.title()} item deleted successfully!', 'success')
         else:
             flash('Invalid item type!', 'error')
         
         conn.commit()
+        if item_type in ('found', 'lost'):
+            sync_item_indexes(cursor, item_type, item_id)
         cursor.close()
+        collect_uploads(conn)
         conn.close()
     
     except Error as e:
@@ -1166,11 +2333,12 @@ def delete_claim(claim_id):
     
     try:
         cursor = conn.cursor()
-        cursor.execute("DELETE FROM claims WHERE id = %s", (claim_id,))
+        delete_claims(cursor, "id = %s", (claim_id,))
         conn.commit()
         flash('Claim deleted successfully!', 'success')
         
         cursor.close()
+        collect_uploads(conn)
         conn.close()
     
     except Error as e:
@@ -1201,7 +2369,13 @@ def admin_view_claim(claim_id):
             conn.close()
             return redirect(url_for('admin_dashboard'))
         
-        cursor.execute("UPDATE claims SET admin_notified = TRUE WHERE id = %s", (claim_id,))
+        # Only the first view changes anything, so only it takes the row lock
+        if not claim['admin_notified']:
+            cursor.execute("SELECT * FROM claims WHERE id = %s FOR UPDATE", (claim_id,))
+            locked = cursor.fetchone()
+            if locked and not locked['admin_notified']:
+                update_claim(cursor, locked, admin_notified=True)
+                claim = locked
         
         cursor.execute("SELECT * FROM found_items WHERE id = %s", (claim['found_item_id'],))
         found_item = cursor.fetchone()
@@ -1243,7 +2417,7 @@ def admin_manage_claim(claim_id, action):
     try:
         cursor = conn.cursor(dictionary=True)
         
-        cursor.execute("SELECT * FROM claims WHERE id = %s", (claim_id,))
+        cursor.execute("SELECT * FROM claims WHERE id = %s FOR UPDATE", (claim_id,))
         claim = cursor.fetchone()
         
         if not claim:
@@ -1252,55 +2426,46 @@ def admin_manage_claim(claim_id, action):
             return redirect(url_for('admin_dashboard'))
         
         if action == 'approve':
-            cursor.execute("UPDATE claims SET status = 'approved' WHERE id = %s", (claim_id,))
-            cursor.execute("UPDATE found_items SET status = 'claimed' WHERE id = %s", (claim['found_item_id'],))
+            update_claim(cursor, claim, status='approved')
+            set_item_status(cursor, 'found_items', claim['found_item_id'], 'claimed')
             
             cursor.execute("SELECT device_name FROM found_items WHERE id = %s", (claim['found_item_id'],))
             item = cursor.fetchone()
             item_name = item['device_name'] if item else 'the item'
             
-            cursor.execute('''
-                INSERT INTO messages (sender, recipient, message, item_id, item_type, claim_id, timestamp, is_read, from_admin)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ''', ('System', claim['claimant_username'], 
-                  f"ADMIN ACTION: Your claim for item '{item_name}' has been approved by admin. Please contact the owner.", 
-                  claim['found_item_id'], 'found', claim_id, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), False, True))
+            insert_message(cursor, 'System', claim['claimant_username'],
+                           f"ADMIN ACTION: Your claim for item '{item_name}' has been approved by admin. Please contact the owner.",
+                           item_id=claim['found_item_id'], item_type='found', claim_id=claim_id, from_admin=True)
             
-            cursor.execute('''
-                INSERT INTO messages (sender, recipient, message, item_id, item_type, claim_id, timestamp, is_read, from_admin)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ''', ('System', claim['owner_username'], 
-                  f"ADMIN ACTION: The claim for your item '{item_name}' has been approved by admin.", 
-                  claim['found_item_id'], 'found', claim_id, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), False, True))
+            insert_message(cursor, 'System', claim['owner_username'],
+                           f"ADMIN ACTION: The claim for your item '{item_name}' has been approved by admin.",
+                           item_id=claim['found_item_id'], item_type='found', claim_id=claim_id, from_admin=True)
+            queue_claim_event(claim, 'approved', item_name)
             
             flash('Claim approved by admin!', 'success')
         
         elif action == 'reject':
-            cursor.execute("UPDATE claims SET status = 'rejected' WHERE id = %s", (claim_id,))
+            update_claim(cursor, claim, status='rejected')
             
             cursor.execute("SELECT device_name FROM found_items WHERE id = %s", (claim['found_item_id'],))
             item = cursor.fetchone()
             item_name = item['device_name'] if item else 'the item'
             
-            cursor.execute('''
-                INSERT INTO messages (sender, recipient, message, item_id, item_type, claim_id, timestamp, is_read, from_admin)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ''', ('System', claim['claimant_username'], 
-                  f"ADMIN ACTION: Your claim for item '{item_name}' has been rejected by admin.", 
-                  claim['found_item_id'], 'found', claim_id, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), False, True))
+            insert_message(cursor, 'System', claim['claimant_username'],
+                           f"ADMIN ACTION: Your claim for item '{item_name}' has been rejected by admin.",
+                           item_id=claim['found_item_id'], item_type='found', claim_id=claim_id, from_admin=True)
             
-            cursor.execute('''
-                INSERT INTO messages (sender, recipient, message, item_id, item_type, claim_id, timestamp, is_read, from_admin)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ''', ('System', claim['owner_username'], 
-                  f"ADMIN ACTION: The claim for your item '{item_name}' has been rejected by admin.", 
-                  claim['found_item_id'], 'found', claim_id, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), False, True))
+            insert_message(cursor, 'System', claim['owner_username'],
+                           f"ADMIN ACTION: The claim for your item '{item_name}' has been rejected by admin.",
+                           item_id=claim['found_item_id'], item_type='found', claim_id=claim_id, from_admin=True)
+            queue_claim_event(claim, 'rejected', item_name)
             
             flash('Claim rejected by admin!', 'success')
         
-        cursor.execute("UPDATE claims SET admin_notified = TRUE WHERE id = %s", (claim_id,))
+        update_claim(cursor, claim, admin_notified=True)
         
         conn.commit()
+        sync_item_indexes(cursor, 'found', claim['found_item_id'])
         cursor.close()
         conn.close()
         
@@ -1336,14 +2501,11 @@ def admin_message_user():
         try:
             cursor = conn.cursor()
             
-            cursor.execute('''
-                INSERT INTO messages (sender, recipient, subject, message, item_id, item_type, 
-                                    timestamp, is_read, from_admin)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            ''', (session.get('admin_username'), recipient, subject, message_text, 
-                  int(item_id) if item_id else None, 
-                  item_type if item_type else None,
-                  datetime.now().strftime('%Y-%m-%d %H:%M:%S'), False, True))
+            insert_message(cursor, session.get('admin_username'), recipient, message_text,
+                           subject=subject,
+                           item_id=int(item_id) if item_id else None,
+                           item_type=item_type if item_type else None,
+                           from_admin=True)
             
             conn.commit()
             cursor.close()
@@ -1380,7 +2542,7 @@ def admin_view_found_item(item_id):
     try:
         cursor = conn.cursor(dictionary=True)
         
-        cursor.execute("SELECT * FROM found_items WHERE id = %s", (item_id,))
+        cursor.execute("SELECT id, image_hash, posted_by, updated_at FROM found_items WHERE id = %s", (item_id,))
         item = cursor.fetchone()
         
         if not item:
@@ -1388,22 +2550,36 @@ def admin_view_found_item(item_id):
             conn.close()
             return redirect(url_for('admin_dashboard'))
         
-        cursor.execute("SELECT email, phone FROM users WHERE username = %s", (item['posted_by'],))
-        poster_info = cursor.fetchone()
-        poster_email = poster_info['email'] if poster_info else 'N/A'
-        poster_phone = poster_info['phone'] if poster_info else 'N/A'
-        
-        cursor.execute("SELECT * FROM claims WHERE found_item_id = %s ORDER BY claim_date DESC", (item_id,))
-        item_claims = cursor.fetchall()
+        # Claims on the item move its version too (see update_claim); the poster's row gives the contacts
+        resources = [f"found_items:{item_id}", f"users:{item['posted_by']}"]
+        versions = read_versions(cursor, resources)
+        similar_items = find_similar_images('found', item)
         
+        def render():
+            cursor.execute("SELECT * FROM found_items WHERE id = %s", (item_id,))
+            item = cursor.fetchone()
+            
+            cursor.execute("SELECT email, phone FROM users WHERE username = %s", (item['posted_by'],))
+            poster_info = cursor.fetchone()
+            poster_email = poster_info['email'] if poster_info else 'N/A'
+            poster_phone = poster_info['phone'] if poster_info else 'N/A'
+            
+            cursor.execute("SELECT * FROM claims WHERE found_item_id = %s ORDER BY claim_date DESC", (item_id,))
+            item_claims = cursor.fetchall()
+            
+            return render_template('admin_view_found_item.html', 
+                                  item=item,
+                                  poster_email=poster_email,
+                                  poster_phone=poster_phone,
+                                  item_claims=item_claims,
+                                  similar_items=similar_items)
+        
+        response = cached_page(resources, versions, render, shows_flashes=False,
+                               variant=[(m['item_type'], m['item']['id'], m['item']['status']) for m in similar_items],
+                               modified=[item['updated_at']])
         cursor.close()
         conn.close()
-        
-        return render_template('admin_view_found_item.html', 
-                              item=item,
-                              poster_email=poster_email,
-                              poster_phone=poster_phone,
-                              item_claims=item_claims)
+        return response
         
     except Error as e:
         flash(f'Error: {str(e)}', 'error')
@@ -1424,7 +2600,7 @@ def admin_view_lost_item(item_id):
     try:
         cursor = conn.cursor(dictionary=True)
         
-        cursor.execute("SELECT * FROM lost_items WHERE id = %s", (item_id,))
+        cursor.execute("SELECT id, image_hash, posted_by, updated_at FROM lost_items WHERE id = %s", (item_id,))
         item = cursor.fetchone()
         
         if not item:
@@ -1432,18 +2608,31 @@ def admin_view_lost_item(item_id):
             conn.close()
             return redirect(url_for('admin_dashboard'))
         
-        cursor.execute("SELECT email, phone FROM users WHERE username = %s", (item['posted_by'],))
-        poster_info = cursor.fetchone()
-        poster_email = poster_info['email'] if poster_info else 'N/A'
-        poster_phone = poster_info['phone'] if poster_info else 'N/A'
+        resources = [f"lost_items:{item_id}", f"users:{item['posted_by']}"]
+        versions = read_versions(cursor, resources)
+        similar_items = find_similar_images('lost', item)
         
+        def render():
+            cursor.execute("SELECT * FROM lost_items WHERE id = %s", (item_id,))
+            item = cursor.fetchone()
+            
+            cursor.execute("SELECT email, phone FROM users WHERE username = %s", (item['posted_by'],))
+            poster_info = cursor.fetchone()
+            poster_email = poster_info['email'] if poster_info else 'N/A'
+            poster_phone = poster_info['phone'] if poster_info else 'N/A'
+            
+            return render_template('admin_view_lost_item.html', 
+                                  item=item,
+                                  poster_email=poster_email,
+                                  poster_phone=poster_phone,
+                                  similar_items=similar_items)
+        
+        response = cached_page(resources, versions, render, shows_flashes=False,
+                               variant=[(m['item_type'], m['item']['id'], m['item']['status']) for m in similar_items],
+                               modified=[item['updated_at']])
         cursor.close()
         conn.close()
-        
-        return render_template('admin_view_lost_item.html', 
-                              item=item,
-                              poster_email=poster_email,
-                              poster_phone=poster_phone)
+        return response
         
     except Error as e:
         flash(f'Error: {str(e)}', 'error')
@@ -1464,11 +2653,11 @@ def admin_mark_item_status(item_type, item_id, status):
     try:
         cursor = conn.cursor()
         if item_type == 'found':
-            cursor.execute("UPDATE found_items SET status = %s WHERE id = %s", (status, item_id))
+            set_item_status(cursor, 'found_items', item_id, status)
             flash(f'Found item marked as {status}!', 'success')
             redirect_url = url_for('admin_view_found_item', item_id=item_id)
         elif item_type == 'lost':
-            cursor.execute("UPDATE lost_items SET status = %s WHERE id = %s", (status, item_id))
+            set_item_status(cursor, 'lost_items', item_id, status)
             flash(f'Lost item marked as {status}!', 'success')
             redirect_url = url_for('admin_view_lost_item', item_id=item_id)
         else:
@@ -1477,6 +2666,7 @@ def admin_mark_item_status(item_type, item_id, status):
             return redirect(url_for('admin_dashboard'))
         
         conn.commit()
+        sync_item_indexes(cursor, item_type, item_id)
         cursor.close()
         conn.close()
         
@@ -1488,61 +2678,153 @@ def admin_mark_item_status(item_type, item_id, status):
             conn.close()
         return redirect(url_for('admin_dashboard'))
 
+# ==================== REPORT JOBS ====================
+def record_report_metrics(kind, seconds, size, error):
+    metrics.REPORT_DURATION.labels(kind, 'failed' if error else 'done').observe(seconds or 0)
+    if size is not None:
+        metrics.REPORT_SIZE.labels(kind).observe(size)
+
+report_jobs = ReportJobs(app.config['REPORT_FOLDER'],
+                         max_workers=app.config['REPORT_WORKERS'],
+                         ttl=app.config['REPORT_CACHE_TTL'],
+                         on_finished=record_report_metrics)
+
+def report_options(values):
+    """Date range and sections for a report from request args/form; raises ValueError"""
+    options = {}
+    for field in ('date_from', 'date_to'):
+        value = (values.get(field) or '').strip()
+        if value:
+            try:
+                options[field] = datetime.strptime(value, '%Y-%m-%d').date().isoformat()
+            except ValueError:
+                raise ValueError(f'{field} must be a date (YYYY-MM-DD)')
+    if options.get('date_from') and options.get('date_to') and options['date_from'] > options['date_to']:
+        raise ValueError('date_from is after date_to')
+    
+    sections = [name.strip() for value in values.getlist('sections') for name in value.split(',') if name.strip()]
+    unknown = [name for name in sections if name not in SECTION_SOURCES]
+    if unknown:
+        raise ValueError(f"Unknown report section: {', '.join(unknown)}")
+    if sections and set(sections) != set(SECTION_SOURCES):
+        options['sections'] = sorted(set(sections), key=list(SECTION_SOURCES).index)
+    return options
+
+def submit_admin_report(options=None, refresh=False):
+    """Queue (or join) a render of the admin report for the given report_options()"""
+    db_config = {
+        'host': app.config['MYSQL_HOST'],
+        'user': app.config['MYSQL_USER'],
+        'password': app.config['MYSQL_PASSWORD'],
+        'database': app.config['MYSQL_DB'],
+        'port': app.config['MYSQL_PORT'],
+    }
+    options = options or {}
+    report_jobs.purge_expired()
+    return report_jobs.submit('admin_report', options, run_admin_report,
+                              (db_config, app.config['REPORT_FETCH_SIZE'], options), refresh=refresh)
+
+def report_job_json(job):
+    job = dict(job)
+    job['status_url'] = url_for('admin_report_status', job_id=job['id'])
+    if job['status'] == 'done':
+        job['download_url'] = url_for('admin_report_download', job_id=job['id'])
+    return job
+
+def send_report(path):
+    return send_file(
+        path,
+        as_attachment=True,
+        download_name=f'campus_lost_found_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf',
+        mimetype='application/pdf'
+    )
+
+@app.route('/admin/reports', methods=['POST'])
+def admin_report_submit():
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Admin login required'}), 401
+    
+    try:
+        options = report_options(request.form)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        job = submit_admin_report(options, refresh=request.form.get('refresh') == '1')
+    except Exception as e:
+        print(f"Report job submission failed: {e}")
+        return jsonify({'error': f'Could not start report: {e}'}), 500
+    return jsonify(report_job_json(job)), 200 if job['status'] == 'done' else 202
+
+@app.route('/admin/reports/<job_id>')
+def admin_report_status(job_id):
+    if 'admin_id' not in session:
+        return jsonify({'error': 'Admin login required'}), 401
+    
+    job = report_jobs.status(job_id)
+    if job['status'] == 'unknown':
+        return jsonify({'error': 'No such report job'}), 404
+    return jsonify(report_job_json(job))
+
+@app.route('/admin/reports/<job_id>/download')
+def admin_report_download(job_id):
+    if 'admin_id' not in session:
+        return redirect(url_for('admin_login'))
+    
+    path = report_jobs.artifact_path(job_id)
+    if not path:
+        flash('That report is not ready or has expired. Please generate it again.', 'error')
+        return redirect(url_for('admin_dashboard'))
+    return send_report(path)
+
 @app.route('/admin/download_report')
 def download_report():
+    """Serve the cached report if there is one, otherwise start rendering it"""
     if 'admin_id' not in session:
         return redirect(url_for('admin_login'))
     
     try:
-        conn = get_db_connection()
-        if not conn:
-            flash('Database connection failed!', 'error')
-            return redirect(url_for('admin_dashboard'))
-        
-        cursor = conn.cursor(dictionary=True)
-        
-        cursor.execute("SELECT * FROM users")
-        users = cursor.fetchall()
-        users_dict = {user['username']: dict(user) for user in users}
-        
-        cursor.execute("SELECT * FROM found_items")
-        found_items = cursor.fetchall()
-        found_items_dict = {item['id']: dict(item) for item in found_items}
-        
-        cursor.execute("SELECT * FROM lost_items")
-        lost_items = cursor.fetchall()
-        lost_items_dict = {item['id']: dict(item) for item in lost_items}
-        
-        cursor.execute("SELECT * FROM claims")
-        claims = cursor.fetchall()
-        claims_dict = {claim['id']: dict(claim) for claim in claims}
-        
-        cursor.execute("SELECT * FROM administrators")
-        admins = cursor.fetchall()
-        admins_dict = {admin['username']: dict(admin) for admin in admins}
-        
-        cursor.close()
-        conn.close()
-        
-        pdf_buffer = generate_admin_report(
-            users_dict, 
-            found_items_dict, 
-            lost_items_dict, 
-            claims_dict, 
-            admins_dict
-        )
-        
-        return send_file(
-            pdf_buffer,
-            as_attachment=True,
-            download_name=f'campus_lost_found_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf',
-            mimetype='application/pdf'
-        )
+        job = submit_admin_report(report_options(request.args))
+    except ValueError as e:
+        flash(f'Invalid report options: {e}', 'error')
+        return redirect(url_for('admin_dashboard'))
     except Exception as e:
         error_details = traceback.format_exc()
         print(f"PDF Generation Error Details:\n{error_details}")
         flash(f'Error generating report: {str(e)}', 'error')
         return redirect(url_for('admin_dashboard'))
+    
+    if job['status'] == 'done':
+        return send_report(report_jobs.artifact_path(job['id']))
+    if job['status'] == 'failed':
+        flash(f"Error generating report: {job.get('error')}", 'error')
+    else:
+        flash('The report is being generated. Use "Download Full Report" again in a moment.', 'success')
+    return redirect(url_for('admin_dashboard'))
+
+@app.route('/admin/db_pool_stats')
+def db_pool_stats():
+    if 'admin_id' not in session:
+        return redirect(url_for('admin_login'))
+    
+    return jsonify(db_pool.stats())
+
+@app.route('/admin/query_stats')
+def query_stats():
+    """Slowest query shapes over the last QUERY_STATS_WINDOW seconds, and the latest slow requests.
+
+    ?n=20&sort=total|mean|max|count
+    """
+    if 'admin_id' not in session:
+        return redirect(url_for('admin_login'))
+    
+    n = min(max(request.args.get('n', 20, type=int), 1), 200)
+    return jsonify({
+        'window_seconds': query_log.window,
+        'slow_request_ms': app.config['SLOW_REQUEST_MS'],
+        'queries': query_log.slowest(n, request.args.get('sort', 'total')),
+        'slow_requests': list(query_log.slow_requests)[::-1],
+    })
 
 @app.route('/admin/logout')
 def admin_logout():
@@ -1551,6 +2833,18 @@ def admin_logout():
     flash('Admin logged out successfully!', 'success')
     return redirect(url_for('index'))
 
+# ==================== INDEX ADVISOR ====================
+@app.cli.command('advise-indexes', add_help_option=False,
+                 context_settings={'ignore_unknown_options': True, 'allow_extra_args': True})
+@click.pass_context
+def advise_indexes_command(ctx):
+    """EXPLAIN the app's queries and propose indexes (see index_advisor.py; --help for options)."""
+    # A development tool: only running the command imports it, never serving the app
+    from index_advisor import advise_indexes_cli
+    command = advise_indexes_cli(app, db_pool, _connect, url_values={'tab': list(ADMIN_TABS)},
+                                 after_seed=backfill_conversations)
+    ctx.exit(command.main(ctx.args, prog_name=ctx.command_path, standalone_mode=False) or 0)
+
 # ==================== ERROR HANDLERS ====================
 @app.errorhandler(404)
 def page_not_found(e):
@@ -0,0 +1,148 @@
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import bcrypt
+
+CALIBRATION_ROUNDS = 8   # cheap cost timed at startup; each extra round doubles the work
+
+
+class HasherBusy(Exception):
+    """Every hashing slot and queue place is taken; the login should be retried later"""
+
+
+class PasswordHasher:
+    """bcrypt on a small, bounded worker pool.
+
+    bcrypt releases the GIL, so ``max_workers`` caps how many cores hashing
+    can occupy however many requests arrive at once. Up to ``max_queue``
+    more wait for a slot; beyond that HasherBusy is raised straight away
+    instead of piling up requests that would time out anyway.
+    """
+
+    def __init__(self, rounds=None, target_ms=200, min_rounds=10, max_rounds=16,
+                 max_workers=2, max_queue=32, timeout=10):
+        self.rounds = rounds or calibrate_rounds(target_ms, min_rounds, max_rounds)
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bcrypt')
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise HasherBusy()
+
+    def hash(self, password):
+        hashed = self._run(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt(self.rounds))
+        return hashed.decode('utf-8')
+
+    def verify(self, password, hashed):
+        if not hashed:
+            return False
+        return self._run(_checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    def needs_rehash(self, hashed):
+        """True for hashes made with a lower cost than the current one.
+        Never downgrades, so workers that calibrated differently do not flip-flop."""
+        return hash_rounds(hashed) < self.rounds
+
+
+def _checkpw(password, hashed):
+    try:
+        return bcrypt.checkpw(password, hashed)
+    except ValueError:
+        # Not a bcrypt hash (e.g. the placeholder in campus_lost_found.sql)
+        return False
+
+
+def hash_rounds(hashed):
+    """Cost factor of a "$2b$12$..." hash (0 if unreadable)"""
+    try:
+        return int(hashed.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return 0
+
+
+def calibrate_rounds(target_ms, min_rounds=10, max_rounds=16):
+    """Highest bcrypt cost whose hash takes at most ``target_ms`` on this machine"""
+    elapsed_ms = min(_time_hash(CALIBRATION_ROUNDS) for _ in range(2))
+    extra = math.floor(math.log2(target_ms / elapsed_ms)) if elapsed_ms > 0 else max_rounds
+    return max(min_rounds, min(max_rounds, CALIBRATION_ROUNDS + extra))
+
+
+def _time_hash(rounds):
+    start = time.perf_counter()
+    bcrypt.hashpw(b'calibration', bcrypt.gensalt(rounds))
+    return (time.perf_counter() - start) * 1000
+
+
+class LoginThrottle:
+    """Failed logins per account and per client address over a sliding window.
+
+    Checked before any password is hashed, so a credential-stuffing burst is
+    turned away for the price of a dict lookup. ``limits`` maps a key kind
+    to the failures it may have within ``window`` seconds.
+    """
+
+    def __init__(self, limits, window=300, max_keys=100000):
+        self.limits = limits
+        self.window = window
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._failures = {}   # (kind, value) -> deque of failure times, oldest first
+
+    def _recent(self, key, now):
+        times = self._failures.get(key)
+        if times is None:
+            return None
+        while times and times[0] <= now - self.window:
+            times.popleft()
+        if not times:
+            del self._failures[key]
+            return None
+        return times
+
+    def retry_after(self, **keys):
+        """Seconds until another attempt is allowed for every key (0: go ahead),
+        e.g. retry_after(account='user:bob', ip='10.0.0.7')"""
+        now = time.monotonic()
+        wait = 0
+        with self._lock:
+            for kind, value in keys.items():
+                times = self._recent((kind, value), now)
+                if times and len(times) >= self.limits[kind]:
+                    # Allowed again once enough failures have aged out of the window
+                    wait = max(wait, times[-self.limits[kind]] + self.window - now)
+        return math.ceil(wait)
+
+    def record_failure(self, **keys):
+        now = time.monotonic()
+        with self._lock:
+            for kind, value in keys.items():
+                times = self._failures.setdefault((kind, value), deque(maxlen=self.limits[kind]))
+                times.append(now)
+            if len(self._failures) > self.max_keys:
+                self._prune(now)
+
+    def reset(self, **keys):
+        with self._lock:
+            for kind, value in keys.items():
+                self._failures.pop((kind, value), None)
+
+    def _prune(self, now):
+        for key in list(self._failures):
+            self._recent(key, now)
+        # Still too many live keys: forget the ones that started failing first
+        for key in list(self._failures)[:max(len(self._failures) - self.max_keys, 0)]:
+            del self._failures[key]
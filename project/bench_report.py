@@ -0,0 +1,105 @@
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from datetime import datetime, timedelta
+
+from pdf_report import generate_admin_report
+
+DEFAULT_SIZES = (10000, 100000, 1000000)
+LOCATIONS = ['Library', 'Cafeteria', 'Gym', 'Lecture Hall B', 'Parking Lot', 'Hostel Block C']
+DEVICES = ['iPhone 13', 'Water bottle', 'Student ID card', 'Black umbrella', 'Laptop charger', 'Keys']
+STATUSES = ['active', 'active', 'active', 'claimed']
+
+
+def synthetic_data(rows):
+    """The five dicts generate_admin_report takes, ``rows`` rows split evenly across the data sections"""
+    per_section = max(1, rows // 4)
+    start = datetime(2024, 1, 1)
+    users = {
+        f'user{n}': {'email': f'user{n}@campus.edu', 'user_type': 'student', 'department': 'computer_science',
+                     'created_at': start + timedelta(minutes=n), 'is_active': n % 10 != 0}
+        for n in range(per_section)
+    }
+    found = {
+        n: {'device_name': DEVICES[n % len(DEVICES)], 'posted_by': f'user{n % per_section}',
+            'location': LOCATIONS[n % len(LOCATIONS)], 'status': STATUSES[n % len(STATUSES)],
+            'posted_date': start + timedelta(minutes=n)}
+        for n in range(1, per_section + 1)
+    }
+    lost = {
+        n: {'device_name': DEVICES[n % len(DEVICES)], 'posted_by': f'user{n % per_section}',
+            'location': LOCATIONS[n % len(LOCATIONS)], 'status': 'active',
+            'lost_date': start + timedelta(minutes=n)}
+        for n in range(1, per_section + 1)
+    }
+    claims = {
+        n: {'found_item_id': n, 'claimant_username': f'user{(n + 1) % per_section}',
+            'owner_username': f'user{n % per_section}', 'status': 'pending',
+            'claim_date': start + timedelta(minutes=n)}
+        for n in range(1, per_section + 1)
+    }
+    admins = {'admin': {'created_by': 'system', 'created_at': start}}
+    return users, found, lost, claims, admins
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run(rows):
+    """Time one report of ``rows`` synthetic rows and return its measurements.
+
+    Call it in a fresh process: peak RSS never goes down, so a second run in
+    the same process would report the larger of the two.
+    """
+    started = time.perf_counter()
+    data = synthetic_data(rows)
+    input_seconds = time.perf_counter() - started
+    input_rss = peak_rss_mb()
+
+    started = time.perf_counter()
+    output = generate_admin_report(*data)
+    render_seconds = time.perf_counter() - started
+
+    output.seek(0, os.SEEK_END)
+    return {
+        'rows': rows,
+        'input_seconds': round(input_seconds, 2),
+        'render_seconds': round(render_seconds, 2),
+        'input_rss_mb': round(input_rss, 1),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'pdf_mb': round(output.tell() / (1024 * 1024), 1),
+    }
+
+
+def run_isolated(rows):
+    """run() in a freshly spawned interpreter, so its peak RSS is its own"""
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        return pool.apply(run, (rows,))
+
+
+def main(argv):
+    """Usage: python bench_report.py [--json results.jsonl] [rows ...]"""
+    json_path = None
+    if argv[:1] == ['--json']:
+        json_path, argv = argv[1], argv[2:]
+    sizes = [int(arg) for arg in argv] or DEFAULT_SIZES
+
+    print(f"{'rows':>9}  {'render s':>9}  {'input RSS MB':>12}  {'peak RSS MB':>11}  {'PDF MB':>7}")
+    for rows in sizes:
+        result = run_isolated(rows)
+        result['recorded_at'] = datetime.now().isoformat(timespec='seconds')
+        print(f"{result['rows']:>9}  {result['render_seconds']:>9}  {result['input_rss_mb']:>12}  "
+              f"{result['peak_rss_mb']:>11}  {result['pdf_mb']:>7}", flush=True)
+        if json_path:
+            with open(json_path, 'a') as f:
+                f.write(json.dumps(result) + '\n')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,260 @@
+import hashlib
+import os
+import re
+import time
+import uuid
+
+CHUNK_SIZE = 64 * 1024
+
+# "ab/cd/<sha256>.jpg": two levels of 256-way sharding keep directories small
+BLOB_KEY_RE = re.compile(r'^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.[a-z0-9]+$')
+# Blobs and anything derived from one (e.g. variants/ab/cd/<sha256>.320.webp) never change
+CONTENT_PATH_RE = re.compile(r'^([a-z]+/)?[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.[a-z0-9.]+$')
+
+EXTENSION_ALIASES = {'jpeg': 'jpg'}
+
+
+def is_blob_key(name):
+    return bool(name) and bool(BLOB_KEY_RE.match(name))
+
+
+def is_content_addressed(path):
+    return bool(CONTENT_PATH_RE.match(path))
+
+
+class UploadRejected(Exception):
+    """An upload refused while it was still streaming in"""
+
+
+class BlobWriter:
+    """Receiving end of one uploaded file.
+
+    The multipart parser writes each chunk here as it arrives; it is hashed
+    and size-checked on the way to a temp file, and the leading bytes are
+    handed to ``sniff(head)``, which returns the extension to store the file
+    under or None to refuse it. Refusing raises UploadRejected, which stops
+    the parser before it reads the rest of the body.
+    """
+
+    HEAD_SIZE = 16
+
+    def __init__(self, tmp_path, max_size, sniff):
+        self.tmp_path = tmp_path
+        self.max_size = max_size
+        self.sniff = sniff
+        self.size = 0
+        self.ext = None
+        self._head = b''
+        self._digest = hashlib.sha256()
+        self._file = open(tmp_path, 'w+b')
+        self._staged = False
+        self._started = self._last_write = time.monotonic()
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_size:
+            self.close()
+            raise UploadRejected(f"Images can be at most {self.max_size // (1024 * 1024)} MB.")
+        if self.ext is None:
+            self._head += data[:self.HEAD_SIZE - len(self._head)]
+            if len(self._head) >= self.HEAD_SIZE:
+                self._check_type()
+        self._digest.update(data)
+        self._file.write(data)
+        self._last_write = time.monotonic()
+        return len(data)
+
+    def _check_type(self):
+        self.ext = self.sniff(self._head)
+        if self.ext is None:
+            self.close()
+            raise UploadRejected("Only PNG, JPEG and GIF images can be uploaded.")
+
+    def seek(self, offset, whence=0):
+        # The parser rewinds once the part is complete
+        if self.ext is None:
+            self._check_type()
+        return self._file.seek(offset, whence)
+
+    def read(self, size=-1):
+        return self._file.read(size)
+
+    def tell(self):
+        return self._file.tell()
+
+    def flush(self):
+        self._file.flush()
+
+    def staged(self):
+        """Hand the finished file over as a StagedBlob"""
+        if self.ext is None:
+            self._check_type()
+        self._file.close()
+        self._staged = True
+        h = self._digest.hexdigest()
+        return StagedBlob(f"{h[:2]}/{h[2:4]}/{h}.{self.ext}", self.tmp_path, self.size,
+                          self._last_write - self._started)
+
+    def close(self):
+        """Called when the request ends; drops the temp file unless it was staged"""
+        self._file.close()
+        if not self._staged:
+            try:
+                os.remove(self.tmp_path)
+            except FileNotFoundError:
+                pass
+
+
+class StagedBlob:
+    """An upload hashed into the store's tmp folder, not yet referenced.
+    ``seconds`` is how long receiving and hashing it took."""
+
+    def __init__(self, key, tmp_path, size, seconds=0.0):
+        self.key = key
+        self.tmp_path = tmp_path
+        self.size = size
+        self.seconds = seconds
+
+    def discard(self):
+        try:
+            os.remove(self.tmp_path)
+        except FileNotFoundError:
+            pass
+
+
+class BlobStore:
+    """Content-addressed file store with reference counts in ``blob_refs``.
+
+    Writers stage a file (hashing it as it is written), then call add_ref()
+    inside the transaction that stores the key. A blob whose count drops to
+    zero is removed by collect(), which holds the row lock while deleting so
+    a concurrent upload of the same content waits and then re-creates it.
+    """
+
+    def __init__(self, root, orphan_grace=3600):
+        self.root = root
+        self.tmp_dir = os.path.join(root, 'tmp')
+        self.orphan_grace = orphan_grace   # seconds before an unreferenced file counts as garbage
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def open_writer(self, max_size, sniff):
+        """A BlobWriter for streaming one upload into tmp"""
+        return BlobWriter(os.path.join(self.tmp_dir, uuid.uuid4().hex), max_size, sniff)
+
+    def stage(self, stream, filename):
+        """Copy ``stream`` into tmp while hashing it; returns a StagedBlob.
+        Uploads that already streamed through a BlobWriter are not copied again."""
+        if isinstance(stream, BlobWriter):
+            return stream.staged()
+        ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else 'bin'
+        ext = EXTENSION_ALIASES.get(ext, ext)
+        tmp_path = os.path.join(self.tmp_dir, uuid.uuid4().hex)
+        digest = hashlib.sha256()
+        size = 0
+        started = time.monotonic()
+        try:
+            with open(tmp_path, 'wb') as out:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        h = digest.hexdigest()
+        return StagedBlob(f"{h[:2]}/{h[2:4]}/{h}.{ext}", tmp_path, size, time.monotonic() - started)
+
+    # ==================== REFERENCES ====================
+    def add_ref(self, cursor, staged):
+        """Count one more reference to a staged blob and move it into place"""
+        # The row lock taken here is held until commit, so collect() cannot
+        # delete this blob between the check below and our commit
+        cursor.execute('''
+            INSERT INTO blob_refs (blob_key, refcount, size) VALUES (%s, 1, %s)
+            ON DUPLICATE KEY UPDATE refcount = refcount + 1
+        ''', (staged.key, staged.size))
+        path = self.path(staged.key)
+        if os.path.exists(path):
+            staged.discard()   # already stored: this upload was a duplicate
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(staged.tmp_path, path)
+        return staged.key
+
+    def drop_ref(self, cursor, key):
+        """Count one reference fewer; the file goes at the next collect()"""
+        if is_blob_key(key):
+            cursor.execute("UPDATE blob_refs SET refcount = refcount - 1 WHERE blob_key = %s AND refcount > 0",
+                           (key,))
+
+    def collect(self, conn, on_delete=None):
+        """Delete blobs nobody references any more; returns their keys.
+
+        ``on_delete(key)`` runs under the same lock, for derived files.
+        """
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT blob_key FROM blob_refs WHERE refcount = 0 FOR UPDATE")
+            keys = [row[0] for row in cursor.fetchall()]
+            for key in keys:
+                try:
+                    os.remove(self.path(key))
+                except FileNotFoundError:
+                    pass
+                if on_delete:
+                    on_delete(key)
+            if keys:
+                cursor.execute(f"DELETE FROM blob_refs WHERE refcount = 0 AND blob_key IN "
+                               f"({', '.join(['%s'] * len(keys))})", tuple(keys))
+            conn.commit()
+            return keys
+        finally:
+            cursor.close()
+
+    def sweep(self, conn):
+        """Remove stale tmp files and stored files with no blob_refs row.
+
+        Those are left behind by requests that failed before committing.
+        Returns (tmp files removed, orphaned blobs removed).
+        """
+        cutoff = time.time() - self.orphan_grace
+        stale_tmp = 0
+        for name in os.listdir(self.tmp_dir):
+            path = os.path.join(self.tmp_dir, name)
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                stale_tmp += 1
+
+        candidates = []
+        for dirpath, _, filenames in os.walk(self.root):
+            rel = os.path.relpath(dirpath, self.root).replace(os.sep, '/')
+            for name in filenames:
+                key = f"{rel}/{name}"
+                if is_blob_key(key) and os.path.getmtime(os.path.join(dirpath, name)) < cutoff:
+                    candidates.append(key)
+
+        orphans = 0
+        cursor = conn.cursor()
+        try:
+            for start in range(0, len(candidates), 500):
+                batch = candidates[start:start + 500]
+                cursor.execute(f"SELECT blob_key FROM blob_refs WHERE blob_key IN "
+                               f"({', '.join(['%s'] * len(batch))}) LOCK IN SHARE MODE", tuple(batch))
+                known = {row[0] for row in cursor.fetchall()}
+                for key in batch:
+                    if key not in known:
+                        try:
+                            os.remove(self.path(key))
+                            orphans += 1
+                        except FileNotFoundError:
+                            pass
+                conn.commit()
+        finally:
+            cursor.close()
+        return stale_tmp, orphans
@@ -1,4 +1,6 @@
--- Create the database
+-- The schema that migrations.py builds (migrations 1-3), for creating the
+-- database by hand. Afterwards run `flask db-upgrade` for the remaining
+-- migrations (default admin account, statistics counters, conversation summaries).
 CREATE DATABASE IF NOT EXISTS campus_lost_found;
 USE campus_lost_found;
 
@@ -21,9 +23,10 @@ CREATE TABLE users (
     items_lost INT DEFAULT 0,
     claims_made INT DEFAULT 0,
     claims_received INT DEFAULT 0,
+    unread_messages INT DEFAULT 0,
     is_active BOOLEAN DEFAULT TRUE,
-    INDEX idx_username (username),
-    INDEX idx_email (email)
+    INDEX idx_email (email),
+    INDEX idx_created (created_at)
 );
 
 -- Administrators table
@@ -43,12 +46,15 @@ CREATE TABLE found_items (
     color VARCHAR(50),
     location VARCHAR(200) NOT NULL,
     image_filename VARCHAR(255),
+    image_hash BIGINT UNSIGNED NULL,
     posted_by VARCHAR(50) NOT NULL,
     posted_date DATETIME DEFAULT CURRENT_TIMESTAMP,
     status VARCHAR(20) DEFAULT 'active',
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (posted_by) REFERENCES users(username) ON DELETE CASCADE,
-    INDEX idx_status (status),
-    INDEX idx_posted_by (posted_by)
+    INDEX idx_posted_by (posted_by),
+    INDEX idx_status_posted (status, posted_date),
+    INDEX idx_posted (posted_date)
 );
 
 -- Lost items table
@@ -60,12 +66,15 @@ CREATE TABLE lost_items (
     location VARCHAR(200) NOT NULL,
     lost_date DATE,
     image_filename VARCHAR(255),
+    image_hash BIGINT UNSIGNED NULL,
     posted_by VARCHAR(50) NOT NULL,
     posted_date DATETIME DEFAULT CURRENT_TIMESTAMP,
     status VARCHAR(20) DEFAULT 'active',
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (posted_by) REFERENCES users(username) ON DELETE CASCADE,
-    INDEX idx_status (status),
-    INDEX idx_posted_by (posted_by)
+    INDEX idx_posted_by (posted_by),
+    INDEX idx_status_posted (status, posted_date),
+    INDEX idx_posted (posted_date)
 );
 
 -- Claims table
@@ -82,15 +91,20 @@ CREATE TABLE claims (
     status VARCHAR(20) DEFAULT 'pending',
     claim_date DATETIME DEFAULT CURRENT_TIMESTAMP,
     admin_notified BOOLEAN DEFAULT FALSE,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    decided_at DATETIME NULL,
     FOREIGN KEY (found_item_id) REFERENCES found_items(id) ON DELETE CASCADE,
     FOREIGN KEY (claimant_username) REFERENCES users(username) ON DELETE CASCADE,
     FOREIGN KEY (owner_username) REFERENCES users(username) ON DELETE CASCADE,
     INDEX idx_status (status),
     INDEX idx_claimant (claimant_username),
-    INDEX idx_owner (owner_username)
+    INDEX idx_owner (owner_username),
+    INDEX idx_found_item (found_item_id, claim_date),
+    INDEX idx_claim_date (claim_date),
+    INDEX idx_decided (decided_at, id)
 );
 
--- Messages table
+-- Messages table (no foreign keys: system notices come from 'System', which is not a user)
 CREATE TABLE messages (
     id INT AUTO_INCREMENT PRIMARY KEY,
     sender VARCHAR(50) NOT NULL,
@@ -103,14 +117,72 @@ CREATE TABLE messages (
     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
     is_read BOOLEAN DEFAULT FALSE,
     from_admin BOOLEAN DEFAULT FALSE,
-    FOREIGN KEY (sender) REFERENCES users(username) ON DELETE CASCADE,
-    FOREIGN KEY (recipient) REFERENCES users(username) ON DELETE CASCADE,
-    INDEX idx_sender (sender),
-    INDEX idx_recipient (recipient),
-    INDEX idx_timestamp (timestamp)
+    INDEX idx_timestamp (timestamp),
+    INDEX idx_pair (sender, recipient, id),
+    INDEX idx_recipient_unread (recipient, is_read)
+);
+
+-- Conversations table (one row per pair of users; user_a sorts before user_b)
+CREATE TABLE conversations (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_a VARCHAR(50) NOT NULL,
+    user_b VARCHAR(50) NOT NULL,
+    last_message_id INT,
+    last_timestamp DATETIME,
+    last_preview VARCHAR(200),
+    unread_a INT DEFAULT 0,
+    unread_b INT DEFAULT 0,
+    UNIQUE KEY uq_pair (user_a, user_b),
+    INDEX idx_a_time (user_a, last_timestamp),
+    INDEX idx_b_time (user_b, last_timestamp)
 );
 
--- Insert default admin account (password: admin@123)
-INSERT INTO administrators (username, password_hash, created_by) 
-VALUES ('admin', '$2b$12$YourHashedPasswordHere', 'system');
--- Note: You need to hash the password with bcrypt in Python first
\ No newline at end of file
+-- Statistics counters (filled from the tables above on the app's first start)
+CREATE TABLE stat_counters (
+    name VARCHAR(64) PRIMARY KEY,
+    value BIGINT NOT NULL DEFAULT 0
+);
+
+-- Reference counts for the content-addressed upload store (files under media/)
+CREATE TABLE blob_refs (
+    blob_key VARCHAR(100) PRIMARY KEY,
+    refcount INT NOT NULL DEFAULT 0,
+    size BIGINT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_refcount (refcount)
+);
+
+-- Hourly and daily analytics buckets (filled incrementally by `flask rollup`)
+CREATE TABLE metric_rollups (
+    granularity ENUM('hour', 'day') NOT NULL,
+    bucket_start DATETIME NOT NULL,
+    metric VARCHAR(32) NOT NULL,
+    dimension VARCHAR(100) NOT NULL DEFAULT '',
+    value INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (granularity, bucket_start, metric, dimension)
+);
+
+-- How far each rollup source has been processed
+CREATE TABLE rollup_watermarks (
+    source VARCHAR(32) PRIMARY KEY,
+    last_id BIGINT NOT NULL DEFAULT 0,
+    last_time DATETIME NULL
+);
+
+-- Versions behind the item/claim page ETags ("found_items", "claims:42", ...)
+CREATE TABLE resource_versions (
+    name VARCHAR(64) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- Applied migrations (see migrations.py)
+CREATE TABLE schema_version (
+    version INT PRIMARY KEY,
+    description VARCHAR(200),
+    applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+INSERT INTO schema_version (version, description) VALUES
+    (1, 'Create tables'),
+    (2, 'Columns and indexes added before versioned migrations'),
+    (3, 'Indexes and foreign keys from campus_lost_found.sql');
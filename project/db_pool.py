@@ -0,0 +1,211 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolExhaustedError(Exception):
+    """Raised when no connection becomes available within the acquire timeout"""
+
+
+class PooledConnection:
+    """Wrapper around a pooled MySQL connection.
+
+    Behaves like the underlying connection, except that close() hands the
+    connection back to the pool instead of tearing down the socket.
+    """
+
+    def __init__(self, pool, conn, created_at):
+        self._pool = pool
+        self._conn = conn
+        self._created_at = created_at
+        self._commit_hooks = []
+
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise AttributeError(f"connection already returned to pool ({name})")
+        return getattr(self._conn, name)
+
+    def __bool__(self):
+        return self._conn is not None
+
+    @property
+    def raw(self):
+        return self._conn
+
+    def add_commit_hook(self, callback):
+        """Call ``callback()`` after every successful commit while borrowed"""
+        self._commit_hooks.append(callback)
+
+    def commit(self):
+        if self._conn is None:
+            raise AttributeError("connection already returned to pool (commit)")
+        self._conn.commit()
+        for callback in self._commit_hooks:
+            callback()
+
+    def close(self):
+        """Return the connection to the pool (safe to call more than once)"""
+        if self._conn is not None:
+            self._commit_hooks = []
+            conn, self._conn = self._conn, None
+            self._pool._release(conn, self._created_at)
+
+
+class ConnectionPool:
+    """Thread-safe, bounded pool of database connections.
+
+    connect        -- zero-argument callable returning a new DB-API connection
+    max_size       -- hard cap on open connections (idle + in use)
+    acquire_timeout-- seconds to wait for a free connection before giving up
+    recycle        -- connections older than this many seconds are replaced
+    ping_interval  -- idle connections unused for this long are pinged first
+    on_acquire     -- optional callable given the seconds each successful acquire waited
+    """
+
+    def __init__(self, connect, max_size=10, acquire_timeout=5.0, recycle=1800, ping_interval=30,
+                 on_acquire=None):
+        self._connect = connect
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.recycle = recycle
+        self.ping_interval = ping_interval
+        self.on_acquire = on_acquire
+
+        self._lock = threading.Condition()
+        self._idle = deque()  # (conn, created_at, last_used)
+        self._size = 0
+
+        # Metrics
+        self._acquires = 0
+        self._exhausted = 0
+        self._created = 0
+        self._discarded = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    # ==================== ACQUIRE / RELEASE ====================
+    def acquire(self, timeout=None):
+        """Borrow a connection, waiting up to ``timeout`` seconds for one to free up"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+
+        while True:
+            entry = None
+            with self._lock:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._exhausted += 1
+                        raise PoolExhaustedError(
+                            f"no database connection available after {timeout:.1f}s "
+                            f"(pool size {self.max_size})"
+                        )
+                    self._lock.wait(remaining)
+
+                if self._idle:
+                    entry = self._idle.pop()
+                else:
+                    # Reserve a slot before connecting outside the lock
+                    self._size += 1
+
+            if entry is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    self._drop_slot()
+                    raise
+                created_at = time.monotonic()
+                with self._lock:
+                    self._created += 1
+                return self._checkout(conn, created_at, start)
+
+            conn, created_at, last_used = entry
+            if self._is_usable(conn, created_at, last_used):
+                return self._checkout(conn, created_at, start)
+
+            # Stale or broken: throw it away and try again
+            self._discard(conn)
+
+    def _checkout(self, conn, created_at, start):
+        waited = time.monotonic() - start
+        with self._lock:
+            self._acquires += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        if self.on_acquire:
+            self.on_acquire(waited)
+        return PooledConnection(self, conn, created_at)
+
+    def _is_usable(self, conn, created_at, last_used):
+        now = time.monotonic()
+        if self.recycle and now - created_at > self.recycle:
+            return False
+        if now - last_used > self.ping_interval:
+            try:
+                conn.ping(reconnect=False)
+            except Exception:
+                return False
+        return True
+
+    def _release(self, conn, created_at):
+        # Anything the handler did not commit must not leak into the next borrower
+        try:
+            conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+
+        with self._lock:
+            self._idle.append((conn, created_at, time.monotonic()))
+            self._lock.notify()
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._discarded += 1
+        self._drop_slot()
+
+    def _drop_slot(self):
+        with self._lock:
+            self._size -= 1
+            self._lock.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Context manager that always returns the connection, even on error"""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def close_all(self):
+        """Close every idle connection (in-use connections are closed on return)"""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn, _, _ in idle:
+            self._discard(conn)
+
+    # ==================== METRICS ====================
+    def stats(self):
+        """Snapshot of pool usage counters"""
+        with self._lock:
+            idle = len(self._idle)
+            return {
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': idle,
+                'in_use': self._size - idle,
+                'acquires': self._acquires,
+                'exhausted': self._exhausted,
+                'created': self._created,
+                'discarded': self._discarded,
+                'acquire_wait_total_ms': round(self._wait_total * 1000, 3),
+                'acquire_wait_avg_ms': round(self._wait_total * 1000 / self._acquires, 3) if self._acquires else 0.0,
+                'acquire_wait_max_ms': round(self._wait_max * 1000, 3),
+            }
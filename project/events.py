@@ -0,0 +1,101 @@
+import itertools
+import json
+import threading
+import time
+from collections import defaultdict, deque
+
+
+class Subscription:
+    """One connected client's event queue.
+
+    Bounded: if a client stops reading, its oldest events are dropped rather
+    than letting the queue grow without limit.
+    """
+
+    def __init__(self, broker, username, max_pending):
+        self.broker = broker
+        self.username = username
+        self._pending = deque(maxlen=max_pending)
+        self._ready = threading.Condition(threading.Lock())
+        self.closed = False
+
+    def put(self, event):
+        with self._ready:
+            self._pending.append(event)
+            self._ready.notify()
+
+    def get(self, timeout):
+        """Wait up to ``timeout`` seconds and return all queued events (possibly none)"""
+        with self._ready:
+            if not self._pending and not self.closed:
+                self._ready.wait(timeout)
+            events = list(self._pending)
+            self._pending.clear()
+            return events
+
+    def close(self):
+        with self._ready:
+            self.closed = True
+            self._ready.notify()
+        self.broker.unsubscribe(self)
+
+
+class EventBroker:
+    """In-process publish/subscribe hub keyed by username.
+
+    Only clients connected to this worker process see events published in
+    it. Idle subscribers cost a queue and a blocked waiter thread each.
+    """
+
+    def __init__(self, max_pending=100, replay=50):
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+        self._recent = defaultdict(lambda: deque(maxlen=replay))  # for Last-Event-ID resumes
+        self._ids = itertools.count(1)
+        self._published = 0
+
+    def subscribe(self, username, last_event_id=None):
+        """Register a client; events newer than ``last_event_id`` are replayed first"""
+        sub = Subscription(self, username, self.max_pending)
+        with self._lock:
+            self._subscribers[username].add(sub)
+            if last_event_id is not None:
+                for event in self._recent.get(username, ()):
+                    if event[0] > last_event_id:
+                        sub.put(event)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subscribers.get(sub.username)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.username]
+
+    def publish(self, username, event_type, data):
+        """Send an event to every connection of ``username``"""
+        event = (next(self._ids), event_type, data, time.time())
+        with self._lock:
+            self._published += 1
+            if username in self._subscribers or username in self._recent:
+                self._recent[username].append(event)
+            subs = list(self._subscribers.get(username, ()))
+        for sub in subs:
+            sub.put(event)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'users': len(self._subscribers),
+                'connections': sum(len(subs) for subs in self._subscribers.values()),
+                'published': self._published,
+            }
+
+
+def format_sse(event):
+    """Encode an (id, type, data, time) event in text/event-stream format"""
+    event_id, event_type, data, _ = event
+    payload = json.dumps(data, default=str)
+    return f"id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n"
@@ -0,0 +1,196 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image, ImageOps
+
+# Widths generated for every upload; never upscaled past the original
+VARIANT_WIDTHS = {'thumb': 320, 'medium': 960}
+
+# Encoder settings per output format. Nothing is copied from the source
+# file (EXIF, GPS, ICC, XMP), so variants carry no camera metadata.
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+VARIANT_DIR = 'variants'     # subfolder of the blob store
+
+# Leading bytes of each accepted upload type, and the extension it is stored under
+IMAGE_SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+]
+
+
+def sniff_image_type(head):
+    """Extension for an image identified by its magic bytes, or None"""
+    for signature, ext in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return ext
+    return None
+
+
+def variant_filename(filename, width, fmt):
+    stem = os.path.splitext(filename)[0]
+    return f"{stem}.{width}.{'jpg' if fmt == 'jpeg' else fmt}"
+
+
+def _open_upright(path, max_width):
+    image = Image.open(path)
+    if image.format == 'JPEG':
+        # Let libjpeg decode at 1/2, 1/4 or 1/8 scale when that is still
+        # big enough; much faster and lighter than decoding a 12 MP photo
+        image.draft('RGB', (max_width * 2, max_width * 8))
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        # JPEG has no alpha: flatten transparent PNGs/GIFs onto white
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+# ==================== PERCEPTUAL HASH ====================
+# 64-bit pHash: the signs of the lowest 8x8 DCT coefficients of a 32x32
+# grayscale thumbnail, relative to their median. Re-encoding, resizing and
+# small crops or colour shifts move only a few bits.
+PHASH_SIZE = 32
+
+
+def _dct_matrix(n):
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.sqrt(2 / n) * np.cos(np.pi * (2 * i + 1) * k / (2 * n))
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+_DCT = _dct_matrix(PHASH_SIZE)
+
+
+def perceptual_hash(image):
+    pixels = np.asarray(image.convert('L').resize((PHASH_SIZE, PHASH_SIZE), Image.LANCZOS), dtype=np.float64)
+    low = (_DCT @ pixels @ _DCT.T)[:8, :8].flatten()
+    # The DC term is just overall brightness; leave it out of the median
+    bits = low > np.median(low[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def image_phash(path):
+    """pHash of an image file, or None if it cannot be read"""
+    try:
+        image = Image.open(path)
+        if image.format == 'JPEG':
+            image.draft('L', (PHASH_SIZE * 2, PHASH_SIZE * 2))
+        return perceptual_hash(ImageOps.exif_transpose(image))
+    except (OSError, Image.DecompressionBombError):
+        return None
+
+
+def variant_filenames(filename):
+    return [variant_filename(filename, width, fmt) for width in VARIANT_WIDTHS.values() for fmt in FORMATS]
+
+
+def render_variants(source_path, directory, filename):
+    """Write every width/format variant of one image; returns their filenames"""
+    widths = sorted(VARIANT_WIDTHS.values(), reverse=True)
+    image = _open_upright(source_path, widths[0])
+    target_dir = os.path.dirname(os.path.join(directory, filename))
+    os.makedirs(target_dir, exist_ok=True)
+    written = []
+    for width in widths:
+        # Each size is scaled down from the previous, larger one
+        if image.width > width:
+            image = image.resize((width, max(round(image.height * width / image.width), 1)),
+                                 Image.LANCZOS, reducing_gap=3.0)
+        for fmt, (pil_format, options) in FORMATS.items():
+            name = variant_filename(filename, width, fmt)
+            tmp_path = os.path.join(target_dir, f".{os.path.basename(name)}.tmp")
+            image.save(tmp_path, pil_format, **options)
+            os.replace(tmp_path, os.path.join(directory, name))
+            written.append(name)
+    return written
+
+
+class ImagePipeline:
+    """Generates resized variants of uploads on a small worker pool.
+
+    Pillow releases the GIL while decoding, resizing and encoding, so
+    threads are enough. Until an upload's variants exist, pages fall back
+    to the original file. ``locate(filename)`` gives an upload's path on disk;
+    ``on_ready(filename, resources)`` is called once its variants exist.
+    """
+
+    def __init__(self, directory, locate, max_workers=2, on_ready=None):
+        self.directory = directory
+        self.locate = locate
+        self.max_workers = max_workers
+        self.on_ready = on_ready
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pending = {}    # filename -> Future
+        self._waiting = {}    # filename -> resources passed to on_ready when it is done
+        self._ready = set()   # filenames known to have all variants
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='images')
+        return self._executor
+
+    def submit(self, filename, resources=()):
+        """Queue variant generation for a saved upload (no-op if already queued).
+
+        ``resources`` name the pages showing the upload; they are handed to
+        on_ready so pages rendered with the original can be refreshed.
+        """
+        with self._lock:
+            self._waiting.setdefault(filename, set()).update(resources)
+            future = self._pending.get(filename)
+            if future is None:
+                future = self._pool().submit(self._render, filename)
+                self._pending[filename] = future
+            return future
+
+    def _render(self, filename):
+        ready = False
+        try:
+            render_variants(self.locate(filename), self.directory, filename)
+            with self._lock:
+                self._ready.add(filename)
+            ready = True
+        except (OSError, Image.DecompressionBombError) as e:
+            # Not an image Pillow can read: pages keep showing the original
+            print(f"Error creating image variants for {filename}: {e}")
+        finally:
+            with self._lock:
+                self._pending.pop(filename, None)
+                resources = self._waiting.pop(filename, set())
+        if ready and resources and self.on_ready:
+            self.on_ready(filename, resources)
+
+    def is_ready(self, filename):
+        if filename in self._ready:
+            return True
+        # The smallest JPEG is written last
+        last = variant_filename(filename, min(VARIANT_WIDTHS.values()), 'jpeg')
+        if os.path.exists(os.path.join(self.directory, last)):
+            with self._lock:
+                self._ready.add(filename)
+            return True
+        return False
+
+    def remove(self, filename):
+        """Delete an upload's variants"""
+        with self._lock:
+            self._ready.discard(filename)
+        for name in variant_filenames(filename):
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,535 @@
+import json
+import os
+import random
+import re
+import threading
+from datetime import datetime, timedelta
+
+import click
+import mysql.connector
+from flask import url_for
+
+from migrations import current_version, upgrade
+from querylog import normalize_sql
+
+FULL_SCAN_MIN_ROWS = 1000   # scans of smaller tables are what the optimizer should do anyway
+MAX_INDEX_COLUMNS = 4
+
+# Statements EXPLAIN understands and that touch application tables
+EXPLAINABLE_RE = re.compile(r'^\s*(SELECT|UPDATE|DELETE)\b', re.I)
+SKIP_RE = re.compile(r'information_schema|GET_LOCK|RELEASE_LOCK', re.I)
+
+
+# ==================== CAPTURE ====================
+class QueryRecorder:
+    """Collects every statement run on the connections it wraps, one per normalize_sql() shape.
+
+    ``source`` names whatever is being exercised (a route, a CLI job) and
+    is stored with each query shape, along with one example of its params.
+    """
+
+    def __init__(self):
+        self.active = False
+        self.source = None
+        self.queries = {}    # fingerprint -> {'sql', 'params', 'sources'}
+        self._lock = threading.Lock()
+
+    def wrap(self, connect):
+        def recording_connect():
+            return RecordingConnection(connect(), self)
+        return recording_connect
+
+    def record(self, sql, params):
+        if not self.active or not EXPLAINABLE_RE.match(sql) or SKIP_RE.search(sql):
+            return
+        key = normalize_sql(sql)
+        with self._lock:
+            entry = self.queries.setdefault(key, {'sql': sql, 'params': params, 'sources': set()})
+            entry['sources'].add(self.source or 'unknown')
+
+
+class RecordingConnection:
+    def __init__(self, conn, recorder):
+        self._conn = conn
+        self._recorder = recorder
+
+    def cursor(self, *args, **kwargs):
+        return RecordingCursor(self._conn.cursor(*args, **kwargs), self._recorder)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class RecordingCursor:
+    def __init__(self, cursor, recorder):
+        self._cursor = cursor
+        self._recorder = recorder
+
+    def execute(self, operation, params=()):
+        self._recorder.record(operation, tuple(params or ()))
+        return self._cursor.execute(operation, params)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+# ==================== SEEDING ====================
+DEVICES = ['iPhone 13', 'Samsung Galaxy', 'MacBook Air', 'AirPods', 'Water Bottle', 'Student ID card',
+           'Car keys', 'Backpack', 'Calculator', 'Umbrella', 'Wallet', 'Headphones', 'Laptop charger', 'Watch']
+COLORS = ['Black', 'White', 'Blue', 'Red', 'Green', 'Silver', 'Grey', 'Brown', 'Pink', 'Yellow']
+LOCATIONS = ['Main Library', 'Cafeteria', 'Gym', 'Lecture Hall A', 'Lecture Hall B', 'Parking Lot',
+             'Science Block', 'Student Center', 'Bus Stop', 'Dormitory 1', 'Dormitory 2', 'Lab 3']
+
+SEED_BATCH = 1000
+
+
+def _insert(cursor, table, columns, rows):
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    for start in range(0, len(rows), SEED_BATCH):
+        cursor.executemany(sql, rows[start:start + SEED_BATCH])
+
+
+def seed_database(conn, items=20000, seed=1):
+    """Fill an empty, migrated database with plausible data for EXPLAIN.
+
+    Shapes follow the live site: ten items per user, most items active,
+    a quarter of found items claimed, chat twice as busy as posting.
+    student2 has claim 1 on student1's found item 1, for the crawler.
+    """
+    rng = random.Random(seed)
+    now = datetime.now().replace(microsecond=0)
+
+    def when(days=365):
+        return now - timedelta(seconds=rng.randrange(days * 86400))
+
+    n_users = max(items // 10, 10)
+    usernames = [f"student{i}" for i in range(1, n_users + 1)]
+    cursor = conn.cursor()
+    _insert(cursor, 'users', ('username', 'email', 'password_hash', 'full_name', 'department', 'created_at',
+                              'is_active'),
+            [(name, f"{name}@campus.edu", '!', name.title(), rng.choice(['CS', 'EE', 'Law', 'Arts']),
+              when(730), rng.random() > 0.02) for name in usernames])
+
+    found_posters = ['student1'] + [rng.choice(usernames) for _ in range(items - 1)]
+    _insert(cursor, 'found_items', ('device_name', 'description', 'color', 'location', 'posted_by',
+                                    'posted_date', 'status'),
+            [(rng.choice(DEVICES), 'Left behind after class', rng.choice(COLORS), rng.choice(LOCATIONS),
+              poster, when(), 'active' if rng.random() < 0.7 else 'claimed') for poster in found_posters])
+    _insert(cursor, 'lost_items', ('device_name', 'description', 'color', 'location', 'lost_date', 'posted_by',
+                                   'posted_date', 'status'),
+            [(rng.choice(DEVICES), 'Lost it somewhere on campus', rng.choice(COLORS), rng.choice(LOCATIONS),
+              when().date(), rng.choice(usernames), when(), 'active' if rng.random() < 0.75 else 'found')
+             for _ in range(items)])
+
+    claims = [(1, 'student2', 'student1', 'pending', when(30), None, False)]
+    for _ in range(items // 4 - 1):
+        item_id = rng.randrange(1, items + 1)
+        status = rng.choice(['pending', 'approved', 'rejected'])
+        claimed = when()
+        claims.append((item_id, rng.choice(usernames), found_posters[item_id - 1], status, claimed,
+                       claimed + timedelta(hours=rng.randrange(1, 200)) if status != 'pending' else None,
+                       rng.random() < 0.8))
+    _insert(cursor, 'claims', ('found_item_id', 'claimant_username', 'owner_username', 'status', 'claim_date',
+                               'decided_at', 'admin_notified', 'phone_number', 'address'),
+            [claim + ('555-0100', 'Campus') for claim in claims])
+
+    messages = [('student2', 'student1', 'Is this my phone?', when(7), False),
+                ('student1', 'student2', 'Come to the library desk.', when(7), False)]
+    for _ in range(items * 2):
+        sender, recipient = rng.sample(usernames, 2)
+        if rng.random() < 0.1:
+            sender = 'System'
+        messages.append((sender, recipient, 'Hello about your item', when(), rng.random() < 0.8))
+    _insert(cursor, 'messages', ('sender', 'recipient', 'message', 'timestamp', 'is_read'), messages)
+    conn.commit()
+
+    for table in ('users', 'found_items', 'lost_items', 'claims', 'messages'):
+        cursor.execute(f"ANALYZE TABLE {table}")
+        cursor.fetchall()
+    cursor.close()
+
+
+# ==================== ANALYSIS ====================
+def load_schema(cursor):
+    """Columns, indexes and row counts of every table in the current database"""
+    schema = {'columns': {}, 'indexes': {}, 'rows': {}}
+    cursor.execute('''
+        SELECT table_name, column_name FROM information_schema.columns
+        WHERE table_schema = DATABASE()
+    ''')
+    for table, column in cursor.fetchall():
+        schema['columns'].setdefault(table, set()).add(column)
+    cursor.execute('''
+        SELECT table_name, index_name, column_name FROM information_schema.statistics
+        WHERE table_schema = DATABASE() ORDER BY table_name, index_name, seq_in_index
+    ''')
+    for table, index, column in cursor.fetchall():
+        schema['indexes'].setdefault(table, {}).setdefault(index, []).append(column)
+    cursor.execute("SELECT table_name, table_rows FROM information_schema.tables WHERE table_schema = DATABASE()")
+    for table, rows in cursor.fetchall():
+        schema['rows'][table] = int(rows or 0)
+    return schema
+
+
+_KEYWORDS = {'WHERE', 'ON', 'JOIN', 'LEFT', 'RIGHT', 'INNER', 'GROUP', 'ORDER', 'LIMIT', 'SET', 'USING',
+             'FOR', 'LOCK', 'HAVING', 'AS', 'UNION'}
+_TABLE_RE = re.compile(r'\b(?:FROM|JOIN|UPDATE)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.I)
+_PREDICATE_RE = re.compile(r'\b(?:(\w+)\.)?(\w+)\s*(<=>|<=|>=|!=|<>|=|<|>|\s+IN\s*\(|\s+BETWEEN\b|\s+IS\s+NULL\b)',
+                           re.I)
+
+
+def table_aliases(sql):
+    aliases = {}
+    for table, alias in _TABLE_RE.findall(sql):
+        if alias and alias.upper() not in _KEYWORDS:
+            aliases[alias] = table
+        aliases.setdefault(table, table)
+    return aliases
+
+
+def _clause_columns(sql, keyword):
+    """Columns listed after ORDER BY / GROUP BY, with their qualifiers"""
+    match = re.search(rf'\b{keyword}\s+(.*?)(?:\bLIMIT\b|\bFOR UPDATE\b|\bLOCK IN\b|\bHAVING\b|\)|$)', sql, re.I)
+    if not match:
+        return []
+    columns = []
+    for part in match.group(1).split(','):
+        part = re.sub(r'\s+(ASC|DESC)\s*$', '', part.strip(), flags=re.I)
+        m = re.fullmatch(r'(?:(\w+)\.)?(\w+)', part)
+        if m:
+            columns.append((m.group(1), m.group(2)))
+    return columns
+
+
+def propose_index(sql, alias, schema):
+    """Columns for a composite index serving ``alias`` in ``sql``, or None.
+
+    Equality columns first, then the ORDER BY / GROUP BY columns when they
+    all belong to this table, then one range column. InnoDB appends the
+    primary key to every secondary index, so a trailing ``id`` is dropped.
+    """
+    sql = ' '.join(sql.split())
+    aliases = table_aliases(sql)
+    table = aliases.get(alias, alias)
+    columns = schema['columns'].get(table, set())
+    tables = set(aliases.values())
+
+    def owns(qualifier, column):
+        if qualifier:
+            return aliases.get(qualifier) == table
+        # Unqualified: ours if no other table in the statement has the column
+        return column in columns and not any(column in schema['columns'].get(t, ()) for t in tables - {table})
+
+    # Select lists and SET clauses hold expressions, not predicates
+    body = re.sub(r'\bSELECT\b.*?\bFROM\b', 'SELECT * FROM', sql, flags=re.I)
+    body = re.sub(r'\bSET\b.*?\bWHERE\b', 'WHERE', body, flags=re.I)
+
+    equality, ranges = [], []
+    for qualifier, column, operator in _PREDICATE_RE.findall(body):
+        if column.upper() in _KEYWORDS or not owns(qualifier, column):
+            continue
+        operator = operator.strip().upper()
+        target = equality if operator in ('=', '<=>') or operator.startswith('IN') or operator.startswith('IS') \
+            else ranges
+        if column not in target:
+            target.append(column)
+    ranges = [column for column in ranges if column not in equality]
+
+    ordering = []
+    for keyword in ('GROUP BY', 'ORDER BY'):
+        clause = _clause_columns(body, keyword)
+        if clause and all(owns(q, c) for q, c in clause):
+            ordering += [c for _, c in clause if c not in equality and c not in ordering]
+
+    proposed = equality + ordering
+    if not ordering and ranges:
+        proposed.append(ranges[0])
+    while proposed and proposed[-1] == 'id':
+        proposed.pop()
+    return proposed[:MAX_INDEX_COLUMNS] or None
+
+
+def covering_index(schema, table, columns):
+    """Name of an existing index that starts with ``columns``, if any"""
+    for name, indexed in schema['indexes'].get(table, {}).items():
+        if indexed[:len(columns)] == list(columns):
+            return name
+    return None
+
+
+def index_name(columns):
+    return ('idx_' + '_'.join(columns))[:64]
+
+
+def plan_problems(row, schema, min_rows):
+    """What is wrong with one EXPLAIN row: full scans of big tables, filesorts, temporary tables"""
+    problems = []
+    table = row.get('table') or ''
+    extra = row.get('Extra') or ''
+    rows = int(row.get('rows') or 0)
+    big = max(rows, schema['rows'].get(table, 0)) >= min_rows
+    if row.get('type') == 'ALL' and big:
+        problems.append('full table scan')
+    elif row.get('type') == 'index' and big:
+        problems.append('full index scan')
+    if 'Using filesort' in extra:
+        problems.append('filesort')
+    if 'Using temporary' in extra:
+        problems.append('temporary table')
+    return problems
+
+
+def analyse(conn, queries, min_rows=FULL_SCAN_MIN_ROWS):
+    """EXPLAIN every captured query; returns one finding per problem table access"""
+    cursor = conn.cursor()
+    schema = load_schema(cursor)
+    cursor.close()
+    cursor = conn.cursor(dictionary=True)
+    findings = []
+    errors = []
+    for key, entry in sorted(queries.items()):
+        try:
+            cursor.execute('EXPLAIN ' + entry['sql'], entry['params'])
+            plan = cursor.fetchall()
+        except Exception as e:
+            errors.append({'query': key, 'error': str(e)})
+            continue
+        aliases = table_aliases(' '.join(entry['sql'].split()))
+        for row in plan:
+            problems = plan_problems(row, schema, min_rows)
+            if not problems:
+                continue
+            alias = row.get('table') or ''
+            table = aliases.get(alias, alias)
+            finding = {
+                'query': key,
+                'sources': sorted(entry['sources']),
+                'table': table,
+                'problems': problems,
+                'rows': int(row.get('rows') or 0),
+                'key': row.get('key'),
+                'proposal': None,
+                'covered_by': None,
+            }
+            if table in schema['columns']:
+                columns = propose_index(entry['sql'], alias, schema)
+                if columns:
+                    existing = covering_index(schema, table, columns)
+                    if existing:
+                        finding['covered_by'] = existing
+                    else:
+                        finding['proposal'] = (table, index_name(columns), tuple(columns))
+            findings.append(finding)
+    cursor.close()
+    return findings, errors
+
+
+# ==================== OUTPUT ====================
+def format_report(findings, errors):
+    lines = []
+    for finding in findings:
+        lines.append(f"[{', '.join(finding['problems'])}] {finding['table']} "
+                     f"(~{finding['rows']} rows, key={finding['key'] or '-'}) from {', '.join(finding['sources'])}")
+        lines.append(f"    {finding['query'][:300]}")
+        if finding['proposal']:
+            _, name, columns = finding['proposal']
+            lines.append(f"    -> propose {name} ({', '.join(columns)})")
+        elif finding['covered_by']:
+            lines.append(f"    -> {finding['covered_by']} already leads with those columns; "
+                         f"the predicate is not selective enough to use it")
+    for error in errors:
+        lines.append(f"[explain failed] {error['error']}\n    {error['query'][:300]}")
+    return '\n'.join(lines)
+
+
+def format_migration(findings, version):
+    """A migrations.py entry creating every proposed index"""
+    proposals = sorted({finding['proposal'] for finding in findings if finding['proposal']},
+                       key=lambda p: (p[0], p[1]))
+    if not proposals:
+        return None
+    # Proposals for the same table may share a leading column list; keep the widest
+    kept = [p for p in proposals
+            if not any(o is not p and o[0] == p[0] and len(o[2]) > len(p[2]) and o[2][:len(p[2])] == p[2]
+                       for o in proposals)]
+    lines = ['def add_advised_indexes(cursor):',
+             f'    """Composite indexes proposed by `flask advise-indexes` ({datetime.now():%Y-%m-%d})"""']
+    for table, name, columns in kept:
+        lines.append(f"    ensure_index(cursor, '{table}', '{name}', '{', '.join(columns)}')")
+    lines += ['', '', '# in MIGRATIONS:',
+              f"    ({version}, 'Indexes proposed by the index advisor', add_advised_indexes),"]
+    return '\n'.join(lines)
+
+
+# ==================== BASELINE ====================
+def full_scans(findings):
+    return sorted({finding['query'] for finding in findings if 'full table scan' in finding['problems']})
+
+
+def load_baseline(path):
+    """Accepted full-scan fingerprints; a missing file is an error, not an empty baseline"""
+    with open(path) as f:
+        return set(json.load(f))
+
+
+def save_baseline(path, findings):
+    with open(path, 'w') as f:
+        json.dump(full_scans(findings), f, indent=2)
+        f.write('\n')
+
+
+# ==================== CRAWL ====================
+# GET routes the crawler must not follow: streams, files, and links that change data
+SKIP_ENDPOINTS = {'static', 'media', 'favicon', 'user_events', 'user_logout', 'admin_logout',
+                  'toggle_user', 'delete_item', 'delete_claim', 'manage_claim', 'admin_manage_claim',
+                  'admin_mark_item_status', 'admin_report_status', 'admin_report_download',
+                  'download_report'}
+# Values for URL placeholders; the seeded student2 holds claim 1 on student1's found item 1
+URL_VALUES = {
+    'item_id': [1],
+    'claim_id': [1],
+    'item_type': ['found', 'lost'],
+    'username': ['student1'],
+    'with_user': ['student1'],
+    'recipient': ['student1'],
+}
+# Query strings that send the same routes down their other query shapes
+EXTRA_URLS = [
+    '/user/view_items?q=phone', '/user/view_items?color=Black&location=Library',
+    '/user/view_items?type=found&date_from=2020-01-01&date_to=2030-01-01',
+    '/api/search?q=phone', '/api/search?q=phone&type=lost&status=active',
+    '/admin/api/users?q=student1&sort=username&dir=asc', '/admin/api/found?q=phone&status=active',
+    '/admin/api/lost?status=found&sort=device_name', '/admin/api/claims?status=pending&page=2',
+    '/admin/api/metrics?granularity=hour&days=2',
+]
+CLI_JOBS = [['rollup'], ['rebuild-stats'], ['reconcile-unread']]
+
+
+def crawl_urls(app, url_values):
+    """Every crawlable GET URL of ``app`` with its placeholders filled in, as (source, url)"""
+    urls = []
+    for rule in app.url_map.iter_rules():
+        if 'GET' not in rule.methods or rule.endpoint in SKIP_ENDPOINTS:
+            continue
+        if any(arg not in url_values for arg in rule.arguments):
+            continue
+        combos = [{}]
+        for arg in sorted(rule.arguments):
+            combos = [dict(combo, **{arg: value}) for combo in combos for value in url_values[arg]]
+        with app.test_request_context():
+            urls += [(rule.endpoint, url_for(rule.endpoint, **combo)) for combo in combos]
+    return urls + [(url.split('?')[0], url) for url in EXTRA_URLS]
+
+
+def record_app_queries(app, recorder, url_values):
+    """Request every page and run the maintenance jobs with ``recorder`` capturing"""
+    recorder.active = True
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s.update(user_id=2, username='student2', admin_id=1, admin_username='admin')
+    for endpoint, url in crawl_urls(app, url_values):
+        recorder.source = endpoint
+        try:
+            status = client.get(url).status_code
+        except Exception as e:
+            status = e
+        if not isinstance(status, int) or status >= 500:
+            print(f"⚠️  {url} failed ({status}); queries after the failure were not captured")
+    runner = app.test_cli_runner()
+    for args in CLI_JOBS:
+        recorder.source = f"flask {' '.join(args)}"
+        runner.invoke(args=args)
+    recorder.active = False
+
+
+# ==================== CLI ====================
+def advise_indexes_cli(app, db_pool, connect, url_values=None, after_seed=None):
+    """The ``flask advise-indexes`` command for ``app``; app.py runs it from a stub so it is imported on use only.
+
+    db_pool    -- the app's ConnectionPool; ``connect`` is the factory it was built with
+    url_values -- extra URL placeholder values, merged over URL_VALUES
+    after_seed -- called once the scratch database is seeded, to fill derived tables
+    """
+    @click.command('advise-indexes')
+    @click.option('--items', default=20000,
+                  help='Found and lost items each to seed (users, claims and messages scale with it)')
+    @click.option('--min-rows', default=FULL_SCAN_MIN_ROWS, help='Ignore full scans of smaller tables')
+    @click.option('--baseline', default=os.path.join(app.root_path, 'index_baseline.json'),
+                  help='Full scans already accepted (JSON list of query fingerprints)')
+    @click.option('--check', is_flag=True, help='Exit 1 if a query outside the baseline does a full table scan')
+    @click.option('--update-baseline', is_flag=True, help='Accept the current full scans into the baseline')
+    @click.option('--keep', is_flag=True, help='Keep the scratch database afterwards')
+    def advise_indexes_command(items, min_rows, baseline, check, update_baseline, keep):
+        """EXPLAIN every query the app issues and propose composite indexes.
+
+        Builds a scratch database next to the real one, migrates and seeds it,
+        requests every page and runs the maintenance jobs while recording the
+        SQL, then EXPLAINs each query shape. Needs CREATE/DROP DATABASE rights.
+        """
+        accepted = None
+        if check and not update_baseline:
+            # Checked before the crawl: without a baseline every full scan would pass unnoticed
+            try:
+                accepted = load_baseline(baseline)
+            except (OSError, ValueError) as e:
+                raise click.ClickException(f"cannot read the baseline {baseline} ({e}); "
+                                           f"create it with --update-baseline")
+
+        database = app.config['MYSQL_DB']
+        scratch = f"{database}_advisor"
+        server = mysql.connector.connect(host=app.config['MYSQL_HOST'], user=app.config['MYSQL_USER'],
+                                         password=app.config['MYSQL_PASSWORD'], port=app.config['MYSQL_PORT'])
+        server_cursor = server.cursor()
+        server_cursor.execute(f"DROP DATABASE IF EXISTS `{scratch}`")
+        server_cursor.execute(f"CREATE DATABASE `{scratch}`")
+
+        recorder = QueryRecorder()
+        db_pool.close_all()
+        app.config['MYSQL_DB'] = scratch
+        db_pool._connect = recorder.wrap(connect)
+        try:
+            with db_pool.connection() as conn:
+                upgrade(conn)
+                print(f"Seeding {scratch} ...")
+                seed_database(conn, items)
+            if after_seed:
+                after_seed()
+
+            record_app_queries(app, recorder, dict(URL_VALUES, **(url_values or {})))
+
+            with db_pool.connection() as conn:
+                findings, errors = analyse(conn, recorder.queries, min_rows)
+                cursor = conn.cursor()
+                version = current_version(cursor)
+                cursor.close()
+        finally:
+            db_pool.close_all()
+            db_pool._connect = connect
+            app.config['MYSQL_DB'] = database
+            if not keep:
+                server_cursor.execute(f"DROP DATABASE IF EXISTS `{scratch}`")
+            server_cursor.close()
+            server.close()
+
+        print(f"\n{len(recorder.queries)} query shapes, {len(findings)} problem table accesses\n")
+        print(format_report(findings, errors))
+        migration = format_migration(findings, version + 1)
+        if migration:
+            print("\nProposed migration (review, then add to migrations.py):\n")
+            print(migration)
+
+        if update_baseline:
+            save_baseline(baseline, findings)
+            print(f"\n✅ Baseline written to {baseline}")
+        elif check:
+            regressions = [query for query in full_scans(findings) if query not in accepted]
+            for query in regressions:
+                print(f"❌ New full table scan: {query[:300]}")
+            if regressions:
+                raise SystemExit(1)
+            print("\n✅ No full table scans beyond the baseline")
+
+    return advise_indexes_command
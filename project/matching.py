@@ -0,0 +1,260 @@
+import heapq
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, date
+
+# Words that carry no signal when pairing lost and found posts
+STOPWORDS = {
+    'a', 'an', 'and', 'the', 'of', 'in', 'on', 'at', 'to', 'for', 'with', 'my', 'it',
+    'is', 'was', 'near', 'from', 'by', 'or', 'this', 'that', 'has', 'have', 'i', 'me',
+    'found', 'lost', 'item', 'left', 'some', 'one'
+}
+
+# Relative weight of each signal in the final score (sums to 1)
+WEIGHTS = {
+    'text': 0.55,
+    'color': 0.15,
+    'location': 0.15,
+    'date': 0.15,
+}
+
+DEVICE_NAME_BOOST = 2.0     # a shared word in device_name counts double
+DATE_WINDOW_DAYS = 30       # date score decays to zero over this many days
+MAX_POSTING_SCAN = 2000     # cap on candidates scored per lookup
+
+# Index side to search for a given item type
+OPPOSITE = {'lost': 'found', 'found': 'lost'}
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    """Lowercase, split on non-alphanumerics, drop stopwords and fold plurals"""
+    if not text:
+        return []
+    tokens = []
+    for tok in _TOKEN_RE.findall(str(text).lower()):
+        if len(tok) < 2 or tok in STOPWORDS:
+            continue
+        if len(tok) > 3 and tok.endswith('s') and not tok.endswith('ss'):
+            tok = tok[:-1]
+        tokens.append(tok)
+    return tokens
+
+
+def _as_date(value):
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+class _Entry:
+    """Pre-tokenized view of an item row, kept in the index"""
+
+    __slots__ = ('id', 'row', 'name_tokens', 'desc_tokens', 'color', 'location_tokens', 'event_date')
+
+    def __init__(self, item_type, row):
+        self.id = row['id']
+        self.row = row
+        self.name_tokens = set(tokenize(row.get('device_name')))
+        self.desc_tokens = set(tokenize(row.get('description'))) - self.name_tokens
+        self.color = (row.get('color') or '').strip().lower()
+        self.location_tokens = set(tokenize(row.get('location')))
+        # Lost items are dated by when they went missing, found items by when they were posted
+        if item_type == 'lost':
+            self.event_date = _as_date(row.get('lost_date')) or _as_date(row.get('posted_date'))
+        else:
+            self.event_date = _as_date(row.get('posted_date'))
+
+    @property
+    def tokens(self):
+        return self.name_tokens | self.desc_tokens
+
+
+class MatchIndex:
+    """In-memory inverted index over active lost and found items.
+
+    Each side keeps token -> item ids postings, so ranking a lost item
+    only scores found items that share at least one word with it.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self.built_at = None
+        self.rebuild_lock = threading.Lock()  # held while a full rebuild is in flight
+        self._lock = threading.RLock()
+        self._entries = {'lost': {}, 'found': {}}
+        self._postings = {'lost': defaultdict(set), 'found': defaultdict(set)}
+
+    # ==================== MAINTENANCE ====================
+    def is_stale(self):
+        return self.built_at is None or time.monotonic() - self.built_at > self.ttl
+
+    def load(self, lost_rows, found_rows):
+        """Replace the index contents with the given active rows"""
+        entries = {'lost': {}, 'found': {}}
+        postings = {'lost': defaultdict(set), 'found': defaultdict(set)}
+        for item_type, rows in (('lost', lost_rows), ('found', found_rows)):
+            for row in rows:
+                entry = _Entry(item_type, dict(row))
+                entries[item_type][entry.id] = entry
+                for tok in entry.tokens:
+                    postings[item_type][tok].add(entry.id)
+        with self._lock:
+            self._entries = entries
+            self._postings = postings
+            self.built_at = time.monotonic()
+
+    def add(self, item_type, row):
+        """Index (or re-index) one active item"""
+        entry = _Entry(item_type, dict(row))
+        with self._lock:
+            self._remove_locked(item_type, entry.id)
+            self._entries[item_type][entry.id] = entry
+            for tok in entry.tokens:
+                self._postings[item_type][tok].add(entry.id)
+
+    def remove(self, item_type, item_id):
+        """Drop an item that is no longer active"""
+        with self._lock:
+            self._remove_locked(item_type, item_id)
+
+    def _remove_locked(self, item_type, item_id):
+        entry = self._entries[item_type].pop(item_id, None)
+        if entry is None:
+            return
+        postings = self._postings[item_type]
+        for tok in entry.tokens:
+            ids = postings.get(tok)
+            if ids is not None:
+                ids.discard(item_id)
+                if not ids:
+                    del postings[tok]
+
+    def get(self, item_type, item_id):
+        entry = self._entries[item_type].get(item_id)
+        return entry.row if entry else None
+
+    def size(self):
+        return {side: len(entries) for side, entries in self._entries.items()}
+
+    # ==================== RANKING ====================
+    def matches(self, item_type, row, k=5, exclude_user=None):
+        """Return the top-k items from the opposite side for a lost/found item row.
+
+        Result is a list of dicts: {'item': row, 'score': 0..1, 'reasons': [...]}.
+        """
+        query = _Entry(item_type, dict(row))
+        side = OPPOSITE[item_type]
+
+        with self._lock:
+            entries = self._entries[side]
+            postings = self._postings[side]
+            total = max(len(entries), 1)
+
+            idf = {}
+            for tok in query.tokens:
+                ids = postings.get(tok)
+                if ids:
+                    idf[tok] = math.log(1 + total / len(ids))
+            candidates = self._candidates(postings, sorted(idf, key=lambda t: len(postings[t])))
+
+            if not candidates:
+                return []
+
+            max_text = sum(idf.get(tok, 0) * DEVICE_NAME_BOOST for tok in query.name_tokens) + \
+                       sum(idf.get(tok, 0) for tok in query.desc_tokens)
+            if max_text <= 0:
+                return []
+
+            scored = []
+            for cand_id in candidates:
+                cand = entries[cand_id]
+                if exclude_user and cand.row.get('posted_by') == exclude_user:
+                    continue
+                score, reasons = self._score(query, cand, idf, max_text, item_type)
+                scored.append((score, cand_id, reasons))
+
+            best = heapq.nlargest(k, scored, key=lambda s: (s[0], s[1]))
+            return [
+                {'item': entries[cand_id].row, 'score': round(score, 3), 'reasons': reasons}
+                for score, cand_id, reasons in best
+            ]
+
+    def _candidates(self, postings, tokens):
+        """Collect candidate ids from the rarest query tokens first.
+
+        Rare words are unioned until MAX_POSTING_SCAN ids are gathered. If
+        every word is common, items sharing several of them are used instead.
+        """
+        candidates = set()
+        for tok in tokens:
+            ids = postings[tok]
+            if len(candidates) + len(ids) > MAX_POSTING_SCAN:
+                break
+            candidates |= ids
+        if candidates or not tokens:
+            return candidates
+
+        candidates = set(postings[tokens[0]])
+        for tok in tokens[1:]:
+            narrowed = candidates & postings[tok]
+            if not narrowed:
+                break
+            candidates = narrowed
+            if len(candidates) <= MAX_POSTING_SCAN:
+                break
+        if len(candidates) > MAX_POSTING_SCAN:
+            candidates = set(heapq.nlargest(MAX_POSTING_SCAN, candidates))
+        return candidates
+
+    def _score(self, query, cand, idf, max_text, item_type):
+        reasons = []
+        cand_tokens = cand.tokens
+
+        text = 0.0
+        for tok in query.name_tokens:
+            if tok in cand_tokens:
+                text += idf.get(tok, 0) * (DEVICE_NAME_BOOST if tok in cand.name_tokens else 1.0)
+        for tok in query.desc_tokens:
+            if tok in cand_tokens:
+                text += idf.get(tok, 0)
+        text = min(text / max_text, 1.0)
+        if text >= 0.5:
+            reasons.append('similar description')
+
+        color = 1.0 if query.color and query.color == cand.color else 0.0
+        if color:
+            reasons.append('same color')
+
+        location = 0.0
+        if query.location_tokens and cand.location_tokens:
+            shared = query.location_tokens & cand.location_tokens
+            location = len(shared) / len(query.location_tokens | cand.location_tokens)
+            if shared:
+                reasons.append('nearby location')
+
+        date_score = 0.0
+        if query.event_date and cand.event_date:
+            lost_day, found_day = (query.event_date, cand.event_date) if item_type == 'lost' \
+                else (cand.event_date, query.event_date)
+            gap = (found_day - lost_day).days
+            # Allow a day of slack for items found before the owner reported them
+            if gap >= -1:
+                date_score = max(0.0, 1.0 - abs(gap) / DATE_WINDOW_DAYS)
+                if date_score >= 0.5:
+                    reasons.append('close dates')
+
+        score = (WEIGHTS['text'] * text + WEIGHTS['color'] * color +
+                 WEIGHTS['location'] * location + WEIGHTS['date'] * date_score)
+        return score, reasons
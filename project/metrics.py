@@ -0,0 +1,84 @@
+import os
+import threading
+import time
+
+from prometheus_client import (CollectorRegistry, Counter, Histogram, REGISTRY, CONTENT_TYPE_LATEST,
+                               generate_latest, multiprocess)
+from prometheus_client.core import GaugeMetricFamily
+
+# Metrics for GET /metrics, in the Prometheus text format.
+#
+# With several worker processes, start them with PROMETHEUS_MULTIPROC_DIR
+# pointing at an empty, writable directory (cleared on every deploy):
+# each process then writes its samples to files there and any worker
+# answering a scrape adds up all of them. Without it the numbers are
+# those of the one process that answers.
+
+NAMESPACE = 'campus_lost_found'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+ACQUIRE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+REPORT_BUCKETS = (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+REQUESTS = Counter('http_requests', 'HTTP requests handled',
+                   ['endpoint', 'method', 'status'], namespace=NAMESPACE)
+REQUEST_LATENCY = Histogram('http_request_duration_seconds', 'Time to build the response',
+                            ['endpoint', 'method'], namespace=NAMESPACE, buckets=LATENCY_BUCKETS)
+RESPONSE_SIZE = Histogram('http_response_size_bytes', 'Response body size, when known up front',
+                          ['endpoint'], namespace=NAMESPACE, buckets=SIZE_BUCKETS)
+DB_ACQUIRE = Histogram('db_connection_acquire_seconds', 'Wait for a pooled database connection',
+                       namespace=NAMESPACE, buckets=ACQUIRE_BUCKETS)
+REPORT_DURATION = Histogram('report_render_seconds', 'PDF report render time, queue wait excluded',
+                            ['kind', 'status'], namespace=NAMESPACE, buckets=REPORT_BUCKETS)
+REPORT_SIZE = Histogram('report_size_bytes', 'Size of rendered PDF reports',
+                        ['kind'], namespace=NAMESPACE, buckets=SIZE_BUCKETS)
+UPLOAD_BYTES = Histogram('upload_size_bytes', 'Size of uploaded images',
+                         ['endpoint'], namespace=NAMESPACE, buckets=SIZE_BUCKETS)
+UPLOAD_DURATION = Histogram('upload_duration_seconds', 'Time to receive and hash an uploaded image',
+                            ['endpoint'], namespace=NAMESPACE, buckets=LATENCY_BUCKETS)
+
+
+def multiprocess_dir():
+    return os.environ.get('PROMETHEUS_MULTIPROC_DIR') or os.environ.get('prometheus_multiproc_dir')
+
+
+class DatabaseGauges:
+    """Gauges read from the database when scraped, at most once per ``ttl`` seconds.
+
+    They describe shared data rather than one process, so they are not
+    written to the multiprocess files; whichever worker answers reports them.
+    ``read`` returns {name: (help text, value)}.
+    """
+
+    def __init__(self, read, ttl=15):
+        self.read = read
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._values = {}
+        self._read_at = None
+
+    def collect(self):
+        with self._lock:
+            if self._read_at is None or time.monotonic() - self._read_at >= self.ttl:
+                try:
+                    self._values = self.read() or {}
+                except Exception as e:
+                    print(f"Error reading metric gauges: {e}")
+                self._read_at = time.monotonic()
+            values = dict(self._values)
+        for name, (documentation, value) in values.items():
+            yield GaugeMetricFamily(f"{NAMESPACE}_{name}", documentation, value=value)
+
+
+def render_metrics(*collectors):
+    """(body, content type) for a scrape"""
+    if multiprocess_dir():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    extra = CollectorRegistry()
+    for collector in collectors:
+        extra.register(collector)
+    return generate_latest(registry) + generate_latest(extra), CONTENT_TYPE_LATEST
@@ -0,0 +1,400 @@
+import bcrypt
+from mysql.connector import Error, errorcode
+
+from stats import rebuild_stats, reconcile_unread_counters, rebuild_conversations
+
+# Numbered schema migrations. Each one is safe to re-run: MySQL commits DDL
+# as it goes, so a migration that failed half way is simply run again once
+# the problem is fixed. A version is recorded only after its migration
+# finished. New schema changes go in a new migration at the end.
+
+MIGRATION_LOCK = 'campus_lost_found.migrations'
+
+
+class MigrationError(Exception):
+    """A migration cannot proceed until the data is fixed"""
+
+
+# ==================== HELPERS ====================
+def ensure_index(cursor, table, index_name, columns):
+    """Create an index on an existing table unless it is already there"""
+    cursor.execute('''
+        SELECT 1 FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        LIMIT 1
+    ''', (table, index_name))
+    if not cursor.fetchone():
+        cursor.execute(f"CREATE INDEX {index_name} ON {table} ({columns})")
+
+
+def ensure_column(cursor, table, column, definition):
+    """Add a column to an existing table unless it is already there"""
+    cursor.execute('''
+        SELECT 1 FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+        LIMIT 1
+    ''', (table, column))
+    if not cursor.fetchone():
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        return True
+    return False
+
+
+def ensure_foreign_key(cursor, table, column, ref_table, ref_column, on_delete='CASCADE'):
+    """Add a foreign key unless the column already references ``ref_table``.
+
+    Rows pointing at nothing would make MySQL refuse the key, so they are
+    counted first and reported instead.
+    """
+    cursor.execute('''
+        SELECT 1 FROM information_schema.key_column_usage
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+          AND referenced_table_name = %s
+        LIMIT 1
+    ''', (table, column, ref_table))
+    if cursor.fetchone():
+        return
+    cursor.execute(f'''
+        SELECT COUNT(*) FROM {table} t LEFT JOIN {ref_table} r ON r.{ref_column} = t.{column}
+        WHERE r.{ref_column} IS NULL
+    ''')
+    orphans = cursor.fetchone()[0]
+    if orphans:
+        raise MigrationError(f"{orphans} {table} rows have a {column} with no matching {ref_table}.{ref_column}; "
+                             f"fix or delete them, then run the upgrade again")
+    cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT fk_{table}_{column} FOREIGN KEY ({column}) "
+                   f"REFERENCES {ref_table} ({ref_column}) ON DELETE {on_delete}")
+
+
+def delete_orphans(cursor, table, column, ref_table, ref_column, upload_column=None):
+    """Delete rows whose ``column`` points at nothing, as ON DELETE CASCADE would have.
+
+    Uploads they referenced lose a reference and go at the app's next
+    collection. Returns the number of rows deleted.
+    """
+    orphaned = f"FROM {table} t LEFT JOIN {ref_table} r ON r.{ref_column} = t.{column} WHERE r.{ref_column} IS NULL"
+    if upload_column:
+        cursor.execute(f'''
+            UPDATE blob_refs b JOIN (
+                SELECT t.{upload_column} AS blob_key, COUNT(*) AS n {orphaned} GROUP BY t.{upload_column}
+            ) o ON o.blob_key = b.blob_key
+            SET b.refcount = GREATEST(b.refcount - o.n, 0)
+        ''')
+    cursor.execute(f"DELETE t {orphaned}")
+    if cursor.rowcount:
+        print(f"Deleted {cursor.rowcount} {table} rows with no matching {ref_table}.{ref_column}")
+    return cursor.rowcount
+
+
+# ==================== MIGRATIONS ====================
+TABLES = [
+    '''
+    CREATE TABLE IF NOT EXISTS users (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        username VARCHAR(50) UNIQUE NOT NULL,
+        email VARCHAR(100) NOT NULL,
+        password_hash VARCHAR(255) NOT NULL,
+        phone VARCHAR(20),
+        full_name VARCHAR(100),
+        student_id VARCHAR(50),
+        department VARCHAR(100),
+        year VARCHAR(20),
+        user_type VARCHAR(20) DEFAULT 'student',
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        last_login DATETIME NULL,
+        total_items_posted INT DEFAULT 0,
+        items_found INT DEFAULT 0,
+        items_lost INT DEFAULT 0,
+        claims_made INT DEFAULT 0,
+        claims_received INT DEFAULT 0,
+        unread_messages INT DEFAULT 0,
+        is_active BOOLEAN DEFAULT TRUE,
+        INDEX idx_created (created_at)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS administrators (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        username VARCHAR(50) UNIQUE NOT NULL,
+        password_hash VARCHAR(255) NOT NULL,
+        created_by VARCHAR(50),
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS found_items (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        device_name VARCHAR(100) NOT NULL,
+        description TEXT,
+        color VARCHAR(50),
+        location VARCHAR(200) NOT NULL,
+        image_filename VARCHAR(255),
+        image_hash BIGINT UNSIGNED NULL,
+        posted_by VARCHAR(50) NOT NULL,
+        posted_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+        status VARCHAR(20) DEFAULT 'active',
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        INDEX idx_status_posted (status, posted_date),
+        INDEX idx_posted (posted_date)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS lost_items (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        device_name VARCHAR(100) NOT NULL,
+        description TEXT,
+        color VARCHAR(50),
+        location VARCHAR(200) NOT NULL,
+        lost_date DATE,
+        image_filename VARCHAR(255),
+        image_hash BIGINT UNSIGNED NULL,
+        posted_by VARCHAR(50) NOT NULL,
+        posted_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+        status VARCHAR(20) DEFAULT 'active',
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        INDEX idx_status_posted (status, posted_date),
+        INDEX idx_posted (posted_date)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS claims (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        found_item_id INT NOT NULL,
+        claimant_username VARCHAR(50) NOT NULL,
+        owner_username VARCHAR(50) NOT NULL,
+        phone_number VARCHAR(20) NOT NULL,
+        address TEXT NOT NULL,
+        contact_method VARCHAR(20),
+        proof_description TEXT,
+        proof_image_filename VARCHAR(255),
+        status VARCHAR(20) DEFAULT 'pending',
+        claim_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+        admin_notified BOOLEAN DEFAULT FALSE,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        decided_at DATETIME NULL,
+        INDEX idx_claim_date (claim_date),
+        INDEX idx_decided (decided_at, id)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS messages (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        sender VARCHAR(50) NOT NULL,
+        recipient VARCHAR(50) NOT NULL,
+        subject VARCHAR(200),
+        message TEXT NOT NULL,
+        item_id INT,
+        item_type VARCHAR(20),
+        claim_id INT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        is_read BOOLEAN DEFAULT FALSE,
+        from_admin BOOLEAN DEFAULT FALSE,
+        INDEX idx_pair (sender, recipient, id),
+        INDEX idx_recipient_unread (recipient, is_read)
+    )
+    ''',
+    # One row per pair of users, kept up to date by insert_message()
+    '''
+    CREATE TABLE IF NOT EXISTS conversations (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        user_a VARCHAR(50) NOT NULL,
+        user_b VARCHAR(50) NOT NULL,
+        last_message_id INT,
+        last_timestamp DATETIME,
+        last_preview VARCHAR(200),
+        unread_a INT DEFAULT 0,
+        unread_b INT DEFAULT 0,
+        UNIQUE KEY uq_pair (user_a, user_b),
+        INDEX idx_a_time (user_a, last_timestamp),
+        INDEX idx_b_time (user_b, last_timestamp)
+    )
+    ''',
+    # Summary counts, kept current by every write (see stats.py)
+    '''
+    CREATE TABLE IF NOT EXISTS stat_counters (
+        name VARCHAR(64) PRIMARY KEY,
+        value BIGINT NOT NULL DEFAULT 0
+    )
+    ''',
+    # Reference counts for the content-addressed upload store (see blobs.py)
+    '''
+    CREATE TABLE IF NOT EXISTS blob_refs (
+        blob_key VARCHAR(100) PRIMARY KEY,
+        refcount INT NOT NULL DEFAULT 0,
+        size BIGINT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        INDEX idx_refcount (refcount)
+    )
+    ''',
+    # Hourly and daily analytics buckets, filled incrementally by run_rollups()
+    '''
+    CREATE TABLE IF NOT EXISTS metric_rollups (
+        granularity ENUM('hour', 'day') NOT NULL,
+        bucket_start DATETIME NOT NULL,
+        metric VARCHAR(32) NOT NULL,
+        dimension VARCHAR(100) NOT NULL DEFAULT '',
+        value INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (granularity, bucket_start, metric, dimension)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS rollup_watermarks (
+        source VARCHAR(32) PRIMARY KEY,
+        last_id BIGINT NOT NULL DEFAULT 0,
+        last_time DATETIME NULL
+    )
+    ''',
+    # Versions behind the item/claim page ETags, bumped by every write (see pagecache.py)
+    '''
+    CREATE TABLE IF NOT EXISTS resource_versions (
+        name VARCHAR(64) PRIMARY KEY,
+        version BIGINT NOT NULL DEFAULT 0,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+    )
+    ''',
+]
+
+
+def create_tables(cursor):
+    for sql in TABLES:
+        cursor.execute(sql)
+
+
+def upgrade_legacy_tables(cursor):
+    """Columns and indexes added to databases created before versioned migrations"""
+    ensure_index(cursor, 'found_items', 'idx_status_posted', 'status, posted_date')
+    ensure_index(cursor, 'lost_items', 'idx_status_posted', 'status, posted_date')
+    ensure_index(cursor, 'messages', 'idx_pair', 'sender, recipient, id')
+    ensure_index(cursor, 'messages', 'idx_recipient_unread', 'recipient, is_read')
+    if ensure_column(cursor, 'users', 'unread_messages', 'INT DEFAULT 0'):
+        reconcile_unread_counters(cursor)
+    
+    # Report sections are split and versioned by month (see report_jobs.py)
+    ensure_index(cursor, 'users', 'idx_created', 'created_at')
+    ensure_index(cursor, 'found_items', 'idx_posted', 'posted_date')
+    ensure_index(cursor, 'lost_items', 'idx_posted', 'posted_date')
+    ensure_index(cursor, 'claims', 'idx_claim_date', 'claim_date')
+    for table in ('found_items', 'lost_items', 'claims'):
+        ensure_column(cursor, table, 'updated_at',
+                      'DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP')
+    
+    # Perceptual hashes of item photos, for "visually similar items"
+    for table in ('found_items', 'lost_items'):
+        ensure_column(cursor, table, 'image_hash', 'BIGINT UNSIGNED NULL')
+    
+    # Claim decision times feed the recovery-time analytics
+    ensure_column(cursor, 'claims', 'decided_at', 'DATETIME NULL')
+    ensure_index(cursor, 'claims', 'idx_decided', 'decided_at, id')
+
+
+def add_reference_keys(cursor):
+    """Indexes and foreign keys that campus_lost_found.sql always had"""
+    ensure_index(cursor, 'users', 'idx_email', 'email')
+    for table in ('found_items', 'lost_items'):
+        ensure_index(cursor, table, 'idx_posted_by', 'posted_by')
+    ensure_index(cursor, 'claims', 'idx_status', 'status')
+    ensure_index(cursor, 'claims', 'idx_claimant', 'claimant_username')
+    ensure_index(cursor, 'claims', 'idx_owner', 'owner_username')
+    ensure_index(cursor, 'claims', 'idx_found_item', 'found_item_id, claim_date')
+    ensure_index(cursor, 'messages', 'idx_timestamp', 'timestamp')
+    
+    # Older versions deleted items and accounts without the rows that point at
+    # them (claims on a deleted found item, most often); MySQL refuses the keys
+    # while any are left. Parents first, so their orphaned children go too.
+    deleted = (delete_orphans(cursor, 'found_items', 'posted_by', 'users', 'username', 'image_filename')
+               + delete_orphans(cursor, 'lost_items', 'posted_by', 'users', 'username', 'image_filename'))
+    for column, ref_table, ref_column in (('found_item_id', 'found_items', 'id'),
+                                          ('claimant_username', 'users', 'username'),
+                                          ('owner_username', 'users', 'username')):
+        deleted += delete_orphans(cursor, 'claims', column, ref_table, ref_column, 'proof_image_filename')
+    if deleted:
+        rebuild_stats(cursor)
+    
+    ensure_foreign_key(cursor, 'found_items', 'posted_by', 'users', 'username')
+    ensure_foreign_key(cursor, 'lost_items', 'posted_by', 'users', 'username')
+    ensure_foreign_key(cursor, 'claims', 'found_item_id', 'found_items', 'id')
+    ensure_foreign_key(cursor, 'claims', 'claimant_username', 'users', 'username')
+    ensure_foreign_key(cursor, 'claims', 'owner_username', 'users', 'username')
+
+
+def seed_data(cursor):
+    """Default admin account, and the statistics counters for existing rows"""
+    cursor.execute("SELECT username FROM administrators WHERE username = 'admin'")
+    if not cursor.fetchone():
+        # Hash the default password: admin@123
+        hashed_pw = bcrypt.hashpw('admin@123'.encode('utf-8'), bcrypt.gensalt())
+        cursor.execute(
+            "INSERT INTO administrators (username, password_hash, created_by) VALUES (%s, %s, %s)",
+            ('admin', hashed_pw.decode('utf-8'), 'system')
+        )
+        print("✅ Default admin account created: username='admin', password='admin@123'")
+    
+    # Counters start from the rows already there; record_change() keeps them current after that
+    cursor.execute("SELECT 1 FROM stat_counters LIMIT 1")
+    if not cursor.fetchone():
+        rebuild_stats(cursor)
+
+
+def backfill_conversations(cursor):
+    """Conversation summaries for messages sent before the conversations table existed"""
+    rebuild_conversations(cursor)
+
+
+MIGRATIONS = [
+    (1, 'Create tables', create_tables),
+    (2, 'Columns and indexes added before versioned migrations', upgrade_legacy_tables),
+    (3, 'Indexes and foreign keys from campus_lost_found.sql', add_reference_keys),
+    (4, 'Default admin account and statistics counters', seed_data),
+    (5, 'Conversation summaries for existing messages', backfill_conversations),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# ==================== RUNNING ====================
+def current_version(cursor):
+    """Version the database is at (0 before any migration ran); one small read"""
+    try:
+        cursor.execute("SELECT MAX(version) FROM schema_version")
+    except Error as e:
+        if e.errno == errorcode.ER_NO_SUCH_TABLE:
+            return 0
+        raise
+    row = cursor.fetchone()
+    return (row[0] if row else None) or 0
+
+
+def upgrade(conn, target=None, lock_timeout=60):
+    """Apply every migration past the database's version, up to ``target``.
+
+    Holds a named lock so two deploys cannot migrate at once.
+    Returns the (version, description) pairs applied.
+    """
+    target = LATEST_VERSION if target is None else target
+    cursor = conn.cursor()
+    applied = []
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (MIGRATION_LOCK, lock_timeout))
+        if not cursor.fetchone()[0]:
+            raise MigrationError("another upgrade is running")
+        try:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INT PRIMARY KEY,
+                    description VARCHAR(200),
+                    applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            version = current_version(cursor)
+            for number, description, migrate in MIGRATIONS:
+                if version < number <= target:
+                    migrate(cursor)
+                    cursor.execute("INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                                   (number, description))
+                    conn.commit()
+                    applied.append((number, description))
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK,))
+            cursor.fetchone()
+    finally:
+        cursor.close()
+    return applied
@@ -0,0 +1,88 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+# Resource names follow the stat_counters style: a whole table ("found_items")
+# for list pages, "<table>:<id>" for one row and the pages built around it.
+
+
+def bump_versions(cursor, names):
+    """Move each resource to a new version; call it in the transaction that changes it"""
+    names = sorted(set(names))
+    if not names:
+        return
+    cursor.execute(f'''
+        INSERT INTO resource_versions (name, version) VALUES {', '.join(['(%s, 1)'] * len(names))}
+        ON DUPLICATE KEY UPDATE version = version + 1
+    ''', tuple(names))
+
+
+def read_versions(cursor, names):
+    """{name: (version, updated_at)}; resources never written since versioning began are at (0, None)"""
+    names = list(names)
+    versions = {name: (0, None) for name in names}
+    if names:
+        cursor.execute(f"SELECT name, version, updated_at FROM resource_versions "
+                       f"WHERE name IN ({', '.join(['%s'] * len(names))})", tuple(names))
+        for row in cursor.fetchall():
+            if isinstance(row, dict):
+                row = (row['name'], row['version'], row['updated_at'])
+            versions[row[0]] = (int(row[1]), row[2])
+    return versions
+
+
+def make_etag(*parts):
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:24]
+
+
+class PageCache:
+    """Rendered HTML of read-heavy pages, kept in memory per worker.
+
+    Each entry remembers the ETag it was rendered for, so a page whose
+    resources moved to a new version (in this worker or any other) is never
+    served; ``invalidate()`` just frees those entries as soon as the write
+    commits here. Least recently used entries go first when full.
+    """
+
+    def __init__(self, ttl=300, max_entries=1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (etag, html, expires, resources)
+        self._by_resource = {}          # resource name -> set of keys
+
+    def get(self, key, etag):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == etag and entry[2] > time.monotonic():
+                self._entries.move_to_end(key)
+                return entry[1]
+            return None
+
+    def put(self, key, etag, html, resources):
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (etag, html, time.monotonic() + self.ttl, tuple(resources))
+            for name in resources:
+                self._by_resource.setdefault(name, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, names):
+        """Drop every page built from any of ``names``"""
+        with self._lock:
+            for name in names:
+                for key in list(self._by_resource.get(name, ())):
+                    self._drop(key)
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry:
+            for name in entry[3]:
+                keys = self._by_resource.get(name)
+                if keys:
+                    keys.discard(key)
+                    if not keys:
+                        del self._by_resource[name]
+
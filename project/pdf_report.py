@@ -1,11 +1,19 @@
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, KeepTogether
+from reportlab.platypus.doctemplate import ActionFlowable, NotAtTopPageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch, cm
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfbase import pdfdoc
+from reportlab.pdfgen import canvas
+import reportlab
+from reportlab import rl_config
 from datetime import datetime, date
 from io import BytesIO
+from tempfile import SpooledTemporaryFile
 
 def format_date_for_pdf(date_value):
     """Helper function to format any date/datetime object or string for PDF display"""
@@ -50,40 +58,295 @@ def format_short_date_for_pdf(date_value):
     # For any other type
     return str(date_value)[:10]
 
-def generate_admin_report(users_db, found_items_db, lost_items_db, claims_db, admins_db):
-    """Generate comprehensive PDF report for admin with proper page management"""
-    
-    buffer = BytesIO()
-    
-    # Calculate available page height (A4 is 29.7cm)
-    PAGE_HEIGHT = 29.7*cm
-    PAGE_WIDTH = 21*cm
-    
-    # Margins
-    left_margin = 1.5*cm
-    right_margin = 1.5*cm
-    top_margin = 2*cm
-    bottom_margin = 2*cm
-    
-    # Available content height
-    CONTENT_HEIGHT = PAGE_HEIGHT - top_margin - bottom_margin
-    
-    doc = SimpleDocTemplate(
-        buffer, 
-        pagesize=A4,
-        title="Campus Lost & Found System Report",
-        author="Admin Panel",
-        leftMargin=left_margin,
-        rightMargin=right_margin,
-        topMargin=top_margin,
-        bottomMargin=bottom_margin
-    )
+# ==================== STREAMING ====================
+# Data rows per table chunk. Small fixed-size tables lay out in constant time,
+# where one huge table is re-measured every time it is split across a page.
+CHUNK_ROWS = 40
+
+# Reports larger than this spill from memory to a temporary file
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+CELL_FONT = 'Helvetica'
+CELL_FONT_SIZE = 8
+CELL_PADDING = 12  # default left + right cell padding
+
+# Part of every cached fragment's key; bump it when the fragment layout changes
+FRAGMENT_VERSION = 1
+
+
+class FlowableStream(list):
+    """Story list that is filled from a generator while the document builds.
+
+    doc.build() consumes flowables from the front and checks len() before
+    each one, so topping the buffer up there keeps only a small window of
+    the report in memory rather than a flowable for every row.
+    """
+
+    def __init__(self, flowables, window=64):
+        super().__init__()
+        self._source = iter(flowables)
+        self._window = window
+
+    def __len__(self):
+        if self._source is not None and list.__len__(self) < self._window:
+            for flowable in self._source:
+                self.append(flowable)
+                if list.__len__(self) >= self._window * 2:
+                    break
+            else:
+                self._source = None
+        return list.__len__(self)
+
+
+# Compacting and splicing pages relies on reportlab internals with no public
+# equivalent: the canvas's PDFDocument page list (_doc.Pages.pages) and
+# PDFPage._colorsUsed / _shadingUsed. They are only touched on versions that
+# tests/test_pdf_report.py has been run against; elsewhere pages are
+# compressed at save() and fragments are not cached.
+SPLICE_TESTED_VERSIONS = ('4.0.',)
+SPLICE_SUPPORTED = reportlab.Version.startswith(SPLICE_TESTED_VERSIONS)
+
+
+def _require_splice_support():
+    if not SPLICE_SUPPORTED:
+        raise RuntimeError(f"page splicing has not been tested with reportlab {reportlab.Version}")
+
+
+# Fonts the report draws with. Every CompactCanvas registers them in this order
+# so their resource names (/F1, /F2, ...) agree between documents, which is what
+# lets a page stream rendered for one report be replayed in another.
+REPORT_FONTS = ('Helvetica', 'Helvetica-Bold', 'Helvetica-Oblique', 'Helvetica-BoldOblique')
+
+
+def _page_stream(content, filter_names):
+    stream = pdfdoc.PDFStream(content=content)
+    # Filter already present tells PDFStream.format not to encode again
+    stream.dictionary['Filter'] = pdfdoc.PDFArray([pdfdoc.PDFName(name) for name in filter_names])
+    stream.__Comment__ = "page stream"
+    return stream
+
+
+class CompactCanvas(canvas.Canvas):
+    """Canvas that compresses each page's content as soon as the page is done.
     
-    story = []
+    reportlab otherwise keeps every page's drawing operators as plain text
+    until save(), so memory grows with the page count.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for font_name in REPORT_FONTS:
+            self._doc.getInternalFontName(font_name)
+
+    def showPage(self):
+        super().showPage()
+        if not SPLICE_SUPPORTED:
+            return
+        page = self._doc.Pages.pages[-1]
+        if not page.compression or not page.stream:
+            return
+        filters = [pdfdoc.PDFBase85Encode, pdfdoc.PDFZCompress] if rl_config.useA85 else [pdfdoc.PDFZCompress]
+        content = page.stream
+        for encoder in reversed(filters):
+            content = encoder.encode(content)
+        if isinstance(content, str):
+            content = content.encode('latin-1')
+        page.Contents = _page_stream(content, [f.pdfname for f in filters])
+        page.stream = None
+        self.page_finished(page, content, [f.pdfname for f in filters])
+
+    def page_finished(self, page, content, filter_names):
+        """Hook called with each page's encoded content stream"""
+
+    def add_cached_page(self, cached):
+        """Append a page captured by PageCapture; call only between pages"""
+        _require_splice_support()
+        content, filter_names, width, height = cached
+        page = pdfdoc.PDFPage()
+        page.pagewidth = width
+        page.pageheight = height
+        page.Rotate = 0
+        page.Contents = _page_stream(content, filter_names)
+        # Nothing beyond the shared font dictionary (see PageCapture)
+        page.XObjects = page.ExtGState = None
+        page._colorsUsed = page._shadingUsed = {}
+        self._doc.addPage(page)
+
+
+class PageCapture(CompactCanvas):
+    """Canvas that keeps each finished page as (content, filters, width, height)
+    instead of writing a PDF file."""
+
+    def __init__(self, *args, **kwargs):
+        _require_splice_support()
+        kwargs['pageCompression'] = 1  # page_finished only sees compressed pages
+        super().__init__(*args, **kwargs)
+        self.captured = []
+
+    def page_finished(self, page, content, filter_names):
+        # Replayed pages only get the shared font resources
+        if page.XObjects or page.ExtGState or page.Annots or page._colorsUsed or page._shadingUsed:
+            raise ValueError("page uses resources that cannot be cached")
+        self.captured.append((content, filter_names, page.pagewidth, page.pageheight))
+        # The page object itself is never written
+        del self._doc.Pages.pages[-1]
+
+    def save(self):
+        pass
+
+
+class CachedPages(ActionFlowable):
+    """Splices pre-rendered pages into the document before the open page.
+
+    The open page must still be empty, so the story puts a NotAtTopPageBreak
+    in front of each one. ``load`` is called when the pages are reached, so
+    only one fragment's pages need to be read into memory at a time. Spliced
+    pages are not counted by canvas.getPageNumber() or doc.page; the report
+    draws no page numbers, and the table of contents is worked out up front.
+    """
+
+    def __init__(self, load):
+        ActionFlowable.__init__(self)
+        self._load = load
+
+    def apply(self, doc):
+        for cached in self._load():
+            doc.canv.add_cached_page(cached)
+
+
+def _cell(value, width):
+    """Plain-text table cell, wrapped onto extra lines if it is too wide.
+
+    Much cheaper than a Paragraph per cell and immune to markup in user data.
+    """
+    text = 'N/A' if value is None else str(value)
+    available = width - CELL_PADDING
+    if stringWidth(text, CELL_FONT, CELL_FONT_SIZE) <= available:
+        return text
+    return '\n'.join(simpleSplit(text, CELL_FONT, CELL_FONT_SIZE, available) or [text])
+
+
+def _data_table_style(header_color, body_color, grid_color, stripe_color):
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(header_color)),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 9),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
+        ('TOPPADDING', (0, 0), (-1, 0), 6),
+        ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
+        ('TOPPADDING', (0, 1), (-1, -1), 4),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor(body_color)),
+        ('GRID', (0, 0), (-1, -1), 0.3, colors.HexColor(grid_color)),
+        ('FONTNAME', (0, 1), (-1, -1), CELL_FONT),
+        ('FONTSIZE', (0, 1), (-1, -1), CELL_FONT_SIZE),
+        ('LEADING', (0, 1), (-1, -1), CELL_FONT_SIZE + 2),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.HexColor('#2D3748')),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor(stripe_color)]),
+        ('BOX', (0, 0), (-1, -1), 0.5, colors.HexColor(header_color)),
+    ])
+
+
+def _table_chunks(rows, format_row, header, col_widths, table_style):
+    """Yield one Table per CHUNK_ROWS rows, each repeating the header row"""
+    chunk = []
+    for row in rows:
+        chunk.append([_cell(value, width) for value, width in zip(format_row(row), col_widths)])
+        if len(chunk) == CHUNK_ROWS:
+            yield Table([header] + chunk, colWidths=col_widths, repeatRows=1, style=table_style)
+            chunk = []
+    if chunk:
+        yield Table([header] + chunk, colWidths=col_widths, repeatRows=1, style=table_style)
+
+
+# ==================== ROW FORMATTERS ====================
+def _user_row(user):
+    department = user.get('department') or 'N/A'
+    if department != 'N/A':
+        department = department.replace('_', ' ').title()
+    return [
+        user.get('username'),
+        user.get('email') or 'N/A',
+        (user.get('user_type') or 'student').title(),
+        department,
+        format_short_date_for_pdf(user.get('created_at')),
+        'Active' if user.get('is_active', True) else 'Inactive',
+    ]
+
+
+def _found_row(item):
+    return [
+        item.get('id'),
+        item.get('device_name') or 'N/A',
+        item.get('posted_by') or 'N/A',
+        item.get('location') or 'N/A',
+        (item.get('status') or 'active').title(),
+        format_short_date_for_pdf(item.get('posted_date')),
+    ]
+
+
+def _lost_row(item):
+    return [
+        item.get('id'),
+        item.get('device_name') or 'N/A',
+        item.get('posted_by') or 'N/A',
+        item.get('location') or 'N/A',
+        (item.get('status') or 'active').title(),
+        format_short_date_for_pdf(item.get('lost_date') or item.get('posted_date')),
+    ]
+
+
+def _claim_row(claim):
+    return [
+        claim.get('id'),
+        claim.get('claimant_username') or 'N/A',
+        claim.get('owner_username') or 'N/A',
+        (claim.get('status') or 'pending').title(),
+        format_short_date_for_pdf(claim.get('claim_date')),
+        claim.get('item_name') or 'Unknown',
+    ]
+
+
+def _admin_row(admin):
+    return [
+        admin.get('username'),
+        admin.get('created_by') or 'system',
+        format_date_for_pdf(admin.get('created_at')),
+    ]
+
+
+# key, heading, subtitle, total key, headers, column widths, row formatter, table colors
+DATA_SECTIONS = [
+    ('users', "2. USER DETAILS", "Total Users", 'total_users',
+     ['Username', 'Email', 'Type', 'Department', 'Joined', 'Status'],
+     [2.2*cm, 4.8*cm, 1.8*cm, 2.8*cm, 2*cm, 1.8*cm], _user_row,
+     ('#2B6CB0', '#F7FAFC', '#E2E8F0', '#EFF6FF')),
+    ('found_items', "3. FOUND ITEMS", "Total Found Items", 'total_found',
+     ['ID', 'Device', 'Posted By', 'Location', 'Status', 'Date'],
+     [1.2*cm, 3.2*cm, 2.2*cm, 2.8*cm, 2.2*cm, 2.2*cm], _found_row,
+     ('#D69E2E', '#FFFBEB', '#FBD38D', '#FFFBEB')),
+    ('lost_items', "4. LOST ITEMS", "Total Lost Items", 'total_lost',
+     ['ID', 'Device', 'Posted By', 'Location', 'Status', 'Lost Date'],
+     [1.2*cm, 3.2*cm, 2.2*cm, 2.8*cm, 2.2*cm, 2.2*cm], _lost_row,
+     ('#C53030', '#FFF5F5', '#FEB2B2', '#FFF5F5')),
+    ('claims', "5. CLAIMS ANALYSIS", "Total Claims", 'total_claims',
+     ['ID', 'Claimant', 'Owner', 'Status', 'Date', 'Item'],
+     [1.2*cm, 2.2*cm, 2.2*cm, 2.2*cm, 2.2*cm, 3.2*cm], _claim_row,
+     ('#805AD5', '#FAF5FF', '#D6BCFA', '#FAF5FF')),
+]
+
+ADMIN_SECTION = (['Username', 'Created By', 'Created At'], [3*cm, 3*cm, 4*cm], _admin_row,
+                 ('#4A5568', '#F7FAFC', '#CBD5E0', '#EDF2F7'))
+
+
+# ==================== REPORT ====================
+def _report_styles():
     styles = getSampleStyleSheet()
+    report_styles = {}
     
-    # ==================== CUSTOM STYLES ====================
-    title_style = ParagraphStyle(
+    report_styles['title'] = ParagraphStyle(
         'CustomTitle',
         parent=styles['Heading1'],
         fontSize=28,
@@ -93,39 +356,39 @@ def generate_admin_report(users_db, found_items_db, lost_items_db, claims_db, ad
         fontName='Helvetica-Bold'
     )
     
-    section_style = ParagraphStyle(
+    report_styles['section'] = ParagraphStyle(
         'SectionTitle',
         parent=styles['Heading1'],
         fontSize=22,
         textColor=colors.HexColor('#2D3748'),
         alignment=TA_LEFT,
-        spaceBefore=30,  # Reduced from 40
-        spaceAfter=15,   # Reduced from 25
+        spaceBefore=30,
+        spaceAfter=15,
         fontName='Helvetica-Bold'
     )
     
-    subsection_style = ParagraphStyle(
+    report_styles['subsection'] = ParagraphStyle(
         'SubSectionTitle',
         parent=styles['Heading2'],
         fontSize=16,
         textColor=colors.HexColor('#4A5568'),
         alignment=TA_LEFT,
-        spaceBefore=12,  # Reduced from 20
-        spaceAfter=8,    # Reduced from 15
+        spaceBefore=12,
+        spaceAfter=8,
         fontName='Helvetica-Bold'
     )
     
-    normal_style = ParagraphStyle(
+    report_styles['normal'] = ParagraphStyle(
         'NormalStyle',
         parent=styles['Normal'],
         fontSize=10,
         textColor=colors.HexColor('#2D3748'),
         alignment=TA_LEFT,
-        spaceAfter=6,    # Reduced from 8
-        leading=13       # Reduced from 14
+        spaceAfter=6,
+        leading=13
     )
     
-    table_header_style = ParagraphStyle(
+    report_styles['table_header'] = ParagraphStyle(
         'TableHeader',
         parent=styles['Normal'],
         fontSize=10,
@@ -135,43 +398,72 @@ def generate_admin_report(users_db, found_items_db, lost_items_db, claims_db, ad
         leading=12
     )
     
-    table_cell_style = ParagraphStyle(
+    report_styles['table_cell'] = ParagraphStyle(
         'TableCell',
         parent=styles['Normal'],
         fontSize=9,
         textColor=colors.HexColor('#2D3748'),
         alignment=TA_CENTER,
-        leading=11       # Reduced from 12
+        leading=11
     )
     
-    small_style = ParagraphStyle(
+    report_styles['small'] = ParagraphStyle(
         'SmallStyle',
         parent=styles['Normal'],
         fontSize=8,
         textColor=colors.HexColor('#718096'),
         alignment=TA_CENTER,
-        leading=11       # Reduced from 12
+        leading=11
     )
     
+    # Section headings stay on the same page as the first chunk of their table
+    report_styles['section_heading'] = ParagraphStyle('SectionHeading', parent=report_styles['section'], keepWithNext=1)
+    report_styles['subsection_heading'] = ParagraphStyle('SubSectionHeading', parent=report_styles['subsection'], keepWithNext=1)
+    return report_styles
+
+
+def _small_table(data, styles, col_widths, table_style):
+    """Fixed-size summary table; these are small enough to format with Paragraphs"""
+    formatted = []
+    for row in data:
+        formatted_row = []
+        for cell in row:
+            if isinstance(cell, str) and cell.startswith('<b>'):
+                formatted_row.append(Paragraph(cell, styles['table_header']))
+            else:
+                formatted_row.append(Paragraph(str(cell), styles['table_cell']))
+        formatted.append(formatted_row)
+    table = Table(formatted, colWidths=col_widths)
+    table.setStyle(table_style)
+    return table
+
+
+def _report_story(summary, rows, styles, doc_width, sections=None, fragments=None, period=None):
+    """Generate the report flowables in order, pulling section rows lazily.
+    
+    sections  -- data section keys to include (default all)
+    fragments -- section key -> flowables (CachedPages) used instead of rows
+    period    -- description of the date range the report covers
+    """
+    total_users = summary.get('total_users', 0)
+    total_found = summary.get('total_found', 0)
+    total_lost = summary.get('total_lost', 0)
+    total_claims = summary.get('total_claims', 0)
+    total_admins = summary.get('total_admins', 0) or 1
+    
     # ==================== COVER PAGE ====================
-    story.append(Spacer(1, 50))
-    story.append(Paragraph("CAMPUS LOST & FOUND SYSTEM", title_style))
-    story.append(Spacer(1, 10))
-    story.append(Paragraph("Comprehensive Administrative Report", subsection_style))
-    story.append(Spacer(1, 30))
-    
-    story.append(Paragraph(f"<b>Report Generated:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", 
-                          ParagraphStyle('Metadata', parent=normal_style, alignment=TA_CENTER, spaceAfter=3)))
-    story.append(Paragraph("<b>System Version:</b> 2.0", 
-                          ParagraphStyle('Metadata', parent=normal_style, alignment=TA_CENTER, spaceAfter=3)))
-    story.append(Spacer(1, 40))
-    
-    # Quick stats
-    total_users = len(users_db) if users_db else 0
-    total_found = len(found_items_db) if found_items_db else 0
-    total_lost = len(lost_items_db) if lost_items_db else 0
-    total_claims = len(claims_db) if claims_db else 0
-    total_admins = len(admins_db) if admins_db else 1
+    yield Spacer(1, 50)
+    yield Paragraph("CAMPUS LOST & FOUND SYSTEM", styles['title'])
+    yield Spacer(1, 10)
+    yield Paragraph("Comprehensive Administrative Report", styles['subsection'])
+    yield Spacer(1, 30)
+    
+    metadata_style = ParagraphStyle('Metadata', parent=styles['normal'], alignment=TA_CENTER, spaceAfter=3)
+    yield Paragraph(f"<b>Report Generated:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", metadata_style)
+    if period:
+        yield Paragraph(f"<b>Period:</b> {period}", metadata_style)
+    yield Paragraph("<b>System Version:</b> 2.0", metadata_style)
+    yield Spacer(1, 40)
     
     quick_stats = [
         ['<b>Metric</b>', '<b>Count</b>'],
@@ -181,19 +473,7 @@ def generate_admin_report(users_db, found_items_db, lost_items_db, claims_db, ad
         ['Total Claims', str(total_claims)],
         ['Administrators', str(total_admins)]
     ]
-    
-    formatted_stats = []
-    for row in quick_stats:
-        formatted_row = []
-        for cell in row:
-            if isinstance(cell, str) and cell.startswith('<b>'):
-                formatted_row.append(Paragraph(cell, table_header_style))
-            else:
-                formatted_row.append(Paragraph(str(cell), table_cell_style))
-        formatted_stats.append(formatted_row)
-    
-    quick_table = Table(formatted_stats, colWidths=[3*cm, 2*cm])
-    quick_table.setStyle(TableStyle([
+    yield _small_table(quick_stats, styles, [3*cm, 2*cm], TableStyle([
         ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2B6CB0')),
         ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
         ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
@@ -206,18 +486,14 @@ def generate_admin_report(users_db, found_items_db, lost_items_db, claims_db, ad
         ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F0F9FF')]),
         ('BOX', (0, 0), (-1, -1), 1, colors.HexColor('#2B6CB0')),
     ]))
-    
-    story.append(quick_table)
-    story.append(Spacer(1, 60))
-    story.append(Paragraph("Confidential - For Administrative Use Only", small_style))
-    story.append(PageBreak())
+    yield Spacer(1, 60)
+    yield Paragraph("Confidential - For Administrative Use Only", styles['small'])
+    yield PageBreak()
     
     # ==================== TABLE OF CONTENTS ====================
-    story.append(Paragraph("TABLE OF CONTENTS", section_style))
-    story.append(Spacer(1, 15))
+    yield Paragraph("TABLE OF CONTENTS", styles['section'])
+    yield Spacer(1, 15)
     
-    # Create TOC with proper formatting
-    toc_data = []
     toc_pages = [3, 4, 5, 6, 7, 8, 9]
     toc_items = [
         "1. SYSTEM SUMMARY",
@@ -228,13 +504,9 @@ def generate_admin_report(users_db, found_items_db, lost_items_db, claims_db, ad
         "6. ADMINISTRATORS",
         "7. STATISTICAL ANALYSIS"
     ]
-    
-    for i, item in enumerate(toc_items):
-        toc_data.append([
-            Paragraph(item, normal_style),
-            Paragraph(f"Page {toc_pages[i]}", normal_style)
-        ])
-    
+    toc_skip = {heading for key, heading, *_ in DATA_SECTIONS if sections is not None and key not in sections}
+    toc_data = [[Paragraph(item, styles['normal']), Paragraph(f"Page {toc_pages[i]}", styles['normal'])]
+                for i, item in enumerate(toc_items) if item not in toc_skip]
     toc_table = Table(toc_data, colWidths=[12*cm, 3*cm])
     toc_table.setStyle(TableStyle([
         ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
@@ -244,34 +516,12 @@ def generate_admin_report(users_db, found_items_db, lost_items_db, claims_db, ad
         ('LEFTPADDING', (0, 0), (0, -1), 0),
         ('RIGHTPADDING', (1, 0), (1, -1), 0),
     ]))
-    
-    story.append(toc_table)
-    story.append(Spacer(1, 20))
-    story.append(PageBreak())
+    yield toc_table
+    yield Spacer(1, 20)
+    yield PageBreak()
     
     # ==================== 1. SYSTEM SUMMARY ====================
-    # Use KeepTogether to prevent breaking
-    summary_section = []
-    summary_section.append(Paragraph("1. SYSTEM SUMMARY", section_style))
-    summary_section.append(Spacer(1, 5))
-    
-    # Calculate statistics
-    active_users = sum(1 for u in users_db.values() if isinstance(u, dict) and u.get('is_active', True)) if users_db else 0
-    
-    pending_claims = 0
-    approved_claims = 0
-    rejected_claims = 0
-    if claims_db:
-        for c in claims_db.values():
-            if isinstance(c, dict):
-                status = c.get('status', 'pending')
-                if status == 'pending':
-                    pending_claims += 1
-                elif status == 'approved':
-                    approved_claims += 1
-                elif status == 'rejected':
-                    rejected_claims += 1
-    
+    active_users = summary.get('active_users', 0)
     summary_data = [
         ['<b>Metric</b>', '<b>Count</b>', '<b>Details</b>'],
         ['Total Users', str(total_users), 'All registered users'],
@@ -281,23 +531,11 @@ def generate_admin_report(users_db, found_items_db, lost_items_db, claims_db, ad
         ['Found Items', str(total_found), 'Items posted as found'],
         ['Lost Items', str(total_lost), 'Items reported lost'],
         ['Total Claims', str(total_claims), 'All claim requests'],
-        ['Pending Claims', str(pending_claims), 'Awaiting approval'],
-        ['Approved Claims', str(approved_claims), 'Successfully approved'],
-        ['Rejected Claims', str(rejected_claims), 'Rejected claims']
+        ['Pending Claims', str(summary.get('pending_claims', 0)), 'Awaiting approval'],
+        ['Approved Claims', str(summary.get('approved_claims', 0)), 'Successfully approved'],
+        ['Rejected Claims', str(summary.get('rejected_claims', 0)), 'Rejected claims']
     ]
-    
-    formatted_summary = []
-    for row in summary_data:
-        formatted_row = []
-        for cell in row:
-            if isinstance(cell, str) and cell.startswith('<b>'):
-                formatted_row.append(Paragraph(cell, table_header_style))
-            else:
-                formatted_row.append(Paragraph(str(cell), table_cell_style))
-        formatted_summary.append(formatted_row)
-    
-    summary_table = Table(formatted_summary, colWidths=[4*cm, 2*cm, 6*cm])
-    summary_table.setStyle(TableStyle([
+    summary_table = _small_table(summary_data, styles, [4*cm, 2*cm, 6*cm], TableStyle([
         ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2F855A')),
         ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
         ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
@@ -314,351 +552,51 @@ def generate_admin_report(users_db, found_items_db, lost_items_db, claims_db, ad
         ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#F0FFF4')]),
         ('BOX', (0, 0), (-1, -1), 1, colors.HexColor('#2F855A')),
     ]))
-    
-    summary_section.append(summary_table)
-    summary_section.append(Spacer(1, 20))
-    
-    # Keep the entire summary section together
-    story.append(KeepTogether(summary_section))
-    
-    # ==================== 2. USER DETAILS ====================
-    if users_db and len(users_db) > 0:
-        user_section = []
-        user_section.append(Paragraph("2. USER DETAILS", section_style))
-        user_section.append(Paragraph(f"Total Users: {total_users}", subsection_style))
-        user_section.append(Spacer(1, 8))
-        
-        user_headers = ['<b>Username</b>', '<b>Email</b>', '<b>Type</b>', '<b>Department</b>', '<b>Joined</b>', '<b>Status</b>']
-        user_data = [user_headers]
-        
-        for username, user in users_db.items():
-            if isinstance(user, dict):
-                user_type = user.get('user_type', 'student').title()
-                department = user.get('department', 'N/A')
-                if department != 'N/A':
-                    department = department.replace('_', ' ').title()
-                
-                status = 'Active' if user.get('is_active', True) else 'Inactive'
-                
-                # Use helper function for date formatting
-                join_date = format_short_date_for_pdf(user.get('created_at', 'N/A'))
-                
-                user_data.append([
-                    username,
-                    user.get('email', 'N/A'),
-                    user_type,
-                    department,
-                    join_date,
-                    status
-                ])
-        
-        if len(user_data) > 1:
-            formatted_user_data = []
-            for row in user_data:
-                formatted_row = []
-                for cell in row:
-                    if isinstance(cell, str) and cell.startswith('<b>'):
-                        formatted_row.append(Paragraph(cell, table_header_style))
-                    else:
-                        formatted_row.append(Paragraph(str(cell), table_cell_style))
-                formatted_user_data.append(formatted_row)
-            
-            # Reduce table height by adjusting row heights
-            user_table = Table(formatted_user_data, colWidths=[2.2*cm, 4.8*cm, 1.8*cm, 2.8*cm, 2*cm, 1.8*cm])
-            user_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2B6CB0')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-                ('TOPPADDING', (0, 0), (-1, 0), 6),
-                ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
-                ('TOPPADDING', (0, 1), (-1, -1), 4),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#F7FAFC')),
-                ('GRID', (0, 0), (-1, -1), 0.3, colors.HexColor('#E2E8F0')),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#EFF6FF')]),
-                ('BOX', (0, 0), (-1, -1), 0.5, colors.HexColor('#2B6CB0')),
-            ]))
-            user_section.append(user_table)
-        else:
-            user_section.append(Paragraph("No user data available", normal_style))
-        
-        user_section.append(Spacer(1, 15))
-        story.append(KeepTogether(user_section))
-    
-    # ==================== 3. FOUND ITEMS ====================
-    if found_items_db and len(found_items_db) > 0:
-        found_section = []
-        found_section.append(Paragraph("3. FOUND ITEMS", section_style))
-        found_section.append(Paragraph(f"Total Found Items: {total_found}", subsection_style))
-        found_section.append(Spacer(1, 8))
-        
-        found_headers = ['<b>ID</b>', '<b>Device</b>', '<b>Posted By</b>', '<b>Location</b>', '<b>Status</b>', '<b>Date</b>']
-        found_data = [found_headers]
-        
-        for item_id, item in found_items_db.items():
-            if isinstance(item, dict):
-                # Use helper function for date formatting
-                posted_date = format_short_date_for_pdf(item.get('posted_date', 'N/A'))
-                
-                found_data.append([
-                    str(item_id),
-                    item.get('device_name', 'N/A'),
-                    item.get('posted_by', 'N/A'),
-                    item.get('location', 'N/A'),
-                    item.get('status', 'active').title(),
-                    posted_date
-                ])
-        
-        if len(found_data) > 1:
-            formatted_found_data = []
-            for row in found_data:
-                formatted_row = []
-                for cell in row:
-                    if isinstance(cell, str) and cell.startswith('<b>'):
-                        formatted_row.append(Paragraph(cell, table_header_style))
-                    else:
-                        formatted_row.append(Paragraph(str(cell), table_cell_style))
-                formatted_found_data.append(formatted_row)
-            
-            found_table = Table(formatted_found_data, colWidths=[1.2*cm, 3.2*cm, 2.2*cm, 2.8*cm, 2.2*cm, 2.2*cm])
-            found_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#D69E2E')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-                ('TOPPADDING', (0, 0), (-1, 0), 6),
-                ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
-                ('TOPPADDING', (0, 1), (-1, -1), 4),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#FFFBEB')),
-                ('GRID', (0, 0), (-1, -1), 0.3, colors.HexColor('#FBD38D')),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#FFFBEB')]),
-                ('BOX', (0, 0), (-1, -1), 0.5, colors.HexColor('#D69E2E')),
-            ]))
-            found_section.append(found_table)
-        else:
-            found_section.append(Paragraph("No found items data available", normal_style))
-        
-        found_section.append(Spacer(1, 15))
-        
-        # Check if we should break page before this section
-        # If previous section was large, add page break
-        if len(story) > 3 and isinstance(story[-2], KeepTogether):
-            # Check approximate height of previous content
-            story.append(PageBreak())
+    yield KeepTogether([Paragraph("1. SYSTEM SUMMARY", styles['section']), Spacer(1, 5),
+                        summary_table, Spacer(1, 20)])
+    
+    # ==================== 2-5. DATA SECTIONS ====================
+    for key, heading, subtitle, total_key, headers, col_widths, format_row, palette in DATA_SECTIONS:
+        total = summary.get(total_key, 0)
+        if not total or (sections is not None and key not in sections):
+            continue
+        if fragments is not None and key in fragments:
+            for fragment in fragments[key]:
+                yield NotAtTopPageBreak()
+                yield fragment
+            # Whatever follows starts on a fresh page after the cached ones
+            continue
+        yield Paragraph(heading, styles['section_heading'])
+        yield Paragraph(f"{subtitle}: {total}", styles['subsection_heading'])
         
-        story.append(KeepTogether(found_section))
-    
-    # ==================== 4. LOST ITEMS ====================
-    if lost_items_db and len(lost_items_db) > 0:
-        lost_section = []
-        lost_section.append(Paragraph("4. LOST ITEMS", section_style))
-        lost_section.append(Paragraph(f"Total Lost Items: {total_lost}", subsection_style))
-        lost_section.append(Spacer(1, 8))
-        
-        lost_headers = ['<b>ID</b>', '<b>Device</b>', '<b>Posted By</b>', '<b>Location</b>', '<b>Status</b>', '<b>Lost Date</b>']
-        lost_data = [lost_headers]
-        
-        for item_id, item in lost_items_db.items():
-            if isinstance(item, dict):
-                # Use helper function for date formatting
-                lost_date_value = item.get('lost_date') or item.get('posted_date', 'N/A')
-                lost_date = format_short_date_for_pdf(lost_date_value)
-                
-                lost_data.append([
-                    str(item_id),
-                    item.get('device_name', 'N/A'),
-                    item.get('posted_by', 'N/A'),
-                    item.get('location', 'N/A'),
-                    item.get('status', 'active').title(),
-                    lost_date
-                ])
-        
-        if len(lost_data) > 1:
-            formatted_lost_data = []
-            for row in lost_data:
-                formatted_row = []
-                for cell in row:
-                    if isinstance(cell, str) and cell.startswith('<b>'):
-                        formatted_row.append(Paragraph(cell, table_header_style))
-                    else:
-                        formatted_row.append(Paragraph(str(cell), table_cell_style))
-                formatted_lost_data.append(formatted_row)
-            
-            lost_table = Table(formatted_lost_data, colWidths=[1.2*cm, 3.2*cm, 2.2*cm, 2.8*cm, 2.2*cm, 2.2*cm])
-            lost_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#C53030')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-                ('TOPPADDING', (0, 0), (-1, 0), 6),
-                ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
-                ('TOPPADDING', (0, 1), (-1, -1), 4),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#FFF5F5')),
-                ('GRID', (0, 0), (-1, -1), 0.3, colors.HexColor('#FEB2B2')),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#FFF5F5')]),
-                ('BOX', (0, 0), (-1, -1), 0.5, colors.HexColor('#C53030')),
-            ]))
-            lost_section.append(lost_table)
-        else:
-            lost_section.append(Paragraph("No lost items data available", normal_style))
-        
-        lost_section.append(Spacer(1, 15))
-        story.append(KeepTogether(lost_section))
-    
-    # ==================== 5. CLAIMS ANALYSIS ====================
-    if claims_db and len(claims_db) > 0:
-        # Try to group small sections together
-        claims_section = []
-        claims_section.append(Paragraph("5. CLAIMS ANALYSIS", section_style))
-        claims_section.append(Paragraph(f"Total Claims: {total_claims}", subsection_style))
-        claims_section.append(Spacer(1, 8))
-        
-        claims_headers = ['<b>ID</b>', '<b>Claimant</b>', '<b>Owner</b>', '<b>Status</b>', '<b>Date</b>', '<b>Item</b>']
-        claims_data = [claims_headers]
-        
-        for claim_id, claim in claims_db.items():
-            if isinstance(claim, dict):
-                item_name = "Unknown"
-                found_item_id = claim.get('found_item_id')
-                if found_item_id and found_items_db and found_item_id in found_items_db:
-                    item = found_items_db.get(found_item_id, {})
-                    if isinstance(item, dict):
-                        item_name = item.get('device_name', 'Unknown')
-                
-                # Use helper function for date formatting
-                claim_date = format_short_date_for_pdf(claim.get('claim_date', 'N/A'))
-                
-                claims_data.append([
-                    str(claim_id),
-                    claim.get('claimant_username', 'N/A'),
-                    claim.get('owner_username', 'N/A'),
-                    claim.get('status', 'pending').title(),
-                    claim_date,
-                    item_name
-                ])
-        
-        if len(claims_data) > 1:
-            formatted_claims_data = []
-            for row in claims_data:
-                formatted_row = []
-                for cell in row:
-                    if isinstance(cell, str) and cell.startswith('<b>'):
-                        formatted_row.append(Paragraph(cell, table_header_style))
-                    else:
-                        formatted_row.append(Paragraph(str(cell), table_cell_style))
-                formatted_claims_data.append(formatted_row)
-            
-            claims_table = Table(formatted_claims_data, colWidths=[1.2*cm, 2.2*cm, 2.2*cm, 2.2*cm, 2.2*cm, 3.2*cm])
-            claims_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#805AD5')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 9),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-                ('TOPPADDING', (0, 0), (-1, 0), 6),
-                ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
-                ('TOPPADDING', (0, 1), (-1, -1), 4),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#FAF5FF')),
-                ('GRID', (0, 0), (-1, -1), 0.3, colors.HexColor('#D6BCFA')),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#FAF5FF')]),
-                ('BOX', (0, 0), (-1, -1), 0.5, colors.HexColor('#805AD5')),
-            ]))
-            claims_section.append(claims_table)
-        else:
-            claims_section.append(Paragraph("No claims data available", normal_style))
-        
-        claims_section.append(Spacer(1, 15))
-        story.append(KeepTogether(claims_section))
+        header = [Paragraph(f"<b>{h}</b>", styles['table_header']) for h in headers]
+        emitted = False
+        for table in _table_chunks(rows.get(key, ()), format_row, header, col_widths, _data_table_style(*palette)):
+            emitted = True
+            yield table
+        if not emitted:
+            yield Paragraph(f"No {heading.split(' ', 1)[1].lower()} data available", styles['normal'])
+        yield Spacer(1, 15)
     
     # ==================== 6. ADMINISTRATORS ====================
-    # Group admins with stats if possible
-    admin_section = []
-    admin_section.append(Paragraph("6. ADMINISTRATORS", section_style))
-    admin_section.append(Spacer(1, 8))
-    
-    admin_headers = ['<b>Username</b>', '<b>Created By</b>', '<b>Created At</b>']
-    admin_data = [admin_headers]
-    
-    for username, admin in admins_db.items():
-        if isinstance(admin, dict):
-            # Use helper function for date formatting
-            created_at = format_date_for_pdf(admin.get('created_at', 'N/A'))
-            
-            admin_data.append([
-                username,
-                admin.get('created_by', 'system'),
-                created_at
-            ])
-    
-    if len(admin_data) > 1:
-        formatted_admin_data = []
-        for row in admin_data:
-            formatted_row = []
-            for cell in row:
-                if isinstance(cell, str) and cell.startswith('<b>'):
-                    formatted_row.append(Paragraph(cell, table_header_style))
-                else:
-                    formatted_row.append(Paragraph(str(cell), table_cell_style))
-            formatted_admin_data.append(formatted_row)
-        
-        admin_table = Table(formatted_admin_data, colWidths=[3*cm, 3*cm, 4*cm])
-        admin_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4A5568')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-            ('TOPPADDING', (0, 0), (-1, 0), 6),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 4),
-            ('TOPPADDING', (0, 1), (-1, -1), 4),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#F7FAFC')),
-            ('GRID', (0, 0), (-1, -1), 0.3, colors.HexColor('#CBD5E0')),
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#EDF2F7')]),
-            ('BOX', (0, 0), (-1, -1), 0.5, colors.HexColor('#4A5568')),
-        ]))
-        admin_section.append(admin_table)
-    else:
-        admin_section.append(Paragraph("No admin data available", normal_style))
-    
-    admin_section.append(Spacer(1, 15))
+    headers, col_widths, format_row, palette = ADMIN_SECTION
+    yield Paragraph("6. ADMINISTRATORS", styles['section_heading'])
+    header = [Paragraph(f"<b>{h}</b>", styles['table_header']) for h in headers]
+    emitted = False
+    for table in _table_chunks(rows.get('admins', ()), format_row, header, col_widths, _data_table_style(*palette)):
+        emitted = True
+        yield table
+    if not emitted:
+        yield Paragraph("No admin data available", styles['normal'])
+    yield Spacer(1, 15)
     
     # ==================== 7. STATISTICAL ANALYSIS ====================
-    admin_section.append(Paragraph("7. STATISTICAL ANALYSIS", section_style))
-    admin_section.append(Spacer(1, 8))
-    
-    # Calculate statistics
-    active_found = sum(1 for item in found_items_db.values() 
-                      if isinstance(item, dict) and item.get('status', 'active') == 'active') if found_items_db else 0
-    claimed_found = sum(1 for item in found_items_db.values() 
-                       if isinstance(item, dict) and item.get('status', 'active') == 'claimed') if found_items_db else 0
-    
-    active_lost = sum(1 for item in lost_items_db.values() 
-                     if isinstance(item, dict) and item.get('status', 'active') == 'active') if lost_items_db else 0
-    found_lost = sum(1 for item in lost_items_db.values() 
-                    if isinstance(item, dict) and item.get('status', 'active') == 'found') if lost_items_db else 0
-    
-    pending_claims_count = sum(1 for claim in claims_db.values() 
-                              if isinstance(claim, dict) and claim.get('status', 'pending') == 'pending') if claims_db else 0
-    resolved_claims_count = sum(1 for claim in claims_db.values() 
-                               if isinstance(claim, dict) and claim.get('status', 'pending') in ['approved', 'rejected']) if claims_db else 0
+    active_found = summary.get('active_found', 0)
+    claimed_found = summary.get('claimed_found', 0)
+    active_lost = summary.get('active_lost', 0)
+    found_lost = summary.get('found_lost', 0)
+    pending_claims_count = summary.get('pending_claims', 0)
+    resolved_claims_count = summary.get('approved_claims', 0) + summary.get('rejected_claims', 0)
     
     stats_data = [
         ['<b>Category</b>', '<b>Active</b>', '<b>Resolved</b>', '<b>Total</b>', '<b>Resolution Rate</b>'],
@@ -669,19 +607,7 @@ def generate_admin_report(users_db, found_items_db, lost_items_db, claims_db, ad
         ['Claims', str(pending_claims_count), str(resolved_claims_count), str(total_claims),
          f"{round((resolved_claims_count/total_claims*100), 1) if total_claims > 0 else 0.0}%"]
     ]
-    
-    formatted_stats_data = []
-    for row in stats_data:
-        formatted_row = []
-        for cell in row:
-            if isinstance(cell, str) and cell.startswith('<b>'):
-                formatted_row.append(Paragraph(cell, table_header_style))
-            else:
-                formatted_row.append(Paragraph(str(cell), table_cell_style))
-        formatted_stats_data.append(formatted_row)
-    
-    stats_table = Table(formatted_stats_data, colWidths=[3.2*cm, 2*cm, 2*cm, 2*cm, 3.2*cm])
-    stats_table.setStyle(TableStyle([
+    stats_table = _small_table(stats_data, styles, [3.2*cm, 2*cm, 2*cm, 2*cm, 3.2*cm], TableStyle([
         ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2D3748')),
         ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
         ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
@@ -699,40 +625,140 @@ def generate_admin_report(users_db, found_items_db, lost_items_db, claims_db, ad
         ('FONTSIZE', (0, 1), (-1, -1), 9),
         ('BOX', (0, 0), (-1, -1), 1, colors.HexColor('#2D3748')),
     ]))
-    
-    admin_section.append(stats_table)
-    admin_section.append(Spacer(1, 25))
-    
-    # Group admins and stats together
-    story.append(KeepTogether(admin_section))
+    yield KeepTogether([Paragraph("7. STATISTICAL ANALYSIS", styles['section']), Spacer(1, 8),
+                        stats_table, Spacer(1, 25)])
     
     # ==================== FOOTER ====================
-    story.append(Spacer(1, 30))
+    yield Spacer(1, 30)
     
-    # Add horizontal line
-    footer_line = Table([['']], colWidths=[doc.width])
+    footer_line = Table([['']], colWidths=[doc_width])
     footer_line.setStyle(TableStyle([
         ('LINEABOVE', (0, 0), (-1, 0), 0.5, colors.HexColor('#E2E8F0')),
     ]))
-    story.append(footer_line)
-    story.append(Spacer(1, 8))
+    yield footer_line
+    yield Spacer(1, 8)
     
-    story.append(Paragraph("COMPREHENSIVE ADMIN REPORT - CAMPUS LOST & FOUND SYSTEM", small_style))
-    story.append(Paragraph(f"Report generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", small_style))
-    story.append(Paragraph("Confidential - For Administrative Use Only", small_style))
-    story.append(Paragraph("--- END OF REPORT ---", small_style))
+    yield Paragraph("COMPREHENSIVE ADMIN REPORT - CAMPUS LOST & FOUND SYSTEM", styles['small'])
+    yield Paragraph(f"Report generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles['small'])
+    yield Paragraph("Confidential - For Administrative Use Only", styles['small'])
+    yield Paragraph("--- END OF REPORT ---", styles['small'])
+
+
+def _fragment_story(section, label, count, rows, styles):
+    """Flowables for one section's rows over one period, headed so they stand alone"""
+    key, heading, subtitle, total_key, headers, col_widths, format_row, palette = section
+    yield Paragraph(f"{heading}: {label}", styles['section_heading'])
+    yield Paragraph(f"{subtitle}: {count}", styles['subsection_heading'])
+    header = [Paragraph(f"<b>{h}</b>", styles['table_header']) for h in headers]
+    yield from _table_chunks(rows, format_row, header, col_widths, _data_table_style(*palette))
+
+
+def _report_doc(output, **kwargs):
+    return SimpleDocTemplate(
+        output, 
+        pagesize=A4,
+        title="Campus Lost & Found System Report",
+        author="Admin Panel",
+        leftMargin=1.5*cm,
+        rightMargin=1.5*cm,
+        topMargin=2*cm,
+        bottomMargin=2*cm,
+        **kwargs
+    )
+
+
+def render_section_fragment(section_key, label, count, rows):
+    """Render one section's rows for one period to a list of cached pages.
+    
+    The pages can be spliced into any report with CachedPages, so a period
+    whose data has not changed never has to be laid out again.
+    """
+    section = next(s for s in DATA_SECTIONS if s[0] == section_key)
+    doc = _report_doc(BytesIO())
+    doc.build(FlowableStream(_fragment_story(section, label, count, rows, _report_styles())),
+              canvasmaker=PageCapture)
+    return doc.canv.captured
+
+
+def render_admin_report(summary, rows, output=None, sections=None, fragments=None, period=None, error_page=True):
+    """Render the admin report from summary counts and per-section row iterables.
+    
+    summary -- dict of totals (total_users, active_users, total_found, ...)
+    rows    -- dict of iterables of row dicts keyed users / found_items /
+               lost_items / claims / admins; each is consumed once, in order
+    output  -- writable binary file; defaults to a spooled temporary file
+    sections, fragments, period -- see _report_story
+    error_page -- on failure, render a one-page error report instead of raising
+    Returns the output file, rewound to the start.
+    """
+    if output is None:
+        output = SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    
+    doc = _report_doc(output)
+    styles = _report_styles()
     
-    # Build PDF
     try:
-        doc.build(story)
+        story = _report_story(summary, rows, styles, doc.width, sections, fragments, period)
+        doc.build(FlowableStream(story), canvasmaker=CompactCanvas)
     except Exception as e:
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
+        if not error_page:
+            raise
+        output.seek(0)
+        output.truncate()
+        doc = SimpleDocTemplate(output, pagesize=A4)
         error_story = []
-        error_story.append(Paragraph("ERROR GENERATING REPORT", section_style))
-        error_story.append(Paragraph(f"An error occurred: {str(e)}", normal_style))
-        error_story.append(Paragraph("Please check the application logs for more details.", normal_style))
+        error_story.append(Paragraph("ERROR GENERATING REPORT", styles['section']))
+        error_story.append(Paragraph(f"An error occurred: {str(e)}", styles['normal']))
+        error_story.append(Paragraph("Please check the application logs for more details.", styles['normal']))
         doc.build(error_story)
     
-    buffer.seek(0)
-    return buffer
\ No newline at end of file
+    output.seek(0)
+    return output
+
+
+def summarize_report_data(users_db, found_items_db, lost_items_db, claims_db, admins_db):
+    """Report summary counts computed from in-memory dicts"""
+    def count(rows, field, value, default):
+        return sum(1 for row in rows.values() if isinstance(row, dict) and row.get(field, default) == value) if rows else 0
+    
+    return {
+        'total_users': len(users_db) if users_db else 0,
+        'active_users': count(users_db, 'is_active', True, True),
+        'total_found': len(found_items_db) if found_items_db else 0,
+        'active_found': count(found_items_db, 'status', 'active', 'active'),
+        'claimed_found': count(found_items_db, 'status', 'claimed', 'active'),
+        'total_lost': len(lost_items_db) if lost_items_db else 0,
+        'active_lost': count(lost_items_db, 'status', 'active', 'active'),
+        'found_lost': count(lost_items_db, 'status', 'found', 'active'),
+        'total_claims': len(claims_db) if claims_db else 0,
+        'pending_claims': count(claims_db, 'status', 'pending', 'pending'),
+        'approved_claims': count(claims_db, 'status', 'approved', 'pending'),
+        'rejected_claims': count(claims_db, 'status', 'rejected', 'pending'),
+        'total_admins': len(admins_db) if admins_db else 0,
+    }
+
+
+def generate_admin_report(users_db, found_items_db, lost_items_db, claims_db, admins_db):
+    """Generate the admin PDF report from dicts of rows keyed by username / id"""
+    found_items_db = found_items_db or {}
+    
+    def keyed(rows, key_field):
+        for key, row in (rows or {}).items():
+            if isinstance(row, dict):
+                yield dict(row, **{key_field: key})
+    
+    def claims_with_items():
+        for claim in keyed(claims_db, 'id'):
+            item = found_items_db.get(claim.get('found_item_id'))
+            claim['item_name'] = item.get('device_name', 'Unknown') if isinstance(item, dict) else 'Unknown'
+            yield claim
+    
+    rows = {
+        'users': keyed(users_db, 'username'),
+        'found_items': keyed(found_items_db, 'id'),
+        'lost_items': keyed(lost_items_db, 'id'),
+        'claims': claims_with_items(),
+        'admins': keyed(admins_db, 'username'),
+    }
+    summary = summarize_report_data(users_db, found_items_db, lost_items_db, claims_db, admins_db)
+    return render_admin_report(summary, rows)
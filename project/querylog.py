@@ -0,0 +1,257 @@
+import re
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_RE = re.compile(r'\bIN \(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)', re.I)
+_ROWS_RE = re.compile(r'(\([^()]*\))(?:\s*,\s*\1)+')
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(sql):
+    """One text per query shape: whitespace collapsed, literals as ?, IN lists
+    and multi-row VALUES of any length alike. Cached, since the app sends the
+    same few hundred strings over and over."""
+    sql = ' '.join(sql.split())
+    sql = _NUMBER_RE.sub('?', _STRING_RE.sub('?', sql))
+    sql = _IN_RE.sub('IN (...)', sql)
+    return _ROWS_RE.sub(r'\1, ...', sql)
+
+
+class Statement:
+    __slots__ = ('sql', 'params', 'seconds', 'rows', 'fetched', 'route')
+
+    def __init__(self, sql, params, route):
+        self.sql = sql
+        self.params = params
+        self.seconds = 0.0
+        self.rows = 0
+        self.fetched = False
+        self.route = route
+
+
+class _Request:
+    __slots__ = ('route', 'started', 'statements')
+
+    def __init__(self, route):
+        self.route = route
+        self.started = time.perf_counter()
+        self.statements = []
+
+
+class QueryLog:
+    """Timing of every SQL statement, per request and per query shape.
+
+    Connections from ``wrap()`` time each execute plus the fetches that
+    follow it. Statements issued inside ``begin_request()`` /
+    ``end_request()`` are kept for that request's breakdown; all of them
+    are folded into per-minute buckets behind ``slowest()``. The hot path is
+    two perf_counter() calls and a list append per statement; normalizing
+    and locking happen once per request.
+    """
+
+    def __init__(self, window=300, bucket_seconds=60, max_shapes=2000, slow_requests=50):
+        self.window = window
+        self.bucket_seconds = bucket_seconds
+        self.max_shapes = max_shapes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._buckets = deque()   # (bucket number, {normalized sql: [count, seconds, max seconds, rows, {route: count}]})
+        self.slow_requests = deque(maxlen=slow_requests)
+
+    def wrap(self, conn):
+        return InstrumentedConnection(conn, self)
+
+    # ---- requests ----
+    def begin_request(self, route):
+        self._local.request = _Request(route)
+
+    def end_request(self, slow_ms=None, label=None):
+        """Fold the request's statements into the window; returns its report
+        (also kept in ``slow_requests``) if it took ``slow_ms`` or longer"""
+        req = getattr(self._local, 'request', None)
+        if req is None:
+            return None
+        self._local.request = None
+        elapsed_ms = (time.perf_counter() - req.started) * 1000
+        if req.statements:
+            self._fold(req.statements)
+        if slow_ms is None or elapsed_ms < slow_ms:
+            return None
+        report = {
+            'route': req.route,
+            'request': label,
+            'at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'elapsed_ms': round(elapsed_ms, 1),
+            'query_count': len(req.statements),
+            'query_ms': round(sum(s.seconds for s in req.statements) * 1000, 1),
+            'queries': [{'sql': normalize_sql(s.sql), 'params': s.params, 'ms': round(s.seconds * 1000, 2),
+                         'rows': s.rows} for s in req.statements],
+        }
+        self.slow_requests.append(report)
+        return report
+
+    # ---- statements ----
+    def _start(self, sql, params):
+        req = getattr(self._local, 'request', None)
+        stmt = Statement(sql, len(params) if params else 0, req.route if req else None)
+        if req is not None:
+            req.statements.append(stmt)
+        return stmt, req is not None
+
+    def _finish(self, stmt, in_request):
+        # Statements outside a request (background threads, CLI jobs) are
+        # folded one by one; request statements wait for end_request()
+        if not in_request:
+            self._fold([stmt])
+
+    def _fold(self, statements):
+        now = int(time.time() // self.bucket_seconds)
+        shapes = [(normalize_sql(s.sql), s) for s in statements]
+        with self._lock:
+            if not self._buckets or self._buckets[-1][0] != now:
+                self._buckets.append((now, {}))
+            self._expire(now)
+            bucket = self._buckets[-1][1]
+            for key, stmt in shapes:
+                entry = bucket.get(key)
+                if entry is None:
+                    if len(bucket) >= self.max_shapes:
+                        key = '(other statements)'
+                        entry = bucket.get(key)
+                    if entry is None:
+                        entry = bucket[key] = [0, 0.0, 0.0, 0, {}]
+                entry[0] += 1
+                entry[1] += stmt.seconds
+                entry[2] = max(entry[2], stmt.seconds)
+                entry[3] += stmt.rows
+                route = stmt.route or 'background'
+                entry[4][route] = entry[4].get(route, 0) + 1
+
+    def _expire(self, now):
+        oldest = now - self.window // self.bucket_seconds
+        while self._buckets and self._buckets[0][0] < oldest:
+            self._buckets.popleft()
+
+    def slowest(self, n=20, sort='total'):
+        """Top ``n`` query shapes over the window by total, mean or max time, or by count"""
+        merged = {}
+        with self._lock:
+            self._expire(int(time.time() // self.bucket_seconds))
+            for _, bucket in self._buckets:
+                for key, (count, seconds, longest, rows, routes) in bucket.items():
+                    entry = merged.setdefault(key, [0, 0.0, 0.0, 0, {}])
+                    entry[0] += count
+                    entry[1] += seconds
+                    entry[2] = max(entry[2], longest)
+                    entry[3] += rows
+                    for route, hits in routes.items():
+                        entry[4][route] = entry[4].get(route, 0) + hits
+        shapes = [{
+            'sql': key,
+            'count': count,
+            'total_ms': round(seconds * 1000, 2),
+            'mean_ms': round(seconds * 1000 / count, 3),
+            'max_ms': round(longest * 1000, 2),
+            'rows': rows,
+            'routes': dict(sorted(routes.items(), key=lambda item: -item[1])),
+        } for key, (count, seconds, longest, rows, routes) in merged.items()]
+        sort_key = {'count': 'count', 'mean': 'mean_ms', 'max': 'max_ms'}.get(sort, 'total_ms')
+        shapes.sort(key=lambda shape: shape[sort_key], reverse=True)
+        return shapes[:n]
+
+
+def format_slow_request(report, max_lines=50):
+    lines = [f"🐢 Slow request {report['request'] or ''} ({report['route']}): {report['elapsed_ms']} ms, "
+             f"{report['query_count']} queries taking {report['query_ms']} ms"]
+    for query in report['queries'][:max_lines]:
+        lines.append(f"    {query['ms']:9.2f} ms {query['rows']:6d} rows {query['params']:3d} params  {query['sql'][:200]}")
+    if len(report['queries']) > max_lines:
+        lines.append(f"    ... {len(report['queries']) - max_lines} more")
+    return '\n'.join(lines)
+
+
+class InstrumentedConnection:
+    """A DB-API connection whose cursors report to a QueryLog"""
+
+    def __init__(self, conn, log):
+        self._conn = conn
+        self._log = log
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._conn.cursor(*args, **kwargs), self._log)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class InstrumentedCursor:
+    """Times execute() and the fetches after it as one statement"""
+
+    def __init__(self, cursor, log):
+        self._cursor = cursor
+        self._log = log
+        self._stmt = None
+        self._in_request = False
+
+    def _done(self):
+        stmt = self._stmt
+        if stmt is not None:
+            self._stmt = None
+            if not stmt.fetched:
+                # Writes: affected rows (unbuffered SELECTs report -1 until fetched)
+                stmt.rows = max(self._cursor.rowcount or 0, 0)
+            self._log._finish(stmt, self._in_request)
+
+    def _run(self, method, operation, params):
+        self._done()
+        self._stmt, self._in_request = self._log._start(operation, params)
+        start = time.perf_counter()
+        try:
+            return method(operation, params)
+        finally:
+            self._stmt.seconds += time.perf_counter() - start
+
+    def execute(self, operation, params=()):
+        return self._run(self._cursor.execute, operation, params)
+
+    def executemany(self, operation, seq_params):
+        return self._run(self._cursor.executemany, operation, seq_params)
+
+    def _fetched(self, start, rows):
+        stmt = self._stmt
+        if stmt is not None:
+            stmt.seconds += time.perf_counter() - start
+            stmt.rows += rows
+            stmt.fetched = True
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._fetched(start, row is not None)
+        return row
+
+    def fetchmany(self, size=1):
+        start = time.perf_counter()
+        rows = self._cursor.fetchmany(size)
+        self._fetched(start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._fetched(start, len(rows))
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        self._done()
+        return self._cursor.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
@@ -0,0 +1,534 @@
+import hashlib
+import importlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from functools import partial
+
+import mysql.connector
+from mysql.connector import Error
+
+from stats import read_stats
+from pdf_report import (DATA_SECTIONS, FRAGMENT_VERSION, SPLICE_SUPPORTED, CachedPages,
+                        render_admin_report, render_section_fragment)
+
+# Data sections are rendered per calendar month of their date column. The
+# month query returns one row per month: the summary counts plus columns that
+# change whenever a row in that month is added, removed or edited, which
+# together form the month's data version.
+SECTION_SOURCES = {
+    'users': {
+        'date_column': 'created_at',
+        'rows': """
+            SELECT username, email, user_type, department, created_at, is_active
+            FROM users WHERE {where} ORDER BY id
+        """,
+        # users rows are also touched by logins and unread counters, so instead of
+        # an updated_at the version checksums just the columns the report prints
+        'months': """
+            SELECT EXTRACT(YEAR_MONTH FROM created_at) AS month,
+                   COUNT(*) AS total_users,
+                   SUM(is_active = TRUE) AS active_users,
+                   MAX(id) AS max_id,
+                   BIT_XOR(CRC32(CONCAT_WS('|', username, email, user_type, department, is_active))) AS checksum
+            FROM users WHERE {where} GROUP BY month
+        """,
+    },
+    'found_items': {
+        'date_column': 'posted_date',
+        'rows': """
+            SELECT id, device_name, posted_by, location, status, posted_date
+            FROM found_items WHERE {where} ORDER BY id
+        """,
+        'months': """
+            SELECT EXTRACT(YEAR_MONTH FROM posted_date) AS month,
+                   COUNT(*) AS total_found,
+                   SUM(status = 'active') AS active_found,
+                   SUM(status = 'claimed') AS claimed_found,
+                   MAX(id) AS max_id,
+                   MAX(updated_at) AS updated
+            FROM found_items WHERE {where} GROUP BY month
+        """,
+    },
+    'lost_items': {
+        'date_column': 'posted_date',
+        'rows': """
+            SELECT id, device_name, posted_by, location, status, lost_date, posted_date
+            FROM lost_items WHERE {where} ORDER BY id
+        """,
+        'months': """
+            SELECT EXTRACT(YEAR_MONTH FROM posted_date) AS month,
+                   COUNT(*) AS total_lost,
+                   SUM(status = 'active') AS active_lost,
+                   SUM(status = 'found') AS found_lost,
+                   MAX(id) AS max_id,
+                   MAX(updated_at) AS updated
+            FROM lost_items WHERE {where} GROUP BY month
+        """,
+    },
+    'claims': {
+        'date_column': 'c.claim_date',
+        'rows': """
+            SELECT c.id, c.claimant_username, c.owner_username, c.status, c.claim_date, f.device_name AS item_name
+            FROM claims c LEFT JOIN found_items f ON f.id = c.found_item_id
+            WHERE {where} ORDER BY c.id
+        """,
+        # Claims print the item's name, so renaming an item changes the claims version too
+        'months': """
+            SELECT EXTRACT(YEAR_MONTH FROM c.claim_date) AS month,
+                   COUNT(*) AS total_claims,
+                   SUM(c.status = 'pending') AS pending_claims,
+                   SUM(c.status = 'approved') AS approved_claims,
+                   SUM(c.status = 'rejected') AS rejected_claims,
+                   MAX(c.id) AS max_id,
+                   MAX(c.updated_at) AS updated,
+                   MAX(f.updated_at) AS items_updated
+            FROM claims c LEFT JOIN found_items f ON f.id = c.found_item_id
+            WHERE {where} GROUP BY month
+        """,
+    },
+}
+
+# Section key -> summary key holding its row count
+SECTION_TOTALS = {section[0]: section[3] for section in DATA_SECTIONS}
+
+# Month query columns that are summary counts rather than version markers
+SUMMARY_COLUMNS = (
+    'total_users', 'active_users',
+    'total_found', 'active_found', 'claimed_found',
+    'total_lost', 'active_lost', 'found_lost',
+    'total_claims', 'pending_claims', 'approved_claims', 'rejected_claims',
+)
+
+ADMINS_QUERY = "SELECT username, created_by, created_at FROM administrators ORDER BY id"
+
+PROGRESS_EVERY = 2000   # rows between progress file updates
+STALE_AFTER = 120       # a running job whose progress file is older than this is presumed dead
+FRAGMENT_MAX_AGE = 30 * 24 * 3600  # cached fragments unused for this long are deleted
+
+
+def stream_rows(conn, query, batch_size, params=()):
+    """Yield rows of a query in batches through an unbuffered (server-side) cursor.
+
+    The query only runs when the first row is requested, so several of these
+    can be handed out on one connection as long as they are read in turn.
+    """
+    cursor = conn.cursor(dictionary=True, buffered=False)
+    try:
+        cursor.execute(query, params)
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            yield from batch
+    finally:
+        try:
+            cursor.close()
+        except Error:
+            pass  # unread rows after a failure; the connection is closed or discarded next
+
+
+# ==================== MONTHS ====================
+def _month_bounds(month):
+    """(first day, first day of next month) for a YYYYMM integer"""
+    year, month = divmod(month, 100)
+    start = date(year, month, 1)
+    return start, date(year + month // 12, month % 12 + 1, 1)
+
+
+def _date_filter(column, start=None, end=None, undated=False):
+    """WHERE clause and params for start <= column < end (either may be open)"""
+    if undated:
+        return f"{column} IS NULL", ()
+    conditions, params = [], []
+    if start:
+        conditions.append(f"{column} >= %s")
+        params.append(start)
+    if end:
+        conditions.append(f"{column} < %s")
+        params.append(end)
+    return ' AND '.join(conditions) or 'TRUE', tuple(params)
+
+
+def section_months(conn, key, date_from=None, date_to=None):
+    """Per-month counts and data versions of a section between two dates.
+
+    date_to is exclusive. Rows with no date are only included, as a final
+    month of None, when the range is open at both ends.
+    """
+    source = SECTION_SOURCES[key]
+    where, params = _date_filter(source['date_column'], date_from, date_to)
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute(source['months'].format(where=where), params)
+    months = cursor.fetchall()
+    cursor.close()
+    if date_from or date_to:
+        months = [m for m in months if m['month'] is not None]
+    months.sort(key=lambda m: (m['month'] is None, m['month'] or 0))
+    return months
+
+
+def month_fragment(month, date_from=None, date_to=None):
+    """(label, start, end) of a month clipped to the report's date range"""
+    if month is None:
+        return 'Undated', None, None
+    start, end = _month_bounds(month)
+    if date_from and date_from > start:
+        start = date_from
+    if date_to and date_to < end:
+        end = date_to
+    full = (start, end) == _month_bounds(month)
+    if full:
+        return start.strftime('%B %Y'), start, end
+    return f"{start.isoformat()} to {(end - timedelta(days=1)).isoformat()}", start, end
+
+
+def report_summary(months_by_section, total_admins):
+    """Summary counts for the report, added up from the per-month rows"""
+    summary = dict.fromkeys(SUMMARY_COLUMNS, 0)
+    summary['total_admins'] = total_admins
+    for months in months_by_section.values():
+        for month in months:
+            for column in SUMMARY_COLUMNS:
+                if column in month:
+                    summary[column] += int(month[column] or 0)
+    return summary
+
+
+# ==================== FRAGMENT CACHE ====================
+class FragmentCache:
+    """Rendered report pages on disk, one file per section and month.
+
+    A file holds a JSON header line describing its pages followed by their
+    content streams back to back. Entries are keyed by what they show, so
+    they never go stale; ones not used for ``max_age`` seconds are purged.
+    """
+
+    def __init__(self, directory, max_age=FRAGMENT_MAX_AGE):
+        self.directory = os.path.abspath(directory)
+        self.max_age = max_age
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(*parts):
+        raw = json.dumps([FRAGMENT_VERSION] + list(parts), default=str)
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.frag")
+
+    def touch(self, key):
+        """Mark a fragment as used; False if it is not cached"""
+        try:
+            os.utime(self._path(key))
+            return True
+        except OSError:
+            return False
+
+    def load(self, key):
+        with open(self._path(key), 'rb') as f:
+            header = json.loads(f.readline())
+            return [(f.read(page['length']), page['filters'], page['width'], page['height'])
+                    for page in header['pages']]
+
+    def store(self, key, pages):
+        header = {'pages': [{'length': len(content), 'filters': filters, 'width': width, 'height': height}
+                            for content, filters, width, height in pages]}
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(json.dumps(header).encode('utf-8') + b'\n')
+            for content, _, _, _ in pages:
+                f.write(content)
+        os.replace(tmp, path)
+
+    def purge(self):
+        now = time.time()
+        removed = 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if now - os.path.getmtime(path) > self.max_age:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass
+        return removed
+
+
+def _write_json(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def run_admin_report(db_config, batch_size, options, output_path, progress_path):
+    """Render the admin report to ``output_path`` (runs in a worker process).
+
+    options -- {'date_from': 'YYYY-MM-DD', 'date_to': 'YYYY-MM-DD' (inclusive),
+                'sections': [keys of SECTION_SOURCES]}, all optional
+
+    Each section is assembled from per-month fragments; only months whose data
+    version is not in the fragment cache are queried and laid out again. Where
+    pdf_report cannot splice pages, every section is streamed and laid out.
+    """
+    date_from = date.fromisoformat(options['date_from']) if options.get('date_from') else None
+    date_to = date.fromisoformat(options['date_to']) + timedelta(days=1) if options.get('date_to') else None
+    sections = [key for key in SECTION_SOURCES if key in (options.get('sections') or SECTION_SOURCES)]
+    cache = FragmentCache(os.path.join(os.path.dirname(os.path.abspath(output_path)), 'fragments'))
+    cache.purge()
+
+    conn = mysql.connector.connect(**db_config)
+    try:
+        months = {key: section_months(conn, key, date_from, date_to) for key in SECTION_SOURCES}
+        cursor = conn.cursor()
+        if date_from or date_to:
+            cursor.execute("SELECT COUNT(*) FROM administrators")
+            summary = report_summary(months, cursor.fetchone()[0])
+        else:
+            # All-time totals are kept by the statistics counters
+            summary = read_stats(cursor)
+        cursor.close()
+
+        total = sum(summary.get(SECTION_TOTALS[key], 0) for key in sections)
+        state = {'rows_done': 0, 'rows_total': total, 'started': time.time()}
+        _write_json(progress_path, dict(state, updated=time.time()))
+
+        def counted(rows):
+            for row in rows:
+                yield row
+                state['rows_done'] += 1
+                if state['rows_done'] % PROGRESS_EVERY == 0:
+                    _write_json(progress_path, dict(state, updated=time.time()))
+
+        rows = {'admins': stream_rows(conn, ADMINS_QUERY, batch_size)}
+        fragments = {}
+        for key in sections:
+            source = SECTION_SOURCES[key]
+            if not SPLICE_SUPPORTED:
+                where, params = _date_filter(source['date_column'], date_from, date_to)
+                rows[key] = counted(stream_rows(conn, source['rows'].format(where=where), batch_size, params))
+                continue
+            fragments[key] = []
+            for month in months[key]:
+                label, start, end = month_fragment(month['month'], date_from, date_to)
+                count = int(month[SECTION_TOTALS[key]] or 0)
+                fragment_key = cache.key(key, start, end, month)
+                if cache.touch(fragment_key):
+                    state['rows_done'] += count
+                else:
+                    where, params = _date_filter(source['date_column'], start, end, undated=month['month'] is None)
+                    month_rows = counted(stream_rows(conn, source['rows'].format(where=where), batch_size, params))
+                    cache.store(fragment_key, render_section_fragment(key, label, count, month_rows))
+                fragments[key].append(CachedPages(partial(cache.load, fragment_key)))
+        _write_json(progress_path, dict(state, updated=time.time()))
+
+        period = None
+        if date_from or date_to:
+            period = (f"{date_from.isoformat() if date_from else 'start'} to "
+                      f"{(date_to - timedelta(days=1)).isoformat() if date_to else 'today'}")
+        tmp_path = f"{output_path}.{os.getpid()}.tmp"
+        try:
+            # A failed render fails the job rather than caching an error page as the report
+            with open(tmp_path, 'wb') as output:
+                render_admin_report(summary, rows, output, sections=sections, fragments=fragments,
+                                    period=period, error_page=False)
+            os.replace(tmp_path, output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    finally:
+        conn.close()
+
+
+def _run_in_subprocess(func, args):
+    """Call ``func(*args)`` in a fresh interpreter and wait for it.
+    
+    A clean process keeps rendering off the web worker's GIL and memory, and
+    imports only the job's module rather than the whole app.
+    """
+    payload = json.dumps({'func': f"{func.__module__}:{func.__qualname__}", 'args': list(args)}, default=str)
+    result = subprocess.run([sys.executable, '-m', 'report_jobs'], input=payload, text=True,
+                            capture_output=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        lines = (result.stderr or '').strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else f"report process exited with {result.returncode}")
+
+
+def _timed(func, *args):
+    """Run ``func(*args)`` and return how long it took (also attached to any exception)"""
+    start = time.monotonic()
+    try:
+        func(*args)
+    except Exception as e:
+        e.seconds = time.monotonic() - start
+        raise
+    return time.monotonic() - start
+
+
+class ReportJobs:
+    """Runs report renders in background processes and caches the PDFs on disk.
+
+    A job's id is derived from its parameters, so identical requests share
+    one render and, once it finishes, one cached file until ``ttl`` expires.
+    Job state lives in files next to the artifact (<id>.pdf, <id>.progress,
+    <id>.error), which lets every web worker process see every job.
+
+    ``on_finished(kind, seconds, size, error)`` is called in this process
+    when one of its renders ends; ``size`` is None if it failed.
+    """
+
+    def __init__(self, directory, max_workers=1, ttl=600, on_finished=None):
+        self.directory = os.path.abspath(directory)
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self.on_finished = on_finished
+        self._lock = threading.Lock()
+        self._executor = None
+        self._futures = {}   # job id -> Future, for jobs started by this process
+        os.makedirs(directory, exist_ok=True)
+
+    def _pool(self):
+        # Threads here only wait on the render subprocesses
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='report')
+        return self._executor
+
+    @staticmethod
+    def job_id(kind, params):
+        raw = json.dumps({'kind': kind, 'params': params}, sort_keys=True, default=str)
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+    def _path(self, job_id, suffix):
+        return os.path.join(self.directory, f"{job_id}.{suffix}")
+
+    def artifact_path(self, job_id):
+        """Path of a finished, unexpired report, or None"""
+        path = self._path(job_id, 'pdf')
+        try:
+            if time.time() - os.path.getmtime(path) <= self.ttl:
+                return path
+        except OSError:
+            pass
+        return None
+
+    # ==================== SUBMIT / STATUS ====================
+    def submit(self, kind, params, func, args, refresh=False):
+        """Start ``func(*args, output_path, progress_path)`` unless an identical job
+        is already running or cached; returns the job status."""
+        job_id = self.job_id(kind, params)
+        with self._lock:
+            if refresh:
+                self._remove(job_id, 'pdf')
+            elif self.artifact_path(job_id) or self._running(job_id):
+                return self.status(job_id)
+
+            self._remove(job_id, 'error')
+            progress_path = self._path(job_id, 'progress')
+            _write_json(progress_path, {'rows_done': 0, 'rows_total': None, 'updated': time.time()})
+            future = self._pool().submit(_timed, _run_in_subprocess, func,
+                                         list(args) + [self._path(job_id, 'pdf'), progress_path])
+            self._futures[job_id] = future
+            future.add_done_callback(lambda f, job_id=job_id: self._finished(job_id, kind, f))
+        return self.status(job_id)
+
+    def _running(self, job_id):
+        future = self._futures.get(job_id)
+        if future is not None and not future.done():
+            return True
+        # Started by another web worker: trust its progress file while it keeps updating
+        progress = _read_json(self._path(job_id, 'progress'))
+        return bool(progress) and time.time() - progress.get('updated', 0) < STALE_AFTER
+
+    def _finished(self, job_id, kind, future):
+        error = future.exception()
+        if error is not None:
+            _write_json(self._path(job_id, 'error'), {'error': str(error), 'updated': time.time()})
+        self._remove(job_id, 'progress')
+        with self._lock:
+            if self._futures.get(job_id) is future:
+                del self._futures[job_id]
+        if self.on_finished:
+            seconds = getattr(error, 'seconds', None) if error is not None else future.result()
+            size = None
+            if error is None:
+                try:
+                    size = os.path.getsize(self._path(job_id, 'pdf'))
+                except OSError:
+                    pass
+            self.on_finished(kind, seconds, size, error)
+
+    def status(self, job_id):
+        """{'id', 'status': queued|running|done|failed|unknown, 'progress': 0..1 or None, ...}"""
+        info = {'id': job_id, 'progress': None}
+        if self.artifact_path(job_id):
+            info.update(status='done', progress=1.0,
+                        finished=os.path.getmtime(self._path(job_id, 'pdf')))
+            return info
+
+        error = _read_json(self._path(job_id, 'error'))
+        if error:
+            info.update(status='failed', error=error.get('error'))
+            return info
+
+        if self._running(job_id):
+            progress = _read_json(self._path(job_id, 'progress')) or {}
+            total = progress.get('rows_total')
+            if total is None:
+                info['status'] = 'queued'
+            else:
+                info['status'] = 'running'
+                info['progress'] = round(min(progress.get('rows_done', 0) / total, 0.99), 3) if total else 0.99
+            return info
+
+        info['status'] = 'unknown'
+        return info
+
+    # ==================== CLEANUP ====================
+    def _remove(self, job_id, suffix):
+        try:
+            os.remove(self._path(job_id, suffix))
+        except OSError:
+            pass
+
+    def purge_expired(self):
+        """Delete expired reports and leftovers of dead jobs"""
+        now = time.time()
+        removed = 0
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if not os.path.isfile(path):
+                continue  # fragments/ is purged by the render jobs
+            try:
+                age = now - os.path.getmtime(path)
+            except OSError:
+                continue
+            limit = self.ttl if name.endswith(('.pdf', '.error')) else max(self.ttl, STALE_AFTER)
+            if age > limit:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+
+if __name__ == '__main__':
+    # Entry point for _run_in_subprocess: {"func": "module:name", "args": [...]} on stdin
+    job = json.load(sys.stdin)
+    module_name, func_name = job['func'].split(':')
+    getattr(importlib.import_module(module_name), func_name)(*job['args'])
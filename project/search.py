@@ -0,0 +1,396 @@
+import bisect
+import heapq
+import math
+import re
+import threading
+import time
+from collections import defaultdict
+from operator import itemgetter
+
+# Fields that are searched and how much a hit in each one counts
+FIELD_WEIGHTS = {
+    'device_name': 3.0,
+    'color': 2.0,
+    'location': 1.5,
+    'description': 1.0,
+}
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have', 'i',
+    'in', 'is', 'it', 'its', 'me', 'my', 'of', 'on', 'or', 'that', 'the', 'this', 'to',
+    'was', 'were', 'with'
+}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+FUZZY_PENALTY = {1: 0.6, 2: 0.35}   # score multiplier for terms matched with typos
+PREFIX_PENALTY = 0.8                 # score multiplier for prefix (search-as-you-type) hits
+MAX_EXPANSIONS = 20                  # vocabulary terms a single fuzzy/prefix term may expand to
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+_VOWELS = set('aeiouy')
+
+
+def stem(word):
+    """Light suffix-stripping stemmer (plurals, -ing, -ed, -ly).
+
+    Good enough to make 'chargers'/'charger' and 'scratched'/'scratches'
+    meet; not a full Porter implementation.
+    """
+    if len(word) <= 3 or word.isdigit():
+        return word
+    if word.endswith('sses'):
+        word = word[:-2]
+    elif word.endswith('ies') and len(word) > 4:
+        word = word[:-3] + 'y'
+    elif word.endswith('es') and word[-3] in 'sxz' or word.endswith(('ches', 'shes')):
+        word = word[:-2]
+    elif word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        word = word[:-1]
+
+    for suffix in ('ing', 'ed', 'ly'):
+        if word.endswith(suffix):
+            base = word[:-len(suffix)]
+            if len(base) >= 3 and _VOWELS & set(base):
+                word = base
+                # stopped -> stopp -> stop
+                if len(word) > 3 and word[-1] == word[-2] and word[-1] not in 'lsz':
+                    word = word[:-1]
+            break
+    return word
+
+
+def analyze(text):
+    """Tokenize, lowercase, drop stopwords and stem"""
+    if not text:
+        return []
+    return [stem(tok) for tok in _TOKEN_RE.findall(str(text).lower()) if tok not in STOPWORDS]
+
+
+def _deletes(term, distance):
+    """All strings reachable from term by removing up to ``distance`` characters"""
+    results = {term}
+    frontier = {term}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        results |= frontier
+    return results
+
+
+def _max_distance(term):
+    if len(term) < 4:
+        return 0
+    return 1 if len(term) < 8 else 2
+
+
+def edit_distance(a, b, limit):
+    """Damerau-Levenshtein distance, giving up once it exceeds ``limit``"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if prev2 is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+class SearchIndex:
+    """Embedded full-text index over found and lost items.
+
+    Documents are keyed by (item_type, id). Ranking is BM25 with per-field
+    weights; misspelled query terms are expanded with a symmetric-delete
+    dictionary, and the last query term also matches as a prefix.
+
+    Each term's postings are also kept in impact order (highest weight
+    first), so a query reads down the lists only until no unseen item can
+    reach the top ``offset + limit`` (Fagin's threshold algorithm) instead of
+    scoring every item that contains a common word.
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self.built_at = None
+        self.rebuild_lock = threading.Lock()  # held while a full rebuild is in flight
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._docs = {}                          # key -> stored row
+        self._status = {}                        # key -> status, for filtering
+        self._doc_terms = {}                     # key -> terms, for removal
+        self._postings = defaultdict(dict)       # term -> {key: BM25 tf component}
+        self._impact = defaultdict(list)         # term -> [(-tf component, key)], ascending
+        self._groups = defaultdict(set)          # (item_type, status) -> keys, for filtered hit counts
+        self._deletes = defaultdict(set)         # delete variant -> terms
+        self._vocab = []                         # sorted terms, for prefix lookups
+        self._avg_len = None                     # fixed at load so stored tf weights stay valid
+
+    # ==================== MAINTENANCE ====================
+    def is_stale(self):
+        return self.built_at is None or time.monotonic() - self.built_at > self.ttl
+
+    def load(self, found_rows, lost_rows):
+        """Rebuild the index from full table scans.
+
+        The new index is built in a scratch instance and swapped in, so
+        searches keep using the old one until the rebuild is done.
+        """
+        built = SearchIndex(self.ttl)
+        rows = [('found', dict(row)) for row in found_rows] + [('lost', dict(row)) for row in lost_rows]
+        analyzed = [(item_type, row, self._term_weights(row)) for item_type, row in rows]
+        lengths = [sum(tf.values()) for _, _, tf in analyzed]
+        built._avg_len = (sum(lengths) / len(lengths)) if lengths else None
+        for item_type, row, tf in analyzed:
+            built._add_locked(item_type, row, tf, bulk=True)
+        # Sorted once here rather than kept in order row by row
+        built._vocab.sort()
+        for impact in built._impact.values():
+            impact.sort()
+        with self._lock:
+            for name in ('_docs', '_status', '_doc_terms', '_postings', '_impact', '_groups', '_deletes',
+                         '_vocab', '_avg_len'):
+                setattr(self, name, getattr(built, name))
+            self.built_at = time.monotonic()
+
+    def add(self, item_type, row):
+        """Index a new item or re-index an edited one"""
+        with self._lock:
+            self._remove_locked((item_type, row['id']))
+            self._add_locked(item_type, dict(row))
+
+    def remove(self, item_type, item_id):
+        with self._lock:
+            self._remove_locked((item_type, item_id))
+
+    def size(self):
+        return len(self._docs)
+
+    @staticmethod
+    def _term_weights(row):
+        tf = defaultdict(float)
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in analyze(row.get(field)):
+                tf[term] += weight
+        return tf
+
+    def _add_locked(self, item_type, row, tf=None, bulk=False):
+        key = (item_type, row['id'])
+        if tf is None:
+            tf = self._term_weights(row)
+        length = sum(tf.values())
+        if not self._avg_len:
+            self._avg_len = length or 1.0
+        # Length normalisation is folded in at index time so queries only multiply by idf
+        denom = K1 * (1 - B + B * length / self._avg_len)
+
+        row['item_type'] = item_type
+        row.pop('description', None)  # not needed for result listings
+        self._docs[key] = row
+        self._status[key] = row.get('status')
+        self._groups[item_type, row.get('status')].add(key)
+        self._doc_terms[key] = list(tf)
+
+        for term, weight in tf.items():
+            postings = self._postings[term]
+            if not postings:
+                self._add_term(term, bulk)
+            impact = weight * (K1 + 1) / (weight + denom)
+            postings[key] = impact
+            if bulk:
+                self._impact[term].append((-impact, key))
+            else:
+                bisect.insort(self._impact[term], (-impact, key))
+
+    def _remove_locked(self, key):
+        if key not in self._docs:
+            return
+        del self._docs[key]
+        group = (key[0], self._status.pop(key))
+        self._groups[group].discard(key)
+        if not self._groups[group]:
+            del self._groups[group]
+        for term in self._doc_terms.pop(key):
+            postings = self._postings.get(term)
+            if postings is None or key not in postings:
+                continue
+            impact = self._impact[term]
+            i = bisect.bisect_left(impact, (-postings.pop(key), key))
+            if i < len(impact) and impact[i][1] == key:
+                del impact[i]
+            if not postings:
+                del self._postings[term]
+                del self._impact[term]
+                self._drop_term(term)
+
+    def _add_term(self, term, bulk=False):
+        if bulk:
+            self._vocab.append(term)
+        else:
+            bisect.insort(self._vocab, term)
+        for variant in _deletes(term, _max_distance(term)):
+            self._deletes[variant].add(term)
+
+    def _drop_term(self, term):
+        i = bisect.bisect_left(self._vocab, term)
+        if i < len(self._vocab) and self._vocab[i] == term:
+            del self._vocab[i]
+        for variant in _deletes(term, _max_distance(term)):
+            terms = self._deletes.get(variant)
+            if terms is not None:
+                terms.discard(term)
+                if not terms:
+                    del self._deletes[variant]
+
+    # ==================== QUERYING ====================
+    def _expand(self, term, is_last):
+        """Vocabulary terms a query term should match, with a score multiplier each"""
+        expansions = {}
+        if term in self._postings:
+            expansions[term] = 1.0
+
+        distance = _max_distance(term)
+        if distance and term not in self._postings:
+            found = set()
+            for variant in _deletes(term, distance):
+                found |= self._deletes.get(variant, set())
+            ranked = []
+            for cand in found:
+                d = edit_distance(term, cand, distance)
+                if 0 < d <= distance:
+                    ranked.append((d, -len(self._postings[cand]), cand))
+            for d, _, cand in sorted(ranked)[:MAX_EXPANSIONS]:
+                expansions.setdefault(cand, FUZZY_PENALTY[d])
+
+        if is_last and len(term) >= 2:
+            i = bisect.bisect_left(self._vocab, term)
+            added = 0
+            while i < len(self._vocab) and self._vocab[i].startswith(term) and added < MAX_EXPANSIONS:
+                expansions.setdefault(self._vocab[i], PREFIX_PENALTY)
+                i += 1
+                added += 1
+        return expansions
+
+    def search(self, query, item_types=None, statuses=None, limit=20, offset=0):
+        """Rank items for a free-text query.
+
+        item_types -- iterable of 'found'/'lost' to include (default both)
+        statuses   -- iterable of allowed statuses, or None for any
+        Returns (total_hits, [row, ...]) where each row carries a 'score'.
+        """
+        raw_terms = _TOKEN_RE.findall(str(query or '').lower())
+        terms = [stem(t) for t in raw_terms if t not in STOPWORDS]
+        if not terms:
+            return 0, []
+        # The last word is probably still being typed: match it unstemmed as a prefix too
+        last_raw = raw_terms[-1]
+
+        item_types = set(item_types or ('found', 'lost'))
+        statuses = set(statuses) if statuses is not None else None
+
+        with self._lock:
+            n_docs = len(self._docs)
+            if not n_docs:
+                return 0, []
+
+            # Per query term: (idf-weighted multiplier, vocabulary term) for each expansion
+            term_lists = []
+            for i, term in enumerate(terms):
+                expansions = self._expand(term, False)
+                if i == len(terms) - 1:
+                    for cand, mult in self._expand(last_raw, True).items():
+                        expansions.setdefault(cand, mult)
+                weighted = []
+                for cand, mult in expansions.items():
+                    df = len(self._postings[cand])
+                    weighted.append((mult * math.log(1 + (n_docs - df + 0.5) / (df + 0.5)), cand))
+                if weighted:
+                    term_lists.append(weighted)
+            if not term_lists:
+                return 0, []
+
+            if item_types >= {'found', 'lost'} and statuses is None:
+                allowed = None
+            else:
+                allowed = [group for group in self._groups
+                           if group[0] in item_types and (statuses is None or group[1] in statuses)]
+            total = self._count_hits(term_lists, allowed)
+            top = self._top_k(term_lists, len(terms), offset + limit, allowed)[offset:]
+
+            results = []
+            for score, key in top:
+                row = dict(self._docs[key])
+                row['score'] = round(score, 4)
+                results.append(row)
+            return total, results
+
+    def _count_hits(self, term_lists, allowed):
+        """Items matching any query term, counted with set operations rather than scoring them"""
+        postings = [self._postings[cand] for weighted in term_lists for _, cand in weighted]
+        if len(postings) == 1 and allowed is None:
+            return len(postings[0])
+        keys = set().union(*postings)
+        if allowed is None:
+            return len(keys)
+        return sum(len(keys & self._groups[group]) for group in allowed)
+
+    def _top_k(self, term_lists, n_terms, k, allowed):
+        """The k best (score, key) pairs, best first, reading impact lists only as far as needed.
+
+        A query term's score for an item is its best expansion's weight * tf,
+        and the item's score is the sum over terms scaled by the share of
+        terms it matched. Lists are read in step; an item is scored in full
+        when first seen, and reading stops once the k-th best score reaches
+        the sum of the lists' current positions, the most any unseen item
+        could score.
+        """
+        streams = []
+        for weighted in term_lists:
+            merged = heapq.merge(*[((weight * -neg_tf, key) for neg_tf, key in self._impact[cand])
+                                   for weight, cand in weighted], key=itemgetter(0), reverse=True)
+            streams.append(merged)
+        lookups = [[(weight, self._postings[cand]) for weight, cand in weighted] for weighted in term_lists]
+        groups = None if allowed is None else set(allowed)
+        status = self._status
+        frontier = [math.inf] * len(streams)
+        seen = set()
+        best = []    # min-heap of (score, key)
+
+        while True:
+            for j, stream in enumerate(streams):
+                entry = next(stream, None)
+                if entry is None:
+                    frontier[j] = 0.0
+                    continue
+                frontier[j], key = entry
+                if key in seen:
+                    continue
+                seen.add(key)
+                if groups is not None and (key[0], status[key]) not in groups:
+                    continue
+                score, matched = 0.0, 0
+                for expansions in lookups:
+                    # Best expansion wins for a given query term
+                    s = max(weight * postings.get(key, 0.0) for weight, postings in expansions)
+                    if s:
+                        score += s
+                        matched += 1
+                # Favour documents that match more of the query words
+                score *= matched / n_terms
+                if len(best) < k:
+                    heapq.heappush(best, (score, key))
+                elif score > best[0][0]:
+                    heapq.heapreplace(best, (score, key))
+            threshold = sum(frontier)
+            if not threshold or (len(best) >= k and best[0][0] >= threshold):
+                break
+        return sorted(best, reverse=True)
@@ -1,7 +1,7 @@
 
 import mysql.connector
 from mysql.connector import Error
-import bcrypt
+from migrations import upgrade, MigrationError
 
 def setup_database():
     # Database configuration
@@ -23,119 +23,9 @@ def setup_database():
         
         print("✅ Database 'campus_lost_found' created/verified")
         
-        # Create tables
-        tables_sql = [
-            '''
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                username VARCHAR(50) UNIQUE NOT NULL,
-                email VARCHAR(100) NOT NULL,
-                password_hash VARCHAR(255) NOT NULL,
-                phone VARCHAR(20),
-                full_name VARCHAR(100),
-                student_id VARCHAR(50),
-                department VARCHAR(100),
-                year VARCHAR(20),
-                user_type VARCHAR(20) DEFAULT 'student',
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                last_login DATETIME NULL,
-                total_items_posted INT DEFAULT 0,
-                items_found INT DEFAULT 0,
-                items_lost INT DEFAULT 0,
-                claims_made INT DEFAULT 0,
-                claims_received INT DEFAULT 0,
-                is_active BOOLEAN DEFAULT TRUE
-            )
-            ''',
-            '''
-            CREATE TABLE IF NOT EXISTS administrators (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                username VARCHAR(50) UNIQUE NOT NULL,
-                password_hash VARCHAR(255) NOT NULL,
-                created_by VARCHAR(50),
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-            ''',
-            '''
-            CREATE TABLE IF NOT EXISTS found_items (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                device_name VARCHAR(100) NOT NULL,
-                description TEXT,
-                color VARCHAR(50),
-                location VARCHAR(200) NOT NULL,
-                image_filename VARCHAR(255),
-                posted_by VARCHAR(50) NOT NULL,
-                posted_date DATETIME DEFAULT CURRENT_TIMESTAMP,
-                status VARCHAR(20) DEFAULT 'active'
-            )
-            ''',
-            '''
-            CREATE TABLE IF NOT EXISTS lost_items (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                device_name VARCHAR(100) NOT NULL,
-                description TEXT,
-                color VARCHAR(50),
-                location VARCHAR(200) NOT NULL,
-                lost_date DATE,
-                image_filename VARCHAR(255),
-                posted_by VARCHAR(50) NOT NULL,
-                posted_date DATETIME DEFAULT CURRENT_TIMESTAMP,
-                status VARCHAR(20) DEFAULT 'active'
-            )
-            ''',
-            '''
-            CREATE TABLE IF NOT EXISTS claims (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                found_item_id INT NOT NULL,
-                claimant_username VARCHAR(50) NOT NULL,
-                owner_username VARCHAR(50) NOT NULL,
-                phone_number VARCHAR(20) NOT NULL,
-                address TEXT NOT NULL,
-                contact_method VARCHAR(20),
-                proof_description TEXT,
-                proof_image_filename VARCHAR(255),
-                status VARCHAR(20) DEFAULT 'pending',
-                claim_date DATETIME DEFAULT CURRENT_TIMESTAMP,
-                admin_notified BOOLEAN DEFAULT FALSE
-            )
-            ''',
-            '''
-            CREATE TABLE IF NOT EXISTS messages (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                sender VARCHAR(50) NOT NULL,
-                recipient VARCHAR(50) NOT NULL,
-                subject VARCHAR(200),
-                message TEXT NOT NULL,
-                item_id INT,
-                item_type VARCHAR(20),
-                claim_id INT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                is_read BOOLEAN DEFAULT FALSE,
-                from_admin BOOLEAN DEFAULT FALSE
-            )
-            '''
-        ]
-        
-        for sql in tables_sql:
-            cursor.execute(sql)
-        
-        print("✅ All tables created successfully")
-        
-        # Check if admin exists
-        cursor.execute("SELECT username FROM administrators WHERE username = 'admin'")
-        if not cursor.fetchone():
-            # Create admin account
-            password = 'admin@123'
-            hashed_pw = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-            
-            cursor.execute(
-                "INSERT INTO administrators (username, password_hash, created_by) VALUES (%s, %s, %s)",
-                ('admin', hashed_pw.decode('utf-8'), 'system')
-            )
-            
-            print("✅ Admin account created:")
-            print(f"   Username: admin")
-            print(f"   Password: {password}")
+        # Tables, indexes and seed data all come from the numbered migrations
+        for version, description in upgrade(conn):
+            print(f"✅ Migration {version}: {description}")
         
         conn.commit()
         cursor.close()
@@ -149,6 +39,8 @@ def setup_database():
         print("2. Open: http://localhost:5000")
         print("3. Admin login: admin / admin@123")
         
+    except MigrationError as e:
+        print(f"❌ Migration stopped: {e}")
     except Error as e:
         print(f"❌ Error: {e}")
         print("\nTroubleshooting:")
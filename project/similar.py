@@ -0,0 +1,133 @@
+import heapq
+import threading
+import time
+from itertools import combinations
+
+# Multi-index hashing: each 64-bit hash is cut into CHUNKS pieces, each with
+# its own table. Two hashes within distance r agree to within r // CHUNKS bits
+# on at least one piece, so a lookup only probes the buckets near each of the
+# query's pieces instead of comparing against every stored hash.
+HASH_BITS = 64
+CHUNKS = 4
+CHUNK_BITS = HASH_BITS // CHUNKS
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+MAX_DISTANCE = 10   # Hamming distance (of 64) still counted as "visually similar"
+
+
+def _chunks(value):
+    return [(value >> (CHUNK_BITS * i)) & CHUNK_MASK for i in range(CHUNKS)]
+
+
+def _flip_masks(radius):
+    """Every CHUNK_BITS-wide mask with at most ``radius`` bits set"""
+    masks = []
+    for r in range(radius + 1):
+        for bits in combinations(range(CHUNK_BITS), r):
+            masks.append(sum(1 << b for b in bits))
+    return masks
+
+
+class ImageHashIndex:
+    """In-memory near-duplicate index over item photo hashes (both sides).
+
+    Lookups are sub-linear: at MAX_DISTANCE 10 a query probes 4 x 137
+    buckets and checks only the hashes found there.
+    """
+
+    def __init__(self, ttl=300, max_distance=MAX_DISTANCE):
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self.built_at = None
+        self.rebuild_lock = threading.Lock()  # held while a full rebuild is in flight
+        self._lock = threading.RLock()
+        self._items = {}                       # (item_type, id) -> (hash, row)
+        self._tables = [{} for _ in range(CHUNKS)]   # chunk value -> {(item_type, id): hash}
+        self._masks = _flip_masks(max_distance // CHUNKS)
+
+    # ==================== MAINTENANCE ====================
+    def is_stale(self):
+        return self.built_at is None or time.monotonic() - self.built_at > self.ttl
+
+    def load(self, rows_by_type):
+        """Replace the index contents with {'found': rows, 'lost': rows} (rows with an image_hash)"""
+        items = {}
+        tables = [{} for _ in range(CHUNKS)]
+        for item_type, rows in rows_by_type.items():
+            for row in rows:
+                if row.get('image_hash') is None:
+                    continue
+                key = (item_type, row['id'])
+                value = int(row['image_hash'])
+                items[key] = (value, dict(row))
+                for table, chunk in zip(tables, _chunks(value)):
+                    table.setdefault(chunk, {})[key] = value
+        with self._lock:
+            self._items = items
+            self._tables = tables
+            self.built_at = time.monotonic()
+
+    def add(self, item_type, row):
+        """Index (or re-index) one item; items without an image hash are dropped"""
+        with self._lock:
+            self._remove_locked((item_type, row['id']))
+            if row.get('image_hash') is None:
+                return
+            key = (item_type, row['id'])
+            value = int(row['image_hash'])
+            self._items[key] = (value, dict(row))
+            for table, chunk in zip(self._tables, _chunks(value)):
+                table.setdefault(chunk, {})[key] = value
+
+    def remove(self, item_type, item_id):
+        with self._lock:
+            self._remove_locked((item_type, item_id))
+
+    def _remove_locked(self, key):
+        entry = self._items.pop(key, None)
+        if entry is None:
+            return
+        for table, chunk in zip(self._tables, _chunks(entry[0])):
+            bucket = table.get(chunk)
+            if bucket is not None:
+                bucket.pop(key, None)
+                if not bucket:
+                    del table[chunk]
+
+    def size(self):
+        return len(self._items)
+
+    # ==================== LOOKUP ====================
+    def similar(self, image_hash, k=5, exclude=None, item_types=None, statuses=None):
+        """Items whose photo is within max_distance of ``image_hash``, closest first.
+
+        ``item_types`` and ``statuses`` restrict the candidates before the k
+        closest are picked. Result is a list of dicts:
+        {'item_type', 'item': row, 'distance', 'similarity': 0..1}.
+        """
+        value = int(image_hash)
+        max_distance = self.max_distance
+        with self._lock:
+            # Hashes are checked as their buckets are probed; one that sits in
+            # several probed buckets is simply found again
+            found = {}
+            for table, chunk in zip(self._tables, _chunks(value)):
+                get = table.get
+                for mask in self._masks:
+                    bucket = get(chunk ^ mask)
+                    if bucket:
+                        for key, other in bucket.items():
+                            distance = (value ^ other).bit_count()
+                            if distance <= max_distance:
+                                found[key] = distance
+            found.pop(exclude, None)
+            scored = [(distance, key) for key, distance in found.items()
+                      if (not item_types or key[0] in item_types)
+                      and (statuses is None or self._items[key][1].get('status') in statuses)]
+            best = heapq.nsmallest(k, scored)
+            return [{
+                'item_type': key[0],
+                'item': self._items[key][1],
+                'distance': distance,
+                'similarity': round(1 - distance / HASH_BITS, 3),
+            } for distance, key in best]
@@ -0,0 +1,208 @@
+from collections import Counter
+
+# Summary keys read by the dashboards and the report, and the counter behind each
+STAT_KEYS = {
+    'total_users': 'users',
+    'active_users': 'users:active',
+    'total_found': 'found_items',
+    'active_found': 'found_items:active',
+    'claimed_found': 'found_items:claimed',
+    'total_lost': 'lost_items',
+    'active_lost': 'lost_items:active',
+    'found_lost': 'lost_items:found',
+    'total_claims': 'claims',
+    'pending_claims': 'claims:pending',
+    'approved_claims': 'claims:approved',
+    'rejected_claims': 'claims:rejected',
+    'new_claims': 'claims:new',
+    'total_admins': 'administrators',
+}
+
+# Per-user activity counters kept on the users row, with the query that recounts each
+USER_COUNTERS = {
+    'items_found': "SELECT posted_by AS username, COUNT(*) AS n FROM found_items GROUP BY posted_by",
+    'items_lost': "SELECT posted_by AS username, COUNT(*) AS n FROM lost_items GROUP BY posted_by",
+    'claims_made': "SELECT claimant_username AS username, COUNT(*) AS n FROM claims GROUP BY claimant_username",
+    'claims_received': '''
+        SELECT f.posted_by AS username, COUNT(*) AS n
+        FROM claims c JOIN found_items f ON f.id = c.found_item_id
+        GROUP BY f.posted_by
+    ''',
+}
+
+
+def _values(row):
+    # Callers pass plain or dictionary cursors
+    return tuple(row.values()) if isinstance(row, dict) else tuple(row)
+
+
+def row_counters(table, row):
+    """Names of the stat_counters a row of ``table`` counts towards"""
+    names = [table]
+    if table == 'users':
+        if row.get('is_active', True):
+            names.append('users:active')
+    elif table in ('found_items', 'lost_items'):
+        names.append(f"{table}:{row.get('status') or 'active'}")
+    elif table == 'claims':
+        status = row.get('status') or 'pending'
+        names.append(f"claims:{status}")
+        # "New" on the admin dashboard: pending and not yet opened by an admin
+        if status == 'pending' and not row.get('admin_notified'):
+            names.append('claims:new')
+    return names
+
+
+def bump_counters(cursor, deltas):
+    """Add each delta to its counter, creating counters as needed"""
+    deltas = [(name, delta) for name, delta in deltas.items() if delta]
+    if not deltas:
+        return
+    cursor.execute(f'''
+        INSERT INTO stat_counters (name, value) VALUES {', '.join(['(%s, %s)'] * len(deltas))}
+        ON DUPLICATE KEY UPDATE value = value + VALUES(value)
+    ''', tuple(value for pair in sorted(deltas) for value in pair))
+
+
+def record_change(cursor, table, before=None, after=None):
+    """Update the counters for a row being inserted (after only), deleted
+    (before only) or changed (both). Call it in the same transaction as the
+    write so the counters commit or roll back with it."""
+    deltas = Counter()
+    if before is not None:
+        deltas.subtract(row_counters(table, before))
+    if after is not None:
+        deltas.update(row_counters(table, after))
+    bump_counters(cursor, deltas)
+
+
+def bump_user(cursor, username, **deltas):
+    """Adjust per-user activity counters, e.g. bump_user(cursor, 'bob', items_found=1)"""
+    if 'items_found' in deltas or 'items_lost' in deltas:
+        deltas['total_items_posted'] = deltas.get('items_found', 0) + deltas.get('items_lost', 0)
+    assignments = ', '.join(f"{column} = GREATEST({column} + %s, 0)" for column in deltas)
+    cursor.execute(f"UPDATE users SET {assignments} WHERE username = %s", tuple(deltas.values()) + (username,))
+
+
+def read_stats(cursor):
+    """All summary counts from the counter table in one small read"""
+    cursor.execute("SELECT name, value FROM stat_counters")
+    values = dict(_values(row) for row in cursor.fetchall())
+    return {key: int(values.get(name) or 0) for key, name in STAT_KEYS.items()}
+
+
+# ==================== REBUILD ====================
+def count_counters(cursor):
+    """Recount every counter from the base tables (full scans)"""
+    counts = Counter()
+    queries = {
+        'users': "SELECT is_active, COUNT(*) FROM users GROUP BY is_active",
+        'found_items': "SELECT status, COUNT(*) FROM found_items GROUP BY status",
+        'lost_items': "SELECT status, COUNT(*) FROM lost_items GROUP BY status",
+        'claims': "SELECT status, admin_notified, COUNT(*) FROM claims GROUP BY status, admin_notified",
+        'administrators': "SELECT COUNT(*) FROM administrators",
+    }
+    for table, query in queries.items():
+        cursor.execute(query)
+        for row in cursor.fetchall():
+            *values, n = _values(row)
+            if table == 'users':
+                fields = {'is_active': values[0]}
+            elif table == 'claims':
+                fields = {'status': values[0], 'admin_notified': values[1]}
+            elif values:
+                fields = {'status': values[0]}
+            else:
+                fields = {}
+            for name in row_counters(table, fields):
+                counts[name] += n
+    return counts
+
+
+def rebuild_stats(cursor):
+    """Recount all counters and fix the ones that drifted.
+
+    Returns {counter name: (stored, actual)} for every counter that was
+    wrong, and the number of users rows whose activity counters were fixed.
+    """
+    # Lock the counters first: writers bump them in the transaction that changes
+    # the base tables, so none can commit between the recount and the fix
+    cursor.execute("SELECT name, value FROM stat_counters FOR UPDATE")
+    stored = dict(_values(row) for row in cursor.fetchall())
+    actual = count_counters(cursor)
+    drift = {name: (stored.get(name, 0), actual.get(name, 0))
+             for name in set(stored) | set(actual) if stored.get(name, 0) != actual.get(name, 0)}
+    bump_counters(cursor, {name: now - was for name, (was, now) in drift.items()})
+
+    joins = ' '.join(f"LEFT JOIN ({query}) {column} ON {column}.username = u.username"
+                     for column, query in USER_COUNTERS.items())
+    counts = {column: f"COALESCE({column}.n, 0)" for column in USER_COUNTERS}
+    counts['total_items_posted'] = f"{counts['items_found']} + {counts['items_lost']}"
+    cursor.execute(f'''
+        UPDATE users u {joins}
+        SET {', '.join(f"u.{column} = {value}" for column, value in counts.items())}
+        WHERE {' OR '.join(f"u.{column} != {value}" for column, value in counts.items())}
+    ''')
+    return drift, cursor.rowcount
+
+
+def reconcile_unread_counters(cursor):
+    """Reset every user's cached unread count to the true value; returns rows repaired"""
+    cursor.execute('''
+        UPDATE users u
+        LEFT JOIN (
+            SELECT recipient, COUNT(*) AS unread
+            FROM messages
+            WHERE is_read = FALSE AND sender != recipient
+            GROUP BY recipient
+        ) m ON m.recipient = u.username
+        SET u.unread_messages = COALESCE(m.unread, 0)
+        WHERE u.unread_messages != COALESCE(m.unread, 0)
+    ''')
+    return cursor.rowcount
+
+
+# Characters of the newest message kept on a conversations row
+PREVIEW_LENGTH = 200
+
+
+def conversation_pair(user1, user2):
+    """Canonical (user_a, user_b) ordering for a conversations row.
+    
+    Case-insensitive, to agree with the column collation behind the unique key.
+    """
+    return tuple(sorted((user1, user2), key=str.casefold))
+
+
+def rebuild_conversations(cursor):
+    """Rebuild the conversations table from the full message history; returns the rows written"""
+    # Per unordered pair: newest message and unread counts for each participant
+    cursor.execute('''
+        SELECT pair.low_user, pair.high_user, m.id, m.timestamp, m.message,
+               pair.unread_low, pair.unread_high
+        FROM (
+            SELECT LEAST(sender, recipient) AS low_user,
+                   GREATEST(sender, recipient) AS high_user,
+                   MAX(id) AS last_id,
+                   SUM(sender != recipient AND is_read = FALSE
+                       AND recipient = LEAST(sender, recipient)) AS unread_low,
+                   SUM(sender != recipient AND is_read = FALSE
+                       AND recipient = GREATEST(sender, recipient)) AS unread_high
+            FROM messages
+            GROUP BY low_user, high_user
+        ) AS pair
+        JOIN messages m ON m.id = pair.last_id
+    ''')
+    rows = [_values(row) for row in cursor.fetchall()]
+    
+    cursor.execute("DELETE FROM conversations")
+    for low_user, high_user, message_id, timestamp, message, unread_low, unread_high in rows:
+        user_a, user_b = conversation_pair(low_user, high_user)
+        unread = {low_user: int(unread_low or 0), high_user: int(unread_high or 0)}
+        cursor.execute('''
+            INSERT INTO conversations (user_a, user_b, last_message_id, last_timestamp, last_preview,
+                                       unread_a, unread_b)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ''', (user_a, user_b, message_id, timestamp, message[:PREVIEW_LENGTH],
+              unread[user_a], unread[user_b] if user_a != user_b else 0))
+    return len(rows)
@@ -0,0 +1,123 @@
+import os
+import sys
+
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+
+class FakeCursor:
+    """Answers every statement through the connection's ``responder(sql, params)``,
+    which gets the SQL with whitespace collapsed and returns the result rows"""
+
+    def __init__(self, conn, dictionary=False):
+        self.conn = conn
+        self.dictionary = dictionary
+        self.lastrowid = 1
+        self.rowcount = 0
+        self.column_names = ()
+        self._rows = []
+
+    def execute(self, sql, params=()):
+        sql = ' '.join(sql.split())
+        self.conn.log.append((sql, params))
+        self._rows = list(self.conn.responder(sql, params) or [])
+        self.rowcount = len(self._rows)
+
+    def executemany(self, sql, seq_params):
+        for params in seq_params:
+            self.execute(sql, params)
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchmany(self, size=1):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Stands in for a MySQL connection; ``log`` keeps every (sql, params) and COMMIT"""
+
+    def __init__(self, responder=None):
+        self.responder = responder or (lambda sql, params: [])
+        self.log = []
+
+    def cursor(self, dictionary=False, **kwargs):
+        return FakeCursor(self, dictionary)
+
+    def commit(self):
+        self.log.append(('COMMIT', ()))
+
+    def rollback(self):
+        pass
+
+    def start_transaction(self, **kwargs):
+        self.log.append(('START TRANSACTION', ()))
+
+    def ping(self, reconnect=False):
+        pass
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        pass
+
+    def statements(self):
+        return [sql for sql, _ in self.log if sql not in ('COMMIT', 'START TRANSACTION')]
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    """The Flask app module; importing it without a database only prints connection errors"""
+    cwd = os.getcwd()
+    os.chdir(PROJECT_DIR)
+    try:
+        import app
+    finally:
+        os.chdir(cwd)
+    app.app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def fake_db(app_module, monkeypatch):
+    """Call with a responder to route the app's connection pool to a FakeConnection.
+    Per-process caches start empty so one test's pages and failures do not leak into the next."""
+    monkeypatch.setattr(app_module, 'page_cache', type(app_module.page_cache)())
+    monkeypatch.setattr(app_module, 'login_throttle',
+                        type(app_module.login_throttle)(app_module.login_throttle.limits))
+
+    def use(responder=None):
+        conn = FakeConnection(responder)
+        monkeypatch.setattr(app_module.db_pool, '_connect', lambda: app_module.query_log.wrap(conn))
+        app_module.db_pool.close_all()
+        return conn
+    yield use
+    app_module.db_pool.close_all()
+
+
+@pytest.fixture
+def login(app_module):
+    """A test client with a user and/or admin session"""
+    def make(user=None, admin=None):
+        client = app_module.app.test_client()
+        with client.session_transaction() as session:
+            if user:
+                session.update(user_id=1, username=user)
+            if admin:
+                session.update(admin_id=1, admin_username=admin)
+        return client
+    return make
@@ -0,0 +1,90 @@
+import threading
+
+import pytest
+
+import auth
+from auth import HasherBusy, LoginThrottle, PasswordHasher, hash_rounds
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(auth.time, 'monotonic', clock)
+    return clock
+
+
+def test_throttle_blocks_after_limit_until_failures_age_out(clock):
+    throttle = LoginThrottle({'account': 3, 'ip': 10}, window=60)
+    for _ in range(3):
+        assert throttle.retry_after(account='user:bob', ip='10.0.0.1') == 0
+        throttle.record_failure(account='user:bob', ip='10.0.0.1')
+        clock.now += 10
+    # Failures at 1000, 1010, 1020: the oldest leaves the window at 1060
+    assert throttle.retry_after(account='user:bob', ip='10.0.0.1') == 30
+    assert throttle.retry_after(account='user:alice', ip='10.0.0.1') == 0
+    clock.now = 1060
+    assert throttle.retry_after(account='user:bob') == 0
+
+
+def test_throttle_per_ip_limit_covers_every_account(clock):
+    throttle = LoginThrottle({'account': 5, 'ip': 2}, window=60)
+    throttle.record_failure(account='user:a', ip='10.0.0.9')
+    throttle.record_failure(account='user:b', ip='10.0.0.9')
+    assert throttle.retry_after(account='user:c', ip='10.0.0.9') == 60
+    assert throttle.retry_after(account='user:c', ip='10.0.0.8') == 0
+
+
+def test_throttle_reset_and_key_cap(clock):
+    throttle = LoginThrottle({'account': 1}, window=60, max_keys=3)
+    throttle.record_failure(account='user:bob')
+    throttle.reset(account='user:bob')
+    assert throttle.retry_after(account='user:bob') == 0
+    for i in range(10):
+        throttle.record_failure(account=f'user:{i}')
+    assert len(throttle._failures) <= 3
+    assert throttle.retry_after(account='user:9') > 0
+
+
+def test_hash_verify_and_rehash():
+    hasher = PasswordHasher(rounds=4, max_workers=1)
+    hashed = hasher.hash('s3cret')
+    assert hash_rounds(hashed) == 4
+    assert hasher.verify('s3cret', hashed)
+    assert not hasher.verify('wrong', hashed)
+    assert not hasher.verify('s3cret', 'not-a-bcrypt-hash')
+    assert not hasher.verify('s3cret', None)
+    assert not hasher.needs_rehash(hashed)
+    assert PasswordHasher(rounds=5, max_workers=1).needs_rehash(hashed)
+    assert not PasswordHasher(rounds=4, max_workers=1).needs_rehash(PasswordHasher(rounds=5).hash('x'))
+
+
+def test_full_pool_and_queue_turn_requests_away():
+    hasher = PasswordHasher(rounds=4, max_workers=1, max_queue=0, timeout=5)
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return True
+
+    worker = threading.Thread(target=hasher._run, args=(slow,))
+    worker.start()
+    started.wait(5)
+    with pytest.raises(HasherBusy):
+        hasher.hash('x')
+    release.set()
+    worker.join()
+    assert hasher.verify('x', hasher.hash('x'))
+
+
+def test_calibrated_cost_stays_within_bounds():
+    assert auth.calibrate_rounds(target_ms=0.001, min_rounds=6, max_rounds=12) == 6
+    assert auth.calibrate_rounds(target_ms=10 ** 9, min_rounds=6, max_rounds=12) == 12
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+
+def conversation_rows(partners):
+    start = datetime(2024, 1, 1)
+    return [{'other_user': f'user{n}', 'last_message': f'hello {n}',
+             'last_message_time': start - timedelta(minutes=n), 'unread_count': n % 3}
+            for n in range(partners)]
+
+
+@pytest.mark.parametrize('partners', [0, 1, 40, 300])
+def test_inbox_is_one_query_whatever_the_number_of_partners(app_module, fake_db, login, monkeypatch, partners):
+    rows = conversation_rows(partners)
+    fake_db(lambda sql, params: rows if 'FROM conversations' in sql else [])
+    # Every request counts as slow, so the query log keeps its breakdown
+    monkeypatch.setitem(app_module.app.config, 'SLOW_REQUEST_MS', 0)
+
+    page = login(user='bob').get('/user/messages')
+    assert page.status_code == 200
+    if partners:
+        assert f'user{partners - 1}' in page.get_data(as_text=True)
+
+    report = app_module.query_log.slow_requests[-1]
+    assert report['route'] == 'chat_messages'
+    assert report['query_count'] == 1
+    assert 'FROM conversations' in report['queries'][0]['sql']
+
+
+def test_conversation_summary_only_moves_forward(app_module):
+    from conftest import FakeConnection
+    conn = FakeConnection()
+    app_module.insert_message(conn.cursor(), 'bob', 'alice', 'hi')
+    upsert = next(sql for sql in conn.statements() if sql.startswith('INSERT INTO conversations'))
+    update = upsert.split('ON DUPLICATE KEY UPDATE')[1]
+    # Both guards have to read last_message_id before it is overwritten
+    assert update.index('last_message_id = GREATEST') > update.index('last_timestamp = IF(VALUES(last_message_id) >')
+    assert update.index('last_message_id = GREATEST') > update.index('last_preview = IF(VALUES(last_message_id) >')
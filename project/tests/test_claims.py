@@ -0,0 +1,32 @@
+from datetime import datetime
+
+import pytest
+
+
+def claim_row(admin_notified):
+    return {'id': 5, 'found_item_id': 9, 'claimant_username': 'carol', 'owner_username': 'dave',
+            'status': 'pending', 'admin_notified': admin_notified, 'claim_date': datetime(2024, 3, 1),
+            'decided_at': None, 'proof_image_filename': None, 'description': 'Mine', 'contact_info': ''}
+
+
+@pytest.mark.parametrize('admin_notified', [False, True])
+def test_admin_view_claim_only_locks_the_first_view(app_module, fake_db, login, admin_notified):
+    claim = claim_row(admin_notified)
+
+    def respond(sql, params):
+        if sql.startswith('SELECT * FROM claims'):
+            return [dict(claim)]
+        if sql.startswith('SELECT * FROM found_items'):
+            return [{'id': 9, 'device_name': 'Phone', 'posted_by': 'dave', 'status': 'active'}]
+        return []
+    conn = fake_db(respond)
+
+    assert login(admin='root').get('/admin/view_claim/5').status_code == 200
+    statements = conn.statements()
+    locks = [sql for sql in statements if 'FOR UPDATE' in sql]
+    updates = [sql for sql in statements if sql.startswith('UPDATE claims')]
+    if admin_notified:
+        assert locks == [] and updates == []
+    else:
+        assert locks == ['SELECT * FROM claims WHERE id = %s FOR UPDATE']
+        assert updates == ['UPDATE claims SET admin_notified = %s WHERE id = %s']
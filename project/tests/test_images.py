@@ -0,0 +1,33 @@
+from PIL import Image
+
+from images import ImagePipeline
+
+
+def pipeline(tmp_path, ready):
+    uploads = tmp_path / 'uploads'
+    uploads.mkdir()
+    Image.new('RGB', (1200, 800), 'orange').save(uploads / 'photo.jpg')
+    (uploads / 'notes.jpg').write_bytes(b'not an image')
+    return ImagePipeline(str(tmp_path / 'variants'), lambda name: str(uploads / name),
+                         on_ready=lambda name, resources: ready.append((name, resources)))
+
+
+def test_pages_showing_an_upload_are_reported_once_its_variants_exist(tmp_path):
+    ready = []
+    images = pipeline(tmp_path, ready)
+    images.submit('photo.jpg', ('found_items', 'found_items:3')).result()
+    assert images.is_ready('photo.jpg')
+    assert ready == [('photo.jpg', {'found_items', 'found_items:3'})]
+
+    # Uploads nothing is waiting on, and unreadable files, are not reported
+    images.submit('photo.jpg').result()
+    images.submit('notes.jpg', ('lost_items:1',)).result()
+    assert len(ready) == 1 and not images.is_ready('notes.jpg')
+
+
+def test_refreshing_image_pages_bumps_their_versions(app_module, fake_db):
+    conn = fake_db()
+    app_module.refresh_image_pages('photo.jpg', {'found_items', 'found_items:3'})
+    bump, params = next((sql, params) for sql, params in conn.log if sql.startswith('INSERT INTO resource_versions'))
+    assert params == ('found_items', 'found_items:3')
+    assert ('COMMIT', ()) in conn.log
@@ -0,0 +1,30 @@
+import subprocess
+import sys
+
+import index_advisor
+
+from conftest import PROJECT_DIR
+
+
+def test_check_without_a_baseline_fails_before_touching_the_database(app_module, tmp_path, monkeypatch):
+    monkeypatch.setattr(index_advisor.mysql.connector, 'connect',
+                        lambda **kwargs: (_ for _ in ()).throw(AssertionError('connected')))
+    result = app_module.app.test_cli_runner().invoke(
+        args=['advise-indexes', '--check', '--baseline', str(tmp_path / 'missing.json')])
+    assert result.exit_code == 1
+    assert 'create it with --update-baseline' in result.output
+
+
+def test_crawl_covers_parameterised_routes_and_skips_unsafe_ones(app_module):
+    urls = index_advisor.crawl_urls(app_module.app, dict(index_advisor.URL_VALUES,
+                                                         tab=list(app_module.ADMIN_TABS)))
+    endpoints = {endpoint for endpoint, _ in urls}
+    assert {'view_items', 'chat_messages', 'admin_view_claim'} <= endpoints
+    assert not endpoints & index_advisor.SKIP_ENDPOINTS
+    assert ('chat_messages', '/user/messages/student1') in urls
+
+
+def test_serving_the_app_does_not_import_the_advisor():
+    loaded = subprocess.run([sys.executable, '-c', "import sys, app; print('index_advisor' in sys.modules)"],
+                            cwd=PROJECT_DIR, capture_output=True, text=True, check=True).stdout
+    assert loaded.splitlines()[-1] == 'False'
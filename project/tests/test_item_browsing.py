@@ -0,0 +1,99 @@
+from datetime import datetime
+
+from werkzeug.datastructures import MultiDict
+
+
+def test_page_cursor_round_trips(app_module):
+    item = {'posted_date': datetime(2024, 3, 5, 14, 7, 9), 'id': 42}
+    cursor = app_module.encode_page_cursor(item)
+    assert cursor == '20240305140709-42'
+    assert app_module.decode_page_cursor(cursor) == (item['posted_date'], 42)
+    # Rows may hand the date back as text
+    assert app_module.encode_page_cursor({'posted_date': '2024-03-05 14:07:09', 'id': 42}) == cursor
+
+
+def test_malformed_page_cursors_are_ignored(app_module):
+    for value in (None, '', 'garbage', '20241301000000-1', '20240305140709-x'):
+        assert app_module.decode_page_cursor(value) is None
+
+
+def test_item_filters_drop_invalid_values(app_module):
+    filters = app_module.get_item_filters(MultiDict({'q': ' phone ', 'type': 'bogus', 'date_from': '2024-02-30',
+                                                     'date_to': '2024-03-01'}))
+    assert filters == {'q': 'phone', 'color': '', 'location': '', 'date_from': '', 'date_to': '2024-03-01',
+                       'type': ''}
+
+
+def test_keyset_page_continues_after_the_cursor(app_module, fake_db, login):
+    rows = [{'id': i, 'device_name': 'Phone', 'description': '', 'color': '', 'location': 'Gym',
+             'image_filename': None, 'image_hash': None, 'posted_by': 'x', 'posted_date': datetime(2024, 1, i + 1),
+             'status': 'active', 'lost_date': None} for i in range(30, 0, -1)]
+    conn = fake_db(lambda sql, params: rows[:params[-1]] if 'FROM found_items' in sql and 'LIMIT' in sql else [])
+    client = login(user='bob')
+    page = client.get('/user/view_items?type=found&found_after=20240120000000-19')
+    assert page.status_code == 200
+    sql, params = next((sql, params) for sql, params in conn.log if 'FROM found_items' in sql and 'LIMIT' in sql)
+    assert '(posted_date < %s OR (posted_date = %s AND id < %s))' in sql
+    assert params[1:4] == (datetime(2024, 1, 20), datetime(2024, 1, 20), 19)
+    # One row past the page size means there is a next page, starting after the last row shown
+    assert 'found_after=20240108000000-7' in page.get_data(as_text=True)
+
+
+def test_text_search_says_when_matches_are_capped(app_module, fake_db, login, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'SEARCH_MAX_RESULTS', 2)
+    monkeypatch.setattr(app_module, 'search_items',
+                        lambda query, item_types, statuses, limit, offset=0: (5, [{'id': 3}, {'id': 2}][:limit]))
+    fake_db()
+    page = login(user='bob').get('/user/view_items?type=found&q=phone').get_data(as_text=True)
+    assert 'Showing the 2 best matches' in page
+
+    # A real index change arrives with a row version bump; here just start from an empty page cache
+    monkeypatch.setattr(app_module, 'page_cache', type(app_module.page_cache)())
+    monkeypatch.setattr(app_module, 'search_items',
+                        lambda query, item_types, statuses, limit, offset=0: (2, [{'id': 3}, {'id': 2}]))
+    page = login(user='bob').get('/user/view_items?type=found&q=phone').get_data(as_text=True)
+    assert 'best matches' not in page
+
+
+def test_admin_item_page_changes_with_the_posters_contacts(app_module, fake_db, login):
+    versions = {'found_items:9': 4, 'users:dave': 1}
+    contact = {'email': 'dave@campus.edu', 'phone': '555-0100'}
+
+    def respond(sql, params):
+        if sql.startswith('SELECT id, image_hash, posted_by, updated_at FROM found_items'):
+            return [{'id': 9, 'image_hash': None, 'posted_by': 'dave', 'updated_at': None}]
+        if sql.startswith('SELECT name, version'):
+            return [{'name': name, 'version': versions[name], 'updated_at': None} for name in params]
+        if sql.startswith('SELECT * FROM found_items'):
+            return [{'id': 9, 'device_name': 'Phone', 'description': '', 'color': '', 'location': 'Gym',
+                     'image_filename': None, 'posted_by': 'dave', 'posted_date': datetime(2024, 1, 1),
+                     'status': 'active'}]
+        if sql.startswith('SELECT email, phone FROM users'):
+            return [dict(contact)]
+        return []
+    fake_db(respond)
+    client = login(admin='root')
+    first = client.get('/admin/view_found_item/9')
+    assert 'dave@campus.edu' in first.get_data(as_text=True)
+    assert client.get('/admin/view_found_item/9', headers={'If-None-Match': first.get_etag()[0]}).status_code == 304
+
+    contact['email'] = 'dave@new.edu'
+    versions['users:dave'] += 1
+    second = client.get('/admin/view_found_item/9', headers={'If-None-Match': first.get_etag()[0]})
+    assert second.status_code == 200
+    assert 'dave@new.edu' in second.get_data(as_text=True)
+
+
+def test_admin_tab_search_reports_capped_matches(app_module, fake_db, login, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'SEARCH_MAX_RESULTS', 2)
+    monkeypatch.setattr(app_module, 'search_items',
+                        lambda query, item_types, statuses, limit: (5, [{'id': 3}, {'id': 2}][:limit]))
+    conn = fake_db(lambda sql, params: [{'count': 2}] if sql.startswith('SELECT COUNT(*)') else [])
+    data = login(admin='root').get('/admin/api/found?q=phone').get_json()
+    assert (data['total'], data['matches'], data['truncated']) == (2, 5, True)
+    assert any('id IN (%s, %s)' in sql for sql in conn.statements())
+
+    monkeypatch.setattr(app_module, 'search_items',
+                        lambda query, item_types, statuses, limit: (2, [{'id': 3}, {'id': 2}]))
+    data = login(admin='root').get('/admin/api/found?q=phone').get_json()
+    assert (data['matches'], data['truncated']) == (2, False)
@@ -0,0 +1,61 @@
+from datetime import date
+
+from matching import MatchIndex, tokenize
+
+
+def lost(item_id, name, color='black', location='Main Library', when=date(2024, 3, 1), **extra):
+    return dict(id=item_id, device_name=name, description='', color=color, location=location,
+                lost_date=when, posted_date=when, posted_by='owner', **extra)
+
+
+def found(item_id, name, color='black', location='Main Library', when=date(2024, 3, 2), posted_by='finder'):
+    return dict(id=item_id, device_name=name, description='', color=color, location=location,
+                posted_date=when, posted_by=posted_by)
+
+
+def test_tokenize_drops_stopwords_and_folds_plurals():
+    assert tokenize('The black AirPods and keys') == ['black', 'airpod', 'key']
+    assert tokenize(None) == []
+
+
+def test_best_match_shares_name_color_place_and_date():
+    index = MatchIndex()
+    index.load([], [
+        found(1, 'iPhone 13'),
+        found(2, 'iPhone 13', color='red', location='Gym', when=date(2024, 1, 1)),
+        found(3, 'Water bottle'),
+    ])
+    results = index.matches('lost', lost(10, 'iPhone 13'))
+    assert [r['item']['id'] for r in results] == [1, 2]
+    assert set(results[0]['reasons']) == {'similar description', 'same color', 'nearby location', 'close dates'}
+    assert results[0]['score'] > results[1]['score']
+
+
+def test_items_with_no_shared_words_are_not_matched():
+    index = MatchIndex()
+    index.load([], [found(1, 'Umbrella')])
+    assert index.matches('lost', lost(10, 'Calculator')) == []
+
+
+def test_exclude_user_skips_own_items():
+    index = MatchIndex()
+    index.load([], [found(1, 'Wallet', posted_by='alice'), found(2, 'Wallet', posted_by='bob')])
+    results = index.matches('lost', lost(10, 'Wallet'), exclude_user='alice')
+    assert [r['item']['id'] for r in results] == [2]
+
+
+def test_add_reindexes_and_remove_drops():
+    index = MatchIndex()
+    index.load([], [found(1, 'Umbrella')])
+    index.add('found', found(1, 'Backpack'))
+    assert index.matches('lost', lost(10, 'Umbrella')) == []
+    assert [r['item']['id'] for r in index.matches('lost', lost(10, 'Backpack'))] == [1]
+    index.remove('found', 1)
+    assert index.matches('lost', lost(10, 'Backpack')) == []
+    assert index.size() == {'lost': 0, 'found': 0}
+
+
+def test_found_items_match_lost_side():
+    index = MatchIndex()
+    index.load([lost(5, 'Car keys')], [])
+    assert [r['item']['id'] for r in index.matches('found', found(1, 'Car keys'))] == [5]
@@ -0,0 +1,145 @@
+import pytest
+
+import migrations
+from migrations import MigrationError, upgrade
+
+from conftest import FakeConnection
+
+
+class Database(FakeConnection):
+    """Remembers applied schema_version rows and hands out the named lock"""
+
+    def __init__(self, version=0, lock=1):
+        super().__init__(self.respond)
+        self.versions = list(range(1, version + 1))
+        self.lock = lock
+
+    def respond(self, sql, params):
+        if sql.startswith('SELECT GET_LOCK'):
+            return [(self.lock,)]
+        if sql.startswith('SELECT MAX(version)'):
+            return [(max(self.versions) if self.versions else None,)]
+        if sql.startswith('INSERT INTO schema_version'):
+            self.versions.append(params[0])
+        return [(1,)] if sql.startswith('SELECT RELEASE_LOCK') else []
+
+
+@pytest.fixture
+def applied(monkeypatch):
+    ran = []
+
+    def step(number):
+        def migrate(cursor):
+            if number == 3 and 'fail' in ran:
+                raise MigrationError('orphan rows')
+            ran.append(number)
+        return migrate
+
+    monkeypatch.setattr(migrations, 'MIGRATIONS', [(n, f'step {n}', step(n)) for n in (1, 2, 3)])
+    monkeypatch.setattr(migrations, 'LATEST_VERSION', 3)
+    return ran
+
+
+def test_real_migrations_are_numbered_in_order():
+    numbers = [number for number, _, _ in migrations.MIGRATIONS]
+    assert numbers == list(range(1, len(numbers) + 1))
+    assert migrations.LATEST_VERSION == numbers[-1]
+
+
+def test_pending_migrations_run_in_order_and_commit_one_by_one(applied):
+    db = Database(version=1)
+    assert upgrade(db) == [(2, 'step 2'), (3, 'step 3')]
+    assert applied == [2, 3] and db.versions == [1, 2, 3]
+    assert db.log.count(('COMMIT', ())) == 2
+    assert upgrade(db) == []
+
+
+def test_target_stops_early(applied):
+    db = Database()
+    assert [number for number, _ in upgrade(db, target=2)] == [1, 2]
+    assert db.versions == [1, 2]
+
+
+def test_failed_migration_keeps_earlier_ones_and_releases_the_lock(applied):
+    applied.append('fail')
+    db = Database()
+    with pytest.raises(MigrationError):
+        upgrade(db)
+    assert db.versions == [1, 2]
+    assert db.statements()[-1].startswith('SELECT RELEASE_LOCK')
+    applied.remove('fail')
+    assert upgrade(db) == [(3, 'step 3')]
+
+
+def test_concurrent_upgrade_is_refused(applied):
+    with pytest.raises(MigrationError):
+        upgrade(Database(lock=0))
+    assert applied == []
+
+
+@pytest.mark.parametrize('admin_exists, counters_exist', [(False, True), (True, False), (True, True)])
+def test_seed_data_only_announces_an_admin_it_created(capsys, monkeypatch, admin_exists, counters_exist):
+    monkeypatch.setattr(migrations, 'rebuild_stats', lambda cursor: ({}, 0))
+
+    def respond(sql, params):
+        if sql.startswith('SELECT username FROM administrators'):
+            return [('admin',)] if admin_exists else []
+        if sql.startswith('SELECT 1 FROM stat_counters'):
+            return [(1,)] if counters_exist else []
+        return []
+    db = FakeConnection(respond)
+    migrations.seed_data(db.cursor())
+    created = any(sql.startswith('INSERT INTO administrators') for sql in db.statements())
+    assert created == (not admin_exists)
+    assert ('Default admin account created' in capsys.readouterr().out) == created
+
+
+def legacy_database(orphaned_claims):
+    """No foreign keys yet, and ``orphaned_claims`` claims on found items that were deleted"""
+    def respond(sql, params):
+        if sql.startswith('SELECT 1 FROM information_schema.statistics'):
+            return [(1,)]
+        if sql.startswith('SELECT COUNT(*)'):
+            return [(0,)]
+        if sql.startswith('DELETE t FROM claims t LEFT JOIN found_items'):
+            return [()] * orphaned_claims   # sets rowcount
+        return []
+    return FakeConnection(respond)
+
+
+def test_reference_keys_delete_orphans_before_adding_keys(monkeypatch, capsys):
+    rebuilt = []
+    monkeypatch.setattr(migrations, 'rebuild_stats', lambda cursor: rebuilt.append(cursor))
+    db = legacy_database(orphaned_claims=2)
+    migrations.add_reference_keys(db.cursor())
+    statements = db.statements()
+    
+    def position(text):
+        return next(i for i, sql in enumerate(statements) if text in sql)
+    delete = position('DELETE t FROM claims t LEFT JOIN found_items')
+    key = position('FOREIGN KEY (found_item_id)')
+    assert statements[delete - 1].startswith('UPDATE blob_refs')   # their proof photos lose a reference
+    assert delete < key
+    assert len(rebuilt) == 1
+    assert 'Deleted 2 claims rows with no matching found_items.id' in capsys.readouterr().out
+
+
+def test_reference_keys_leave_clean_databases_alone(monkeypatch):
+    rebuilt = []
+    monkeypatch.setattr(migrations, 'rebuild_stats', lambda cursor: rebuilt.append(cursor))
+    migrations.add_reference_keys(legacy_database(orphaned_claims=0).cursor())
+    assert rebuilt == []
+
+
+def test_conversations_are_backfilled_from_messages():
+    def respond(sql, params):
+        if sql.startswith('SELECT pair.low_user'):
+            return [('Bob', 'alice', 7, '2024-05-01 10:00:00', 'see you at the library', 2, 0),
+                    ('carol', 'carol', 9, '2024-05-02 09:00:00', 'note to self', 0, 0)]
+        return []
+    db = FakeConnection(respond)
+    migrations.backfill_conversations(db.cursor())
+    inserts = [params for sql, params in db.log if sql.startswith('INSERT INTO conversations')]
+    assert db.statements()[1] == 'DELETE FROM conversations'
+    assert inserts == [('alice', 'Bob', 7, '2024-05-01 10:00:00', 'see you at the library', 0, 2),
+                       ('carol', 'carol', 9, '2024-05-02 09:00:00', 'note to self', 0, 0)]
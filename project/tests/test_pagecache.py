@@ -0,0 +1,63 @@
+import pagecache
+from pagecache import PageCache, bump_versions, make_etag, read_versions
+
+from conftest import FakeConnection
+
+
+def test_entries_are_served_only_for_their_etag():
+    cache = PageCache()
+    cache.put('/item/1', 'etag-1', '<html>1</html>', ['found_items:1'])
+    assert cache.get('/item/1', 'etag-1') == '<html>1</html>'
+    assert cache.get('/item/1', 'etag-2') is None
+    assert cache.get('/item/2', 'etag-1') is None
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(pagecache.time, 'monotonic', lambda: now[0])
+    cache = PageCache(ttl=10)
+    cache.put('k', 'e', 'html', [])
+    now[0] = 109.0
+    assert cache.get('k', 'e') == 'html'
+    now[0] = 111.0
+    assert cache.get('k', 'e') is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PageCache(max_entries=2)
+    cache.put('a', 'e', 'A', ['r:a'])
+    cache.put('b', 'e', 'B', ['r:b'])
+    cache.get('a', 'e')
+    cache.put('c', 'e', 'C', ['r:c'])
+    assert cache.get('a', 'e') == 'A'
+    assert cache.get('b', 'e') is None
+    assert 'r:b' not in cache._by_resource
+
+
+def test_invalidate_drops_every_page_built_from_a_resource():
+    cache = PageCache()
+    cache.put('list', 'e', 'L', ['found_items'])
+    cache.put('item', 'e', 'I', ['found_items', 'found_items:1'])
+    cache.put('other', 'e', 'O', ['lost_items'])
+    cache.invalidate(['found_items'])
+    assert cache.get('list', 'e') is None and cache.get('item', 'e') is None
+    assert cache.get('other', 'e') == 'O'
+    assert set(cache._by_resource) == {'lost_items'}
+
+
+def test_make_etag_depends_on_every_part():
+    assert make_etag('/a', 1) == make_etag('/a', 1)
+    assert make_etag('/a', 1) != make_etag('/a', 2)
+    assert len(make_etag('x')) == 24
+
+
+def test_versions_default_to_zero_and_bumps_are_deduplicated():
+    conn = FakeConnection(lambda sql, params: [('found_items', 3, None)] if sql.startswith('SELECT') else [])
+    cursor = conn.cursor()
+    assert read_versions(cursor, ['found_items', 'found_items:9']) == {'found_items': (3, None),
+                                                                     'found_items:9': (0, None)}
+    bump_versions(cursor, ['b', 'a', 'b'])
+    sql, params = conn.log[-1]
+    assert params == ('a', 'b') and sql.count('(%s, 1)') == 2
+    bump_versions(cursor, [])
+    assert len(conn.log) == 2
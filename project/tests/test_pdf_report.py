@@ -0,0 +1,94 @@
+import base64
+import re
+import zlib
+from datetime import datetime, timedelta
+from io import BytesIO
+
+import pytest
+
+import bench_report
+import pdf_report
+from pdf_report import CachedPages, generate_admin_report, render_admin_report, render_section_fragment
+
+
+def users(first, count):
+    start = datetime(2024, 1, 1)
+    return [{'username': f'user{n}', 'email': f'user{n}@campus.edu', 'created_at': start + timedelta(days=n)}
+            for n in range(first, first + count)]
+
+
+def parse_pdf(data):
+    """Re-read a PDF the way a viewer would: every xref entry must point at its
+    object, the page tree must count every page, and each page's content stream
+    must decode. Returns the decoded content streams in page order."""
+    assert data.startswith(b'%PDF-') and data.rstrip().endswith(b'%%EOF')
+    xref = int(re.search(rb'startxref\s+(\d+)', data).group(1))
+    assert data[xref:xref + 4] == b'xref'
+    first, count = map(int, re.match(rb'xref\s+(\d+) (\d+)', data[xref:]).groups())
+    entries = re.findall(rb'(\d{10}) (\d{5}) ([nf])', data[xref:])[:count]
+    objects = {}
+    for number, (offset, _, used) in enumerate(entries, first):
+        if used == b'n':
+            assert re.match(rb'%d 0 obj' % number, data[int(offset):]), f"xref entry {number} is off"
+            objects[number] = data[int(offset):data.index(b'endobj', int(offset))]
+
+    def content(number):
+        body = objects[number]
+        raw = body[body.index(b'stream') + 6:body.rindex(b'endstream')].strip(b'\r\n')
+        if b'/ASCII85Decode' in body:
+            raw = base64.a85decode(raw.removeprefix(b'<~').removesuffix(b'~>'))
+        return zlib.decompress(raw) if b'/FlateDecode' in body else raw
+
+    tree, = [obj for obj in objects.values() if re.search(rb'/Type /Pages\b', obj)]
+    kids = [int(n) for n in re.findall(rb'(\d+) 0 R', re.search(rb'/Kids \[(.*?)\]', tree, re.S).group(1))]
+    assert int(re.search(rb'/Count (\d+)', tree).group(1)) == len(kids)
+    assert len(kids) == sum(1 for obj in objects.values() if re.search(rb'/Type /Page\b', obj))
+    return [content(int(re.search(rb'/Contents (\d+) 0 R', objects[kid]).group(1))) for kid in kids]
+
+
+@pytest.mark.skipif(not pdf_report.SPLICE_SUPPORTED, reason='page splicing is off for this reportlab')
+def test_spliced_report_reparses_with_cached_pages_in_place():
+    # Two months of users, each rendered once as a fragment and then spliced in
+    months = [render_section_fragment('users', f'2024-0{m}', 60, users(m * 100, 60)) for m in (1, 2)]
+    assert all(months)
+    summary = {'total_users': 120, 'total_admins': 1}
+    rows = {'admins': [{'username': 'admin', 'created_by': 'system', 'created_at': datetime(2024, 1, 1)}]}
+    fragments = {'users': [CachedPages(lambda pages=pages: pages) for pages in months]}
+    output = render_admin_report(summary, rows, BytesIO(), sections=['users'], fragments=fragments)
+
+    pages = [re.findall(rb'\(([^()]*)\) Tj', stream) for stream in parse_pdf(output.getvalue())]
+    assert not any(b'ERROR GENERATING REPORT' in text for text in pages)
+
+    def page_of(text):
+        # Past the cover and the table of contents, which repeats the headings
+        return next(n for n, page in enumerate(pages[2:], 3) if text in page)
+    # Cached pages keep their order and sit between the summary and the admin list
+    order = [page_of(text) for text in (b'1. SYSTEM SUMMARY', b'user100', b'user159', b'user200', b'user259',
+                                        b'6. ADMINISTRATORS')]
+    assert order == sorted(order) and order[0] < order[1] and order[-2] < order[-1]
+    # The table of contents points at where the sections actually landed
+    contents = pages[1]
+    assert contents[contents.index(b'2. USER DETAILS') + 1] == b'Page %d' % order[1]
+    assert contents[contents.index(b'6. ADMINISTRATORS') + 1] == b'Page %d' % order[-1]
+
+
+def test_report_without_fragments_reparses():
+    output = generate_admin_report(*bench_report.synthetic_data(200))
+    text = b'\n'.join(parse_pdf(output.read()))
+    assert b'ERROR GENERATING REPORT' not in text and b'(user0)' in text
+
+
+def test_splicing_refuses_untested_reportlab(monkeypatch):
+    monkeypatch.setattr(pdf_report, 'SPLICE_SUPPORTED', False)
+    with pytest.raises(RuntimeError):
+        render_section_fragment('users', '2024-01', 1, users(0, 1))
+    # Plain reports still render, compressed by reportlab at save()
+    output = generate_admin_report(*bench_report.synthetic_data(40))
+    assert b'(user0)' in b'\n'.join(parse_pdf(output.read()))
+
+
+def test_report_bench_measures_a_small_run():
+    result = bench_report.run(400)
+    assert result['rows'] == 400
+    assert result['render_seconds'] > 0 and result['pdf_mb'] >= 0
+    assert result['peak_rss_mb'] >= result['input_rss_mb'] > 0
@@ -0,0 +1,86 @@
+import pytest
+
+from querylog import QueryLog, format_slow_request, normalize_sql
+
+from conftest import FakeConnection
+
+
+@pytest.mark.parametrize('sql, expected', [
+    ("SELECT *\n  FROM t WHERE a = %s", "SELECT * FROM t WHERE a = %s"),
+    ("SELECT * FROM t WHERE name = 'o''brien' AND n > 42 LIMIT 24", "SELECT * FROM t WHERE name = ? AND n > ? LIMIT ?"),
+    ("SELECT * FROM t WHERE id IN (%s)", "SELECT * FROM t WHERE id IN (...)"),
+    ("SELECT * FROM t WHERE id IN (%s, %s,%s)", "SELECT * FROM t WHERE id IN (...)"),
+    ("INSERT INTO v (name, version) VALUES (%s, 1), (%s, 1), (%s, 1)", "INSERT INTO v (name, version) VALUES (%s, ?), ..."),
+    ("SELECT idx_1, t1.c2 FROM t1", "SELECT idx_1, t1.c2 FROM t1"),
+])
+def test_normalize_sql(sql, expected):
+    assert normalize_sql(sql) == expected
+
+
+def rows_for(sql, params):
+    return [(i,) for i in range(3)] if sql.startswith('SELECT') else []
+
+
+def test_request_breakdown_and_window_by_shape():
+    log = QueryLog()
+    conn = log.wrap(FakeConnection(rows_for))
+    log.begin_request('view_items')
+    cursor = conn.cursor()
+    for item_id in (1, 2):
+        cursor.execute("SELECT id FROM found_items WHERE id = %s", (item_id,))
+        cursor.fetchall()
+    cursor.execute("UPDATE users SET last_login = NOW() WHERE id = %s", (1,))
+    cursor.close()
+    report = log.end_request(slow_ms=0, label='GET /user/view_items')
+
+    assert report['route'] == 'view_items' and report['query_count'] == 3
+    assert [(q['rows'], q['params']) for q in report['queries']] == [(3, 1), (3, 1), (0, 1)]
+    assert 'GET /user/view_items (view_items)' in format_slow_request(report)
+    assert list(log.slow_requests) == [report]
+
+    shapes = {shape['sql']: shape for shape in log.slowest(10)}
+    select = shapes['SELECT id FROM found_items WHERE id = %s']
+    assert select['count'] == 2 and select['rows'] == 6 and select['routes'] == {'view_items': 2}
+
+
+def test_fast_requests_are_not_reported_but_still_counted():
+    log = QueryLog()
+    conn = log.wrap(FakeConnection(rows_for))
+    log.begin_request('index')
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1")
+    assert list(cursor) == [(0,), (1,), (2,)]
+    assert log.end_request(slow_ms=10000) is None
+    assert log.slowest(1, sort='count')[0]['rows'] == 3
+
+
+def test_statements_outside_requests_are_folded_when_the_cursor_moves_on():
+    log = QueryLog()
+    cursor = log.wrap(FakeConnection(rows_for)).cursor()
+    cursor.execute("SELECT a FROM t")
+    assert log.slowest() == []
+    cursor.execute("SELECT b FROM t")
+    cursor.close()
+    assert {shape['sql']: shape['routes'] for shape in log.slowest()} == {
+        'SELECT a FROM t': {'background': 1}, 'SELECT b FROM t': {'background': 1}}
+
+
+def test_window_expires_old_buckets(monkeypatch):
+    import querylog
+    now = [1000.0]
+    monkeypatch.setattr(querylog.time, 'time', lambda: now[0])
+    log = QueryLog(window=120, bucket_seconds=60)
+    cursor = log.wrap(FakeConnection()).cursor()
+    cursor.execute("SELECT 1")
+    cursor.close()
+    assert len(log.slowest()) == 1
+    now[0] += 240
+    assert log.slowest() == []
+
+
+def test_slow_requests_go_to_the_querylog_logger(app_module, fake_db, login, monkeypatch, caplog):
+    fake_db()
+    monkeypatch.setitem(app_module.app.config, 'SLOW_REQUEST_MS', 0)
+    login(user='bob').get('/user/messages')
+    reports = [record for record in caplog.records if 'Slow request GET /user/messages' in record.message]
+    assert [(record.name, record.levelname) for record in reports] == [('querylog', 'WARNING')]
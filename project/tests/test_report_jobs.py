@@ -0,0 +1,84 @@
+import os
+from datetime import datetime
+
+import pytest
+
+import pdf_report
+import report_jobs
+from conftest import FakeConnection
+from test_pdf_report import parse_pdf
+
+OPTIONS = {'date_from': '2024-01-01', 'date_to': '2024-02-29', 'sections': ['users', 'found_items']}
+
+
+class ReportDatabase(FakeConnection):
+    """Two months of users and found items; ``checksum`` stands in for the January users' data version"""
+
+    def __init__(self):
+        super().__init__(self.respond)
+        self.checksum = 1
+        self.row_queries = 0
+
+    def respond(self, sql, params):
+        if 'EXTRACT(YEAR_MONTH FROM created_at)' in sql:
+            return [{'month': 202401, 'total_users': 3, 'active_users': 3, 'max_id': 3, 'checksum': self.checksum},
+                    {'month': 202402, 'total_users': 2, 'active_users': 2, 'max_id': 5, 'checksum': 7}]
+        if 'EXTRACT(YEAR_MONTH FROM posted_date)' in sql:
+            return [{'month': 202402, 'total_found': 2, 'active_found': 2, 'claimed_found': 0,
+                     'max_id': 2, 'updated': datetime(2024, 2, 3)}]
+        if 'EXTRACT(YEAR_MONTH' in sql:
+            return []
+        if sql.startswith('SELECT username, email'):
+            self.row_queries += 1
+            january = params[0] == datetime(2024, 1, 1).date()
+            return [{'username': f'user{n}', 'email': f'user{n}@campus.edu', 'created_at': datetime(2024, 1, n)}
+                    for n in ((1, 2, 3) if january else (4, 5))]
+        if sql.startswith('SELECT id, device_name'):
+            self.row_queries += 1
+            return [{'id': n, 'device_name': f'Bottle {n}', 'posted_by': 'user1', 'location': 'Gym',
+                     'status': 'active', 'posted_date': datetime(2024, 2, n)} for n in (1, 2)]
+        if sql.startswith('SELECT COUNT(*) FROM administrators'):
+            return [(1,)]
+        if sql == report_jobs.ADMINS_QUERY:
+            return [{'username': 'admin', 'created_by': 'system', 'created_at': datetime(2024, 1, 1)}]
+        return []
+
+
+@pytest.fixture
+def database(monkeypatch):
+    db = ReportDatabase()
+    monkeypatch.setattr(report_jobs.mysql.connector, 'connect', lambda **kwargs: db)
+    return db
+
+
+def render(tmp_path):
+    output = tmp_path / 'report.pdf'
+    report_jobs.run_admin_report({}, 100, OPTIONS, str(output), str(tmp_path / 'report.progress'))
+    return b'\n'.join(parse_pdf(output.read_bytes()))
+
+
+@pytest.mark.skipif(not pdf_report.SPLICE_SUPPORTED, reason='page splicing is off for this reportlab')
+def test_report_renders_from_a_cold_cache_and_after_a_change(tmp_path, database):
+    text = render(tmp_path)
+    assert b'ERROR GENERATING REPORT' not in text
+    assert all(name in text for name in (b'(user1)', b'(user5)', b'(Bottle 2)', b'(admin)'))
+    assert database.row_queries == 3
+
+    # Unchanged months come from the fragment cache
+    render(tmp_path)
+    assert database.row_queries == 3
+
+    # Only the changed month is read and laid out again, and the report still renders
+    database.checksum = 2
+    text = render(tmp_path)
+    assert database.row_queries == 4
+    assert b'ERROR GENERATING REPORT' not in text and b'(user3)' in text and b'(admin)' in text
+
+
+def test_failed_render_fails_the_job_instead_of_writing_an_error_report(tmp_path, database, monkeypatch):
+    def broken(*args, **kwargs):
+        raise ValueError('layout failed')
+    monkeypatch.setattr(pdf_report, '_report_story', broken)
+    with pytest.raises(ValueError):
+        render(tmp_path)
+    assert not [name for name in os.listdir(tmp_path) if name.startswith('report.pdf')]
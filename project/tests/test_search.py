@@ -0,0 +1,125 @@
+import random
+import threading
+
+from search import SearchIndex, analyze, edit_distance
+
+
+def item(item_id, name, description='', color='', location='', status='active'):
+    return dict(id=item_id, device_name=name, description=description, color=color, location=location,
+                status=status)
+
+
+def ids(results):
+    return [(row['item_type'], row['id']) for row in results]
+
+
+def build():
+    index = SearchIndex()
+    index.load(
+        [item(1, 'iPhone 13', 'cracked screen', 'black', 'Main Library'),
+         item(2, 'Water bottle', 'has an iphone sticker', 'blue', 'Gym'),
+         item(3, 'Samsung Galaxy', 'phone in a black case', 'black', 'Cafeteria', status='claimed')],
+        [item(1, 'MacBook Air', 'silver laptop', 'silver', 'Lab 3'),
+         item(2, 'iPhone 12', '', 'red', 'Bus Stop')],
+    )
+    return index
+
+
+def test_analyze_stems_and_drops_stopwords():
+    assert analyze('The phones were charging') == ['phone', 'charg']
+
+
+def test_edit_distance_counts_transpositions_and_stops_at_limit():
+    assert edit_distance('iphone', 'iphnoe', 2) == 1
+    assert edit_distance('iphone', 'iphoen', 2) == 1
+    assert edit_distance('iphone', 'laptop', 2) == 3
+
+
+def test_device_name_outranks_description():
+    total, results = build().search('iphone')
+    assert total == 3
+    assert ids(results)[-1] == ('found', 2)   # only mentioned in the description
+
+
+def test_typos_are_matched():
+    total, results = build().search('macbok')
+    assert ids(results) == [('lost', 1)]
+
+
+def test_last_word_matches_as_prefix():
+    total, results = build().search('sams')
+    assert ids(results) == [('found', 3)]
+
+
+def test_documents_matching_more_words_rank_first():
+    total, results = build().search('black iphone')
+    assert ids(results)[0] == ('found', 1)
+
+
+def test_type_and_status_filters():
+    index = build()
+    assert ids(index.search('iphone', item_types=['lost'])[1]) == [('lost', 2)]
+    assert ('found', 3) not in ids(index.search('black', statuses=['active'])[1])
+
+
+def test_limit_offset_page_through_hits():
+    index = build()
+    total, everything = index.search('iphone', limit=10)
+    assert ids(index.search('iphone', limit=1, offset=1)[1]) == ids(everything)[1:2]
+
+
+def test_add_and_remove_keep_postings_current():
+    index = build()
+    index.add('found', item(4, 'Umbrella', 'green'))
+    assert ids(index.search('umbrella')[1]) == [('found', 4)]
+    index.add('found', item(4, 'Headphones'))
+    assert index.search('umbrella') == (0, [])
+    index.remove('found', 4)
+    assert index.search('headphones') == (0, [])
+    assert index.size() == 5
+
+
+def test_empty_query_and_empty_index():
+    assert build().search('the of') == (0, [])
+    assert SearchIndex().search('iphone') == (0, [])
+
+
+def test_top_hits_match_a_full_ranking():
+    rng = random.Random(3)
+    words = ['black', 'phone', 'case', 'blue', 'umbrella', 'charger', 'keys', 'library', 'gym', 'scratched']
+    rows = [item(n, ' '.join(rng.sample(words, 2)), ' '.join(rng.choices(words, k=rng.randint(0, 6))),
+                 rng.choice(words), rng.choice(words), rng.choice(['active', 'claimed']))
+            for n in range(1, 400)]
+    index = SearchIndex()
+    index.load(rows, rows[:200])
+    for query in ['phone', 'black phone', 'blak umbrela', 'case keys gym']:
+        for filters in [{}, {'item_types': ['lost'], 'statuses': ['active']}]:
+            total, everything = index.search(query, limit=1000, **filters)
+            for limit, offset in [(5, 0), (7, 13)]:
+                page_total, page = index.search(query, limit=limit, offset=offset, **filters)
+                assert page_total == total
+                assert [row['score'] for row in page] == [row['score'] for row in everything[offset:offset + limit]]
+
+
+def test_status_changes_move_items_between_filters():
+    index = build()
+    index.add('found', item(1, 'iPhone 13', status='claimed'))
+    assert index.search('iphone', statuses=['claimed'])[0] == 1
+    assert ids(index.search('iphone', statuses=['active'])[1]) == [('lost', 2), ('found', 2)]
+
+
+def test_rebuild_does_not_block_searches():
+    index = build()
+    searched = []
+
+    def rows():
+        # Runs while load() is building the new index
+        reader = threading.Thread(target=lambda: searched.append(index.search('macbook')))
+        reader.start()
+        reader.join(timeout=5)
+        yield item(9, 'Keys')
+
+    index.load(rows(), [])
+    assert ids(searched[0][1]) == [('lost', 1)]
+    assert ids(index.search('keys')[1]) == [('found', 9)]
+    assert index.search('macbook') == (0, [])
@@ -0,0 +1,71 @@
+import random
+
+from similar import ImageHashIndex
+
+
+def flip(value, bits):
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+def brute_force(rows, query, max_distance, exclude=None):
+    found = {}
+    for item_type, row in rows:
+        distance = (row['image_hash'] ^ query).bit_count()
+        if distance <= max_distance and (item_type, row['id']) != exclude:
+            found[(item_type, row['id'])] = distance
+    return found
+
+
+def test_matches_brute_force_on_random_hashes():
+    rng = random.Random(7)
+    bases = [rng.getrandbits(64) for _ in range(20)]
+    rows = []
+    for i in range(2000):
+        # Clusters of near-duplicates around a few photos, plus unrelated ones
+        value = flip(rng.choice(bases), rng.sample(range(64), rng.randrange(0, 14))) if i % 2 else rng.getrandbits(64)
+        rows.append(('found' if i % 3 else 'lost', {'id': i, 'image_hash': value}))
+    index = ImageHashIndex()
+    index.load({'found': [r for t, r in rows if t == 'found'], 'lost': [r for t, r in rows if t == 'lost']})
+
+    for base in bases:
+        query = flip(base, rng.sample(range(64), 3))
+        expected = brute_force(rows, query, index.max_distance)
+        results = index.similar(query, k=len(rows))
+        assert {(r['item_type'], r['item']['id']): r['distance'] for r in results} == expected
+        assert [r['distance'] for r in results] == sorted(r['distance'] for r in results)
+
+
+def test_exclude_item_types_and_k():
+    index = ImageHashIndex()
+    index.load({'found': [{'id': 1, 'image_hash': 0b1111}, {'id': 2, 'image_hash': 0b0111}],
+                'lost': [{'id': 1, 'image_hash': 0b0011}, {'id': 9, 'image_hash': 0}]})
+    results = index.similar(0b1111, k=2, exclude=('found', 1))
+    assert [(r['item_type'], r['item']['id'], r['distance']) for r in results] == [('found', 2, 1), ('lost', 1, 2)]
+    assert [r['item']['id'] for r in index.similar(0b1111, item_types={'lost'})] == [1, 9]
+    assert index.similar(0b1111, k=1)[0]['similarity'] == 1.0
+
+
+def test_rows_without_hash_are_skipped_and_add_remove():
+    index = ImageHashIndex()
+    index.load({'found': [{'id': 1, 'image_hash': None}]})
+    assert index.size() == 0
+    index.add('found', {'id': 1, 'image_hash': 42})
+    assert [r['item']['id'] for r in index.similar(42)] == [1]
+    index.add('found', {'id': 1, 'image_hash': None})
+    assert index.similar(42) == []
+    index.add('lost', {'id': 3, 'image_hash': 42})
+    index.remove('lost', 3)
+    assert index.size() == 0
+
+
+def test_status_filter_applies_before_k():
+    index = ImageHashIndex()
+    index.load({'found': [{'id': 1, 'image_hash': 0b1111, 'status': 'claimed'},
+                          {'id': 2, 'image_hash': 0b0111, 'status': 'resolved'},
+                          {'id': 3, 'image_hash': 0b0011, 'status': 'active'}],
+                'lost': [{'id': 4, 'image_hash': 0b0001, 'status': 'active'}]})
+    results = index.similar(0b1111, k=1, statuses=['active'])
+    assert [(r['item_type'], r['item']['id']) for r in results] == [('found', 3)]
+    assert len(index.similar(0b1111, k=4)) == 4